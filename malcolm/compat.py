@@ -18,6 +18,10 @@ def get_stack_size():
     return int(os.environ.get("PYMALCOLM_STACK_SIZE", "0"))
 
 
+def get_pool_size():
+    return int(os.environ.get("PYMALCOLM_POOL_SIZE", "0"))
+
+
 def et_to_string(element: ET.Element) -> str:
     xml = '<?xml version="1.0" ?>'
     try:
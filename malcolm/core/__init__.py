@@ -1,7 +1,7 @@
 # Make a nice namespace
 from .alarm import Alarm, AlarmSeverity, AlarmStatus
 from .camel import CAMEL_RE, camel_to_title, snake_to_camel
-from .concurrency import Queue, RLock, Spawned, sleep
+from .concurrency import Queue, RLock, Spawned, Timer, sleep
 from .context import Context
 from .controller import DEFAULT_TIMEOUT, ADescription, AMri, Controller
 from .define import Define
@@ -54,7 +54,7 @@ from .models import (
     VArrayMeta,
     VMeta,
 )
-from .moduleutil import submodule_all
+from .moduleutil import lazy_import, submodule_all
 from .notifier import Notifier
 from .part import PART_NAME_RE, APartName, Part, PartRegistrar
 from .process import (
@@ -1,7 +1,7 @@
 import logging
 import time
 from threading import get_ident as get_thread_ident
-from typing import Any, Callable, Dict, Tuple, TypeVar, Union
+from typing import Any, Callable, Dict, Optional, Set, Tuple, TypeVar, Union
 
 import cothread
 
@@ -18,6 +18,7 @@ log = logging.getLogger(__name__)
 # Re-export
 sleep = cothread.Sleep
 RLock = cothread.RLock
+Timer = cothread.Timer
 
 
 class Spawned:
@@ -25,13 +26,24 @@ class Spawned:
 
     NO_RESULT = object()
 
-    def __init__(self, func: Callable[..., Any], args: Tuple, kwargs: Dict) -> None:
+    def __init__(
+        self,
+        func: Callable[..., Any],
+        args: Tuple,
+        kwargs: Dict,
+        pool: "SpawnPool" = None,
+        on_done: Callable[["Spawned"], None] = None,
+    ) -> None:
         self._result_queue = Queue()
         self._result: Union[Any, Exception] = self.NO_RESULT
         self._function = func
         self._args = args
         self._kwargs = kwargs
-        cothread.Spawn(self.catching_function, stack_size=get_stack_size())
+        self._on_done = on_done
+        if pool is None:
+            cothread.Spawn(self.catching_function, stack_size=get_stack_size())
+        else:
+            pool.submit(self)
 
     def catching_function(self):
         try:
@@ -51,6 +63,9 @@ class Spawned:
         self._args = None
         self._kwargs = None
         self._result_queue.put(None)
+        if self._on_done:
+            self._on_done(self)
+            self._on_done = None
 
     def wait(self, timeout: float = None) -> None:
         # Only one person can wait on this at a time
@@ -69,6 +84,56 @@ class Spawned:
         return self._result
 
 
+class SpawnPool:
+    """Worker cothreads that are reused to run Spawned functions. Up to size
+    idle workers are kept waiting for work. If they are all busy then a new
+    one is made, so a function that waits on another can't deadlock the pool
+    """
+
+    def __init__(self, size: int) -> None:
+        self.size = size
+        self._jobs = cothread.EventQueue()
+        # Number of workers waiting on _jobs that haven't been given one yet
+        self._idle = 0
+        # Spawned functions that have been submitted but not finished
+        self._busy: Set[Spawned] = set()
+
+    def submit(self, spawned: Spawned) -> None:
+        """Run spawned.catching_function in an idle worker, or a new one"""
+        self._busy.add(spawned)
+        if self._idle:
+            # Reserve this worker now, so a second submit before it wakes
+            # doesn't count it as idle
+            self._idle -= 1
+            self._jobs.Signal(spawned)
+        else:
+            cothread.Spawn(self._worker, spawned, stack_size=get_stack_size())
+
+    def _worker(self, spawned: Optional[Spawned]) -> None:
+        while spawned is not None:
+            spawned.catching_function()
+            self._busy.discard(spawned)
+            if self._idle >= self.size:
+                # Enough idle workers already
+                return
+            self._idle += 1
+            spawned = self._jobs.Wait()
+
+    def close(self, timeout: float = None) -> None:
+        """Wait for the busy workers to finish their functions, then tell all
+        the idle workers to finish
+
+        Args:
+            timeout: Maximum time in seconds to wait for each busy worker,
+                wait forever if None
+        """
+        for spawned in list(self._busy):
+            spawned.wait(timeout)
+        while self._idle:
+            self._idle -= 1
+            self._jobs.Signal(None)
+
+
 class Queue:
     """Threadsafe and cothreadsafe queue with gets in calling thread"""
 
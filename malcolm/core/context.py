@@ -1,7 +1,7 @@
 import logging
 import time
 import weakref
-from typing import TYPE_CHECKING, Any, Callable, Dict, List, Tuple, Union
+from typing import TYPE_CHECKING, Any, Callable, Dict, List, Optional, Tuple, Union
 
 import cothread
 
@@ -38,6 +38,10 @@ class Context:
         self._pending_unsubscribes: Dict[Future, Subscribe] = {}
         # If not None, wait for this before listening to STOPs
         self._sentinel_stop = None
+        # If not None, [(model, child_name, value)] of the values read, and
+        # [(path, params)] of the Methods posted through this Context
+        self._reads: Optional[List[Tuple["Model", str, Any]]] = None
+        self._posts: Optional[List[Tuple[List[str], Any]]] = None
 
     @property
     def mri_list(self) -> List[str]:
@@ -63,7 +67,25 @@ class Context:
     def make_view(
         self, controller: "Controller", data: "Model", child_name: str
     ) -> Any:
-        return controller.make_view(self, data, child_name)
+        view = controller.make_view(self, data, child_name)
+        if self._reads is not None and child_name == "value":
+            self._reads.append((data, child_name, data[child_name]))
+        return view
+
+    def record_reads(
+        self,
+        reads: List[Tuple["Model", str, Any]],
+        posts: List[Tuple[List[str], Any]],
+    ) -> None:
+        """Record what is read and posted through this Context from now on
+
+        Args:
+            reads: List to append (model, "value", value) to when a value is
+                read
+            posts: List to append (path, params) to when a Method is posted
+        """
+        self._reads = reads
+        self._posts = posts
 
     def _get_next_id(self):
         new_id = self._next_id
@@ -165,6 +187,8 @@ class Context:
         Returns:
              Future: as single Future that will resolve to the result
         """
+        if self._posts is not None:
+            self._posts.append((path, params))
         request = Post(self._get_next_id(), path, params)
         request.set_callback(self._q.put)
         future = self._dispatch_request(request)
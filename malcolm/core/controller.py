@@ -13,7 +13,7 @@ from .errors import FieldError, NotWriteableError, UnexpectedError
 from .hook import Hook, Hookable, start_hooks, wait_hooks
 from .info import Info
 from .models import AttributeModel, BlockModel, MethodLog, MethodModel, Model
-from .notifier import Notifier, freeze
+from .notifier import Notifier
 from .part import FieldRegistry, InfoRegistry, Part, PartRegistrar
 from .request import Get, Post, Put, Request, Subscribe, Unsubscribe
 from .response import Response
@@ -168,8 +168,9 @@ class Controller(Hookable):
                 raise UnexpectedError(
                     f"Object '{path}' of type {typ!r} has no attribute '{endpoint}'"
                 )
-        # Important to freeze now with the lock so we get a consistent set
-        serialized = freeze(data)
+        # Important to freeze now with the lock so we get a consistent set.
+        # The notifier reuses frozen objects for anything that hasn't changed
+        serialized = self._notifier.freeze(request.path[1:], data)
         ret = [request.return_response(serialized)]
         return ret
 
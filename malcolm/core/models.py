@@ -1279,6 +1279,9 @@ class BlockMeta(Meta):
 class BlockModel(Model):
     """Data Model for a Block"""
 
+    # The name and type of each endpoint, cached until they change
+    _endpoints_key: Optional[Tuple[Tuple[str, type], ...]] = None
+
     def __init__(self) -> None:
         # Make a new call_types dict so we don't modify for all instances
         self.call_types = OrderedDict()
@@ -1309,8 +1312,18 @@ class BlockModel(Model):
             return value
 
     def _update_fields(self):
+        self._endpoints_key = None
         self.meta.set_fields([x for x in self.call_types if x != "meta"])
 
+    def endpoints_key(self) -> Tuple[Tuple[str, type], ...]:
+        """The name and Model type of each endpoint, so that views of Blocks
+        with the same endpoints can share a class"""
+        if self._endpoints_key is None:
+            self._endpoints_key = tuple(
+                (k, type(getattr(self, k))) for k in self.call_types
+            )
+        return self._endpoints_key
+
     def remove_endpoint(self, name: str) -> None:
         with self.notifier.changes_squashed:
             getattr(self, name).set_notifier_path(Model.notifier, [])
@@ -1,4 +1,6 @@
-from typing import Any, Dict, List, Union
+import importlib
+import sys
+from typing import Any, Callable, Dict, List, Sequence, Union
 
 
 def submodule_all(
@@ -8,3 +10,36 @@ def submodule_all(
     return sorted(
         k for k, v in globals_d.items() if not only_classes or isinstance(v, type)
     )
+
+
+def lazy_import(
+    package_name: str, submodules: Sequence[str], members: Dict[str, str] = None
+) -> Callable[[str], Any]:
+    """Make a module __getattr__ for a package that only imports its
+    submodules when they are first accessed
+
+    Args:
+        package_name: The __name__ of the package
+        submodules: The submodules to import on access, like ["parts", "util"]
+        members: Names to get from submodules on access, like
+            {"APartName": "util"}
+
+    Returns:
+        A function to assign to __getattr__ in the package
+    """
+    member_submodules = members or {}
+
+    def __getattr__(name: str) -> Any:
+        if name in submodules:
+            # This also sets it as an attribute of the package, so we won't
+            # be called again for it
+            return importlib.import_module(f"{package_name}.{name}")
+        elif name in member_submodules:
+            submodule_name = member_submodules[name]
+            submodule = importlib.import_module(f"{package_name}.{submodule_name}")
+            value = getattr(submodule, name)
+            setattr(sys.modules[package_name], name, value)
+            return value
+        raise AttributeError(f"module {package_name!r} has no attribute {name!r}")
+
+    return __getattr__
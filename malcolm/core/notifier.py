@@ -1,12 +1,15 @@
+import time
 from contextlib import contextmanager
-from typing import TYPE_CHECKING, Any, Callable, Dict, List, Tuple
+from functools import partial
+from typing import TYPE_CHECKING, Any, Callable, Dict, Iterable, List, Optional, Tuple
 
 from annotypes import Array, FrozenOrderedDict
 
-from .concurrency import RLock
+from .concurrency import RLock, Timer
 from .loggable import Loggable
 from .request import Subscribe, Unsubscribe
-from .response import Response
+from .response import Delta, Response
+from .table import Table
 
 if TYPE_CHECKING:
     from .models import BlockModel
@@ -46,30 +49,189 @@ def freeze(o):
     return o
 
 
+class FrozenCache:
+    """Tree of frozen objects that mirrors the Block. A change invalidates the
+    node at its path, its parents and its children, so unchanged subtrees keep
+    their already frozen objects"""
+
+    # Define slots so it uses less resources to make these
+    __slots__ = ["source", "frozen", "children"]
+
+    def __init__(self) -> None:
+        # The object that frozen was made from
+        self.source: Any = None
+        self.frozen: Any = None
+        self.children: Dict[str, FrozenCache] = {}
+
+    def child(self, name: str) -> "FrozenCache":
+        """Return the child node for name, creating it if needed"""
+        try:
+            return self.children[name]
+        except KeyError:
+            node = self.children[name] = FrozenCache()
+            return node
+
+    def lookup(self, path: List[str]) -> "FrozenCache":
+        """Return the node for path, creating it if needed"""
+        node = self
+        for name in path:
+            node = node.child(name)
+        return node
+
+    def freeze(self, o: Any) -> Any:
+        """Like `freeze`, but reuse the frozen object if o hasn't changed"""
+        if o is self.source:
+            return self.frozen
+        if hasattr(o, "notifier"):
+            frozen = FrozenOrderedDict(
+                (("typeid", o.typeid),)
+                + tuple((k, self.child(k).freeze(getattr(o, k))) for k in o.call_types)
+            )
+        elif isinstance(o, dict):
+            frozen = FrozenOrderedDict(
+                tuple((k, self.child(k).freeze(v)) for k, v in o.items())
+            )
+        else:
+            frozen = freeze(o)
+        self.source = o
+        self.frozen = frozen
+        return frozen
+
+    def invalidate(self, path: List[str]) -> None:
+        """Forget the frozen objects at path, its parents and its children"""
+        node = self
+        for name in path[:-1]:
+            node.source = node.frozen = None
+            if name not in node.children:
+                # Nothing cached below here
+                return
+            node = node.children[name]
+        node.source = node.frozen = None
+        if path:
+            node.children.pop(path[-1], None)
+        else:
+            node.children.clear()
+
+
+def squash_changes(changes: List[List]) -> List[List]:
+    """Remove any change that is overwritten by a later change to the same
+    path or to one of its parents
+
+    Args:
+        changes (list): [[path, optional data]] in the order they were made
+
+    Returns:
+        list: The changes that survive, in the order they were made
+    """
+    if len(changes) < 2:
+        return changes
+    # Paths that a later change has overwritten
+    overwritten = set()
+    squashed = []
+    for change in reversed(changes):
+        path = tuple(change[0])
+        if not any(path[:i] in overwritten for i in range(len(path) + 1)):
+            overwritten.add(path)
+            squashed.append(change)
+    squashed.reverse()
+    return squashed
+
+
+class Throttle:
+    """Rate limits the responses to a Subscribe with a minPeriod. Within each
+    period only the latest Update, or the squashed changes of all the Deltas,
+    is kept and sent when the period expires"""
+
+    __slots__ = ["callback", "min_period", "flush", "last_sent", "pending", "timer"]
+
+    def __init__(self, request: Subscribe, flush: Callable[[], None]) -> None:
+        self.callback = request.callback
+        self.min_period = request.minPeriod
+        # Called by the timer when the period expires
+        self.flush = flush
+        # The initial response is sent when we subscribe
+        self.last_sent = time.time()
+        self.pending: Optional[Response] = None
+        self.timer: Optional[Timer] = None
+
+    def throttle(self, response: Response) -> bool:
+        """Return True if response can be sent now, otherwise keep it to be
+        sent when the period expires"""
+        now = time.time()
+        if self.pending is None:
+            if now >= self.last_sent + self.min_period:
+                self.last_sent = now
+                return True
+            self.pending = response
+            self.timer = Timer(self.last_sent + self.min_period - now, self.flush)
+        elif isinstance(response, Delta):
+            assert isinstance(self.pending, Delta), f"Expected Delta, got {response}"
+            changes = list(self.pending.changes or []) + list(response.changes or [])
+            self.pending = Delta(id=response.id, changes=squash_changes(changes))
+        else:
+            self.pending = response
+        return False
+
+    def pop_pending(self) -> Optional[Response]:
+        """Return the response kept from this period, noting it has been sent"""
+        response, self.pending = self.pending, None
+        self.timer = None
+        if response is not None:
+            self.last_sent = time.time()
+        return response
+
+    def cancel(self) -> None:
+        """Stop the timer and throw away any pending response"""
+        if self.timer:
+            self.timer.cancel()
+            self.timer = None
+        self.pending = None
+
+
 class Notifier(Loggable):
     """Object that can service callbacks on given endpoints"""
 
     def __init__(self, mri: str, lock: RLock, block: "BlockModel") -> None:
         self.set_logger(mri=mri)
-        self._tree = NotifierNode(block)
+        self._frozen_cache = FrozenCache()
+        self._tree = NotifierNode(block, cache=self._frozen_cache)
         self._lock = lock
         # Incremented every time we do with changes_squashed
         self._squashed_count = 0
         self._squashed_changes: List[List] = []
         self._subscription_keys: SubscriptionKeys = {}
+        # Rate limiters for subscriptions with a minPeriod
+        self._throttles: Dict[Tuple[Callback, int], Throttle] = {}
 
     def handle_subscribe(self, request: Subscribe) -> "CallbackResponses":
         """Handle a Subscribe request from outside. Called with lock taken"""
         ret = self._tree.handle_subscribe(request, request.path[1:])
-        self._subscription_keys[request.generate_key()] = request
+        key = request.generate_key()
+        self._subscription_keys[key] = request
+        if request.minPeriod > 0:
+            self._throttles[key] = Throttle(request, partial(self._flush, key))
         return ret
 
     def handle_unsubscribe(self, request: Unsubscribe) -> "CallbackResponses":
         """Handle a Unsubscribe request from outside. Called with lock taken"""
-        subscribe = self._subscription_keys.pop(request.generate_key())
+        key = request.generate_key()
+        subscribe = self._subscription_keys.pop(key)
+        throttle = self._throttles.pop(key, None)
+        if throttle:
+            throttle.cancel()
         ret = self._tree.handle_unsubscribe(subscribe, subscribe.path[1:])
         return ret
 
+    def freeze(self, path: List[str], data: Any) -> Any:
+        """Freeze the data found at path, reusing frozen objects for anything
+        that hasn't changed. Called with lock taken
+
+        Args:
+            path (list): The path to the data, relative from Block
+            data (object): The data currently at that path
+        """
+        return self._frozen_cache.lookup(path).freeze(data)
+
     @property
     def changes_squashed(self) -> "Notifier":
         """Context manager to allow multiple calls to notify_change() to be
@@ -89,6 +251,7 @@ class Notifier(Loggable):
             data (object): The new data
         """
         assert self._squashed_count, "Called while not squashing changes"
+        self._frozen_cache.invalidate(path[1:])
         self._squashed_changes.append([path[1:], data])
 
     def add_squashed_delete(self, path: List[str]) -> None:
@@ -98,6 +261,7 @@ class Notifier(Loggable):
             path (list): The path of what has changed, relative from Block
         """
         assert self._squashed_count, "Called while not squashing changes"
+        self._frozen_cache.invalidate(path[1:])
         self._squashed_changes.append([path[1:]])
 
     def __enter__(self):
@@ -113,12 +277,34 @@ class Notifier(Loggable):
             if self._squashed_count == 0:
                 changes = self._squashed_changes
                 self._squashed_changes = []
-                # TODO: squash intermediate deltas here?
-                responses += self._tree.notify_changes(changes)
+                responses += self._tree.notify_changes(squash_changes(changes))
+                if self._throttles:
+                    responses = self._throttle_responses(responses)
         finally:
             self._lock.release()
             self._callback_responses(responses)
 
+    def _throttle_responses(
+        self, responses: "CallbackResponses"
+    ) -> "CallbackResponses":
+        ret = []
+        for cb, response in responses:
+            throttle = self._throttles.get((cb, response.id), None)
+            if throttle is None or throttle.throttle(response):
+                ret.append((cb, response))
+        return ret
+
+    def _flush(self, key: Tuple["Callback", int]) -> None:
+        """Called by a Throttle timer when its period has expired"""
+        with self._lock:
+            throttle = self._throttles.get(key, None)
+            if throttle is None:
+                # Unsubscribed while the timer was running
+                return
+            response = throttle.pop_pending()
+        if response is not None:
+            self._callback_responses([(throttle.callback, response)])
+
     def _callback_responses(self, responses: "CallbackResponses") -> None:
         for cb, response in responses:
             try:
@@ -130,14 +316,32 @@ class Notifier(Loggable):
 
 class NotifierNode:
     # Define slots so it uses less resources to make these
-    __slots__ = ["delta_requests", "update_requests", "children", "parent", "data"]
-
-    def __init__(self, data: Any, parent: "NotifierNode" = None) -> None:
+    __slots__ = [
+        "delta_requests",
+        "update_requests",
+        "children",
+        "parent",
+        "data",
+        "path",
+        "cache",
+    ]
+
+    def __init__(
+        self,
+        data: Any,
+        parent: "NotifierNode" = None,
+        path: List[str] = None,
+        cache: FrozenCache = None,
+    ) -> None:
         self.delta_requests: List[Subscribe] = []
         self.update_requests: List[Subscribe] = []
         self.children: Dict[str, NotifierNode] = {}
         self.parent = parent
         self.data = data
+        # The path relative from Block, and the cache of frozen objects
+        # shared by every node in the tree
+        self.path = path or []
+        self.cache = cache or FrozenCache()
 
     def notify_changes(self, changes: List[List]) -> "CallbackResponses":
         """Set our data and notify anyone listening
@@ -158,14 +362,16 @@ class NotifierNode:
 
         # If we have update subscribers, freeze at this level
         if self.update_requests:
-            frozen = freeze(self.data)
+            frozen = self.cache.lookup(self.path).freeze(self.data)
             for request in self.update_requests:
                 ret.append(request.update_response(frozen))
 
         # If we have delta subscribers, freeze the change value
         if self.delta_requests:
             for change in changes:
-                change[-1] = freeze(change[-1])
+                if len(change) == 2:
+                    node = self.cache.lookup(self.path + change[0])
+                    change[1] = node.freeze(change[1])
             for request in self.delta_requests:
                 ret.append(request.delta_response(changes))
 
@@ -204,10 +410,14 @@ class NotifierNode:
             dict: {child_name: [path_list, optional child_data]} of the change
                 that needs to be passed to a child as a result of this
         """
-        self.data = data
+        old_data, self.data = self.data, data
         child_change_dict: Dict[str, List] = {}
+        names: Iterable[str] = self.children
+        if isinstance(data, Table) and old_data.__class__ is data.__class__:
+            # Only the subscribers to columns that changed need to know
+            names = [n for n in data.changed_columns(old_data) if n in self.children]
         # Reflect change of data to children
-        for name in self.children:
+        for name in names:
             child_data = getattr(data, name, None)
             if child_data is None:
                 # Deletion
@@ -235,11 +445,16 @@ class NotifierNode:
             # Recurse down
             name = path[0]
             if name not in self.children:
-                self.children[name] = NotifierNode(getattr(self.data, name, None), self)
+                self.children[name] = NotifierNode(
+                    getattr(self.data, name, None),
+                    self,
+                    self.path + [name],
+                    self.cache,
+                )
             ret += self.children[name].handle_subscribe(request, path[1:])
         else:
             # This is for us
-            frozen = freeze(self.data)
+            frozen = self.cache.lookup(self.path).freeze(self.data)
             if request.delta:
                 self.delta_requests.append(request)
                 ret.append(request.delta_response([[[], frozen]]))
@@ -1,10 +1,11 @@
-from typing import Any, Callable, List, Sequence, Set, TypeVar, Union
+import time
+from typing import Any, Callable, Dict, List, Optional, Sequence, Set, TypeVar, Union
 
 from annotypes import Anno, Array
 
-from malcolm.compat import OrderedDict
+from malcolm.compat import OrderedDict, get_pool_size
 
-from .concurrency import Spawned
+from .concurrency import Spawned, SpawnPool
 from .controller import DEFAULT_TIMEOUT, Controller
 from .errors import TimeoutError
 from .hook import AHookable, Hook, start_hooks, wait_hooks
@@ -14,8 +15,8 @@ from .loggable import Loggable
 T = TypeVar("T")
 
 
-# Clear spawned handles after how many spawns?
-SPAWN_CLEAR_COUNT = 1000
+# How many of the slowest controllers to name when logging the start-up times
+SLOWEST_STARTUP_REPORT = 5
 
 # States for how far in start procedure we've got
 STOPPED = 0
@@ -63,14 +64,30 @@ class ProcessStopHook(Hook):
 class Process(Loggable):
     """Hosts a number of Controllers and provides spawn capabilities"""
 
-    def __init__(self, name: str = "Process") -> None:
+    def __init__(self, name: str = "Process", pool_size: int = None) -> None:
+        """
+        Args:
+            name (str): The name of the process, used in logging
+            pool_size (int): If non-zero, reuse worker cothreads for spawn(),
+                keeping up to this many idle. None means take it from
+                $PYMALCOLM_POOL_SIZE
+        """
         self.set_logger(process_name=name)
         self.name = name
         self._controllers = OrderedDict()  # mri -> Controller
         self._unpublished: Set[str] = set()  # [mri] for unpublishable controllers
+        self._published: List[str] = []  # [mri] in the order they were published
+        # How long each controller took to setup and start
+        # {mri: {"setup": seconds, "start": seconds}}
+        self.startup_times: Dict[str, Dict[str, float]] = OrderedDict()
         self.state = STOPPED
-        self._spawned: List[Spawned] = []
-        self._spawn_count = 0
+        # Spawned functions that are still running
+        self._spawned: Set[Spawned] = set()
+        if pool_size is None:
+            pool_size = get_pool_size()
+        self._pool: Optional[SpawnPool] = None
+        if pool_size:
+            self._pool = SpawnPool(pool_size)
 
     def start(self, timeout=DEFAULT_TIMEOUT):
         """Start the process going
@@ -81,16 +98,40 @@ class Process(Loggable):
         """
         assert self.state == STOPPED, "Process already started"
         self.state = STARTING
+        start = time.time()
         should_publish = self._start_controllers(self._controllers.values(), timeout)
         if should_publish:
             self._publish_controllers(timeout)
         self.state = STARTED
+        self._report_startup_times(time.time() - start)
+
+    def _report_startup_times(self, duration: float) -> None:
+        def total(mri):
+            return sum(self.startup_times[mri].values())
+
+        slowest = sorted(self.startup_times, key=total, reverse=True)
+        self.log.info(
+            "Started %d controllers in %.3fs, slowest %s",
+            len(self.startup_times),
+            duration,
+            ", ".join(
+                f"{mri} {total(mri):.3f}s" for mri in slowest[:SLOWEST_STARTUP_REPORT]
+            ),
+        )
+        lines = [f"{'mri':<40} {'setup':>8} {'start':>8}"]
+        for mri, times in self.startup_times.items():
+            lines.append(
+                f"{mri:<40} {times.get('setup', 0):8.3f} {times.get('start', 0):8.3f}"
+            )
+        self.log.debug("Controller start-up times:\n%s", "\n".join(lines))
 
     def _start_controllers(
         self, controller_list: List[Controller], timeout: float = None
     ) -> bool:
         # Start just the given controller_list
-        infos = self._run_hook(ProcessStartHook, controller_list, timeout=timeout)
+        infos = self._run_hook(
+            ProcessStartHook, controller_list, timeout=timeout, timing="start"
+        )
         info: UnpublishedInfo
         new_unpublished = set()
         for info in UnpublishedInfo.filter_values(infos):
@@ -101,7 +142,12 @@ class Process(Loggable):
         else:
             return False
 
-    def _publish_controllers(self, timeout):
+    def _publish_controllers(self, timeout, controller_list=None):
+        # Add the given controller_list, or all controllers if not given, and
+        # the children they have that aren't already published
+        if controller_list is None:
+            controller_list = self._controllers.values()
+        already_published = set(self._published)
         tree = OrderedDict()
         is_child = set()
 
@@ -111,24 +157,28 @@ class Process(Loggable):
             for part in controller.parts.values():
                 part_mri = getattr(part, "mri", None)
                 is_child.add(part_mri)
-                if part_mri in tree:
+                if part_mri in already_published:
+                    # Its subtree was walked when it was published
+                    continue
+                elif part_mri in tree:
                     children[part_mri] = tree[part_mri]
                 elif part_mri in self._controllers:
                     children[part_mri] = add_controller(self._controllers[part_mri])
             return tree[controller.mri]
 
-        for c in self._controllers.values():
+        for c in controller_list:
             if c.mri not in is_child:
                 add_controller(c)
 
-        published = []
+        published = self._published
 
         def walk(d, not_at_this_level=()):
             to_do = []
             for k, v in d.items():
                 if k in not_at_this_level:
                     continue
-                if k not in published and k not in self._unpublished:
+                if k not in already_published and k not in self._unpublished:
+                    already_published.add(k)
                     published.append(k)
                 if v:
                     to_do.append(v)
@@ -137,17 +187,38 @@ class Process(Loggable):
 
         walk(tree, not_at_this_level=is_child)
 
-        self._run_hook(ProcessPublishHook, timeout=timeout, published=published)
+        self._run_hook(ProcessPublishHook, timeout=timeout, published=list(published))
+
+    def _timed_spawn(self, mri: str, timing: str) -> Callable[..., Spawned]:
+        # Make a spawn function that records how long the function takes
+        def spawn(function: Callable[..., Any], *args: Any, **kwargs: Any) -> Spawned:
+            def timed(*args, **kwargs):
+                start = time.time()
+                try:
+                    return function(*args, **kwargs)
+                finally:
+                    times = self.startup_times.setdefault(mri, {})
+                    times[timing] = time.time() - start
 
-    def _run_hook(self, hook, controller_list=None, timeout=None, **kwargs):
+            return self.spawn(timed, *args, **kwargs)
+
+        return spawn
+
+    def _run_hook(
+        self, hook, controller_list=None, timeout=None, timing=None, **kwargs
+    ):
         # Run the given hook waiting til all hooked functions are complete
-        # but swallowing any errors
+        # but swallowing any errors. If timing is given then record how long
+        # each controller took under that name in startup_times
         if controller_list is None:
             controller_list = self._controllers.values()
-        hooks = [
-            hook(controller, **kwargs).set_spawn(self.spawn)
-            for controller in controller_list
-        ]
+        hooks = []
+        for controller in controller_list:
+            if timing:
+                spawn = self._timed_spawn(controller.mri, timing)
+            else:
+                spawn = self.spawn
+            hooks.append(hook(controller, **kwargs).set_spawn(spawn))
         hook_queue, hook_spawned = start_hooks(hooks)
         infos = wait_hooks(
             self.log, hook_queue, hook_spawned, timeout, exception_check=False
@@ -168,7 +239,7 @@ class Process(Loggable):
         self.state = STOPPING
         # Allow every controller a chance to clean up
         self._run_hook(ProcessStopHook, timeout=timeout)
-        for s in self._spawned:
+        for s in list(self._spawned):
             if not s.ready():
                 self.log.debug(
                     "Waiting for %s *%s **%s", s._function, s._args, s._kwargs
@@ -180,9 +251,13 @@ class Process(Loggable):
                     "Timeout waiting for %s *%s **%s", s._function, s._args, s._kwargs
                 )
                 raise
-        self._spawned = []
+        self._spawned = set()
+        if self._pool:
+            self._pool.close(timeout)
         self._controllers = OrderedDict()
         self._unpublished = set()
+        self._published = []
+        self.startup_times = OrderedDict()
         self.state = STOPPED
         self.log.debug("Done process.stop()")
 
@@ -199,18 +274,13 @@ class Process(Loggable):
                 finished executing
         """
         assert self.state != STOPPED, "Can't spawn when process stopped"
-        spawned = Spawned(function, args, kwargs)
-        self._spawned.append(spawned)
-        self._spawn_count += 1
-        # Filter out things that are ready to avoid memory leaks
-        if self._spawn_count > SPAWN_CLEAR_COUNT:
-            self._clear_spawn_list()
+        spawned = Spawned(function, args, kwargs, self._pool, self._spawned.discard)
+        # Anything that has already finished has discarded itself, so only
+        # track the ones that are still running
+        if not spawned.ready():
+            self._spawned.add(spawned)
         return spawned
 
-    def _clear_spawn_list(self) -> None:
-        self._spawn_count = 0
-        self._spawned = [s for s in self._spawned if not s.ready()]
-
     def add_controllers(
         self, controllers: List[Controller], timeout: float = None
     ) -> None:
@@ -226,11 +296,14 @@ class Process(Loggable):
                 controller.mri not in self._controllers
             ), f"Controller already exists for {controller.mri}"
             self._controllers[controller.mri] = controller
+            start = time.time()
             controller.setup(self)
+            self.startup_times[controller.mri] = dict(setup=time.time() - start)
         if self.state:
             should_publish = self._start_controllers(controllers, timeout)
             if self.state == STARTED and should_publish:
-                self._publish_controllers(timeout)
+                # Only walk the new controllers, the rest are already published
+                self._publish_controllers(timeout, controllers)
 
     def add_controller(self, controller: Controller, timeout: float = None) -> None:
         """Add a controller to be hosted by this process
@@ -1,7 +1,7 @@
 import logging
 from typing import Any, Callable, List, Mapping, Sequence, Tuple, Union
 
-from annotypes import Anno, Array, Serializable
+from annotypes import Anno, Array, FrozenOrderedDict, Serializable
 
 from .response import Delta, Error, Response, Return, Update
 
@@ -23,6 +23,8 @@ with Anno("Parameters to use in a method Post"):
     AParameters = Mapping[str, Any]
 with Anno("Notify of differences only"):
     ADifferences = bool
+with Anno("Minimum time in seconds between updates, 0 means no rate limit"):
+    AMinPeriod = float
 UPath = Union[APath, Sequence[str], str]
 
 
@@ -119,15 +121,28 @@ class Post(PathRequest):
 class Subscribe(PathRequest):
     """Create a Subscribe Request object"""
 
-    __slots__ = ["delta"]
+    __slots__ = ["delta", "minPeriod"]
 
     # Allow id to shadow builtin id so id is a key in the serialized dict
-    # noinspection PyShadowingBuiltins
+    # noinspection PyShadowingBuiltins,PyPep8Naming
+    # minPeriod is camelCase to match the rest of the message fields
     def __init__(
-        self, id: AId = 0, path: UPath = None, delta: ADifferences = False
+        self,
+        id: AId = 0,
+        path: UPath = None,
+        delta: ADifferences = False,
+        minPeriod: AMinPeriod = 0.0,
     ) -> None:
         super().__init__(id, path)
         self.delta = delta
+        self.minPeriod = minPeriod
+
+    def to_dict(self, dict_cls=FrozenOrderedDict):
+        d = super().to_dict(dict_cls)
+        if not self.minPeriod:
+            # Leave it out so that servers that don't rate limit understand us
+            d = dict_cls((k, v) for k, v in d.items() if k != "minPeriod")
+        return d
 
     def update_response(self, value: Any) -> Tuple[Callback, Update]:
         """Create an Update Response object to handle the request"""
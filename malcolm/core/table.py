@@ -1,4 +1,44 @@
-from annotypes import Serializable
+from typing import Any, Iterator, List
+
+import numpy as np
+from annotypes import Array, Serializable
+
+# Column types that are stored as numpy arrays rather than lists
+NUMPY_TYPES = (bool, int, float, np.number, np.bool_)
+
+
+def _column_data(column: Any) -> Any:
+    # Unwrap an Array to get at the list or numpy array inside it
+    if column.__class__ is Array:
+        return column.seq
+    return column
+
+
+def _column_list(column: Any) -> List:
+    # tolist() is much faster than iterating over a numpy array, and gives
+    # Python rather than numpy scalars
+    data = _column_data(column)
+    if hasattr(data, "tolist"):
+        return data.tolist()
+    return list(data)
+
+
+def _columns_differ(a: Any, b: Any) -> bool:
+    if a is b:
+        return False
+    if a.__class__ is Array and b.__class__ is Array and a.typ != b.typ:
+        return True
+    a, b = _column_data(a), _column_data(b)
+    if a is b:
+        return False
+    if len(a) != len(b):
+        return True
+    if hasattr(a, "dtype") or hasattr(b, "dtype"):
+        # Compare whole columns in one go
+        return not np.array_equal(a, b)
+    if a.__class__ is not b.__class__:
+        a, b = list(a), list(b)
+    return a != b
 
 
 @Serializable.register_subclass("malcolm:core/Table:1.0")
@@ -14,7 +54,7 @@ class Table(Serializable):
             return super().__getitem__(item)
         except KeyError:
             # If we have an integer, make a row
-            if isinstance(item, int):
+            if isinstance(item, (int, np.integer)):
                 self.validate_column_lengths()
                 return [getattr(self, a)[item] for a in self.call_types]
             else:
@@ -22,19 +62,39 @@ class Table(Serializable):
 
     @classmethod
     def from_rows(cls, rows):
-        attrs = {k: [] for k in cls.call_types}
-        for row in rows:
-            for key, data in zip(cls.call_types, row):
-                attrs[key].append(data)
-        attrs = {k: cls.call_types[k](v) for k, v in attrs.items()}
+        """Make a Table from a list of rows, or from a numpy structured array
+        with a field for each column"""
+        if getattr(getattr(rows, "dtype", None), "names", None):
+            # Structured array, so slice out each column in one go
+            columns = {k: rows[k] for k in cls.call_types}
+        else:
+            columns = {k: [] for k in cls.call_types}
+            for row in rows:
+                for key, data in zip(cls.call_types, row):
+                    columns[key].append(data)
+        attrs = {}
+        for k, anno in cls.call_types.items():
+            data = columns[k]
+            if isinstance(anno.typ, type) and issubclass(anno.typ, NUMPY_TYPES):
+                # Store numeric columns as contiguous numpy arrays of the right type
+                data = np.ascontiguousarray(data, dtype=anno.typ)
+            elif hasattr(data, "tolist"):
+                data = data.tolist()
+            attrs[k] = anno(data)
         return cls(**attrs)
 
-    def rows(self):
+    def rows(self) -> Iterator[List]:
         self.validate_column_lengths()
-        data = [getattr(self, a) for a in self.call_types]
+        data = [_column_list(getattr(self, a)) for a in self.call_types]
         for row in zip(*data):
             yield list(row)
 
+    def changed_columns(self, other: "Table") -> List[str]:
+        """Return the names of the columns that differ from other, which should
+        be a Table of the same class. Columns that are the same object are not
+        compared, and numpy columns are compared in one go"""
+        return [k for k in self.call_types if _columns_differ(self[k], other[k])]
+
     def __eq__(self, other: object) -> bool:
         return not self != other
 
@@ -44,6 +104,6 @@ class Table(Serializable):
         if list(self.call_types) != list(other.call_types):
             return True
         for k in self.call_types:
-            if self[k] != other[k]:
+            if _columns_differ(self[k], other[k]):
                 return True
         return False
@@ -1,4 +1,4 @@
-from typing import TYPE_CHECKING, Any
+from typing import TYPE_CHECKING, Any, Dict, Tuple
 
 from malcolm.compat import OrderedDict
 from malcolm.core.models import Model
@@ -51,16 +51,42 @@ def _make_get_property(cls, endpoint):
     setattr(cls, endpoint, make_child_view)
 
 
+def _make_async_method(cls, endpoint):
+    def post_async(self, *args, **kwargs):
+        child: Method = getattr(self, endpoint)
+        return child.post_async(*args, **kwargs)
+
+    setattr(cls, f"{endpoint}_async", post_async)
+
+
+# View subclasses keyed by (View class, Model type, endpoints), so that a class
+# is only made the first time we see a Model of a particular shape
+_view_subclasses: Dict[Tuple, type] = {}
+
+
 def _make_view_subclass(cls, controller, context, data):
-    # Properties can only be set on classes, so make subclass that we can use
-    class ViewSubclass(cls):
-        pass
+    if isinstance(data, BlockModel):
+        # The endpoints of a Block can change, so the model caches them for us
+        key = (cls, type(data), data.endpoints_key())
+    else:
+        key = (cls, type(data), tuple(data))
+    try:
+        subclass = _view_subclasses[key]
+    except KeyError:
+        # Properties can only be set on classes, so make subclass that we can use
+        class ViewSubclass(cls):
+            pass
+
+        for endpoint in data:
+            # make properties for the endpoints we know about
+            _make_get_property(ViewSubclass, endpoint)
+            if isinstance(data[endpoint], MethodModel):
+                # Add _async versions of method
+                _make_async_method(ViewSubclass, endpoint)
 
-    for endpoint in data:
-        # make properties for the endpoints we know about
-        _make_get_property(ViewSubclass, endpoint)
+        subclass = _view_subclasses.setdefault(key, ViewSubclass)
 
-    view = ViewSubclass(controller, context, data)
+    view = subclass(controller, context, data)
     return view
 
 
@@ -141,13 +167,6 @@ class Method(View):
 class Block(View):
     """Object consisting of a number of Attributes and Methods"""
 
-    def __init__(self, controller, context, data):
-        super().__init__(controller, context, data)
-        for endpoint in self._data:
-            if isinstance(data[endpoint], MethodModel):
-                # Add _async versions of method
-                self._make_async_method(endpoint)
-
     def __getattr__(self, item: str) -> View:
         # Get the child of self._data. Needs to be done by the controller to
         # make sure lock is taken and we get consistent data
@@ -158,13 +177,6 @@ class Block(View):
     def mri(self):
         return self._data.path[0]
 
-    def _make_async_method(self, endpoint):
-        def post_async(*args, **kwargs):
-            child: Method = getattr(self, endpoint)
-            return child.post_async(*args, **kwargs)
-
-        object.__setattr__(self, f"{endpoint}_async", post_async)
-
     def put_attribute_values_async(self, params):
         futures = []
         if type(params) is dict:
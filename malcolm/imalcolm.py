@@ -151,8 +151,7 @@ def prepare_locals(args):
         proc = Process(proc_name)
         controllers, parts = make_include_creator(args.yaml)()
         assert not parts, f"{args.yaml} defines parts"
-        for controller in controllers:
-            proc.add_controller(controller)
+        proc.add_controllers(controllers)
         proc_name = f"{proc_name} - imalcolm"
     else:
         proc = Process("Process")
@@ -1,5 +1,6 @@
-from typing import Tuple
+from typing import Optional, Tuple
 
+import numpy as np
 from annotypes import Any, add_call_types
 
 from malcolm.core import PartRegistrar
@@ -37,6 +38,8 @@ class PositionLabellerPart(builtin.parts.ChildPart):
     done_when_reaches = 0
     # Timeout before saying we have stalled
     frame_timeout = 0.0
+    # The (xml, end_index) for the positions after end_index, made ahead of time
+    next_xml: Optional[Tuple[str, int]] = None
 
     def setup(self, registrar: PartRegistrar) -> None:
         super().setup(registrar)
@@ -73,6 +76,7 @@ class PositionLabellerPart(builtin.parts.ChildPart):
             self.done_when_reaches += steps_to_do
 
         # Delete any remaining old positions
+        self.next_xml = None
         child = context.block_view(self.mri)
         futures = [child.delete_async()]
         futures += child.put_attribute_values_async(
@@ -154,35 +158,43 @@ class PositionLabellerPart(builtin.parts.ChildPart):
                 and number_left < POSITIONS_PER_XML * N_LOAD_AHEAD
             ):
                 self.loading = True
-                xml, self.end_index = self._make_xml(self.end_index)
+                if self.next_xml is None:
+                    self.next_xml = self._make_xml(self.end_index)
+                xml, self.end_index = self.next_xml
                 child.xml.put_value(xml)
+                # Make the next lot now so it is ready when the plugin needs it
+                self.next_xml = None
+                if self.end_index < self.generator.size:
+                    self.next_xml = self._make_xml(self.end_index)
                 self.loading = False
 
     def _make_xml(self, start_index: int) -> Tuple[str, int]:
-        # Make xml root
-        xml = '<?xml version="1.0" ?><pos_layout><dimensions>'
-
-        # Make an index for every hdf index
         assert self.generator, "No generator"
-        for i in range(len(self.generator.dimensions)):
-            xml += '<dimension name="d%d" />' % i
+        n_dims = len(self.generator.dimensions)
 
-        # Add the actual positions
-        xml += "</dimensions><positions>"
+        # Make xml root with an index for every hdf index
+        dimensions = "".join('<dimension name="d%d" />' % i for i in range(n_dims))
+        header = (
+            '<?xml version="1.0" ?><pos_layout><dimensions>%s</dimensions>'
+            "<positions>" % dimensions
+        )
 
         end_index = start_index + POSITIONS_PER_XML
         assert self.generator.size, "Generator is empty"
         if end_index > self.generator.size:
             end_index = self.generator.size
 
-        for i in range(start_index, end_index):
-            point = self.generator.get_point(i)
-            xml += "<position"
-            for j, value in enumerate(point.indexes):
-                xml += ' d%d="%s"' % (j, value)
-            xml += " />"
+        # Get the indexes of all the positions as a (n_positions, n_dims) array
+        n_positions = end_index - start_index
+        indexes = self.generator.get_points(start_index, end_index).indexes
+        indexes = np.reshape(indexes, (n_positions, n_dims))
+
+        # Format all the positions in one go from a template for each one
+        position = "".join(' d%d="%%d"' % j for j in range(n_dims))
+        template = ("<position%s />" % position) * n_positions
+        positions = template % tuple(indexes.ravel().tolist())
 
-        xml += "</positions></pos_layout>"
+        xml = header + positions + "</positions></pos_layout>"
         xml_length = len(xml)
         assert xml_length < XML_MAX_SIZE, "XML size %d too big" % xml_length
         return xml, end_index
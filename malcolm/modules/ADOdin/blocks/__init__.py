@@ -1,9 +1,9 @@
-from malcolm.yamlutil import check_yaml_names, make_block_creator
-
-odin_driver_block = make_block_creator(__file__, "odin_driver_block.yaml")
-
-odin_runnable_block = make_block_creator(__file__, "odin_runnable_block.yaml")
-
-odin_writer_block = make_block_creator(__file__, "odin_writer_block.yaml")
-
-__all__ = check_yaml_names(globals())
+from malcolm.yamlutil import lazy_creators, make_block_creator
+
+__getattr__, __all__ = lazy_creators(
+    globals(),
+    make_block_creator,
+    "odin_driver_block.yaml",
+    "odin_runnable_block.yaml",
+    "odin_writer_block.yaml",
+)
@@ -112,6 +112,7 @@ def files_shape(frames, block_size, file_count):
 
 
 def one_vds(
+    vds,
     vds_folder,
     vds_name,
     files,
@@ -125,8 +126,9 @@ def one_vds(
     target_node,
     d_type,
 ):
+    """Add the virtual datasets for one source node to the open vds file"""
     # this vds reshapes from 1 file per data writer to a single 1D data set
-    gen = InterleaveVDSGenerator(
+    interleave = InterleaveVDSGenerator(
         vds_folder,
         files=files,
         source={"height": width, "width": height, "dtype": d_type, "shape": shape},
@@ -136,12 +138,15 @@ def one_vds(
         block_size=block_size,
         log_level=1,
     )
-    gen.generate_vds()
 
-    # this VDS shapes the data to match the dimensions of the scan
-    gen = ReshapeVDSGenerator(
+    # this VDS shapes the data to match the dimensions of the scan. We know
+    # what the interleaved dataset will look like, so pass it as the source
+    # rather than making the generator open the file to read it back
+    frames, image_height, image_width = shape
+    reshape = ReshapeVDSGenerator(
         path=vds_folder,
         files=[vds_name],
+        source={"shape": (sum(frames), image_height, image_width), "dtype": d_type},
         source_node="process/" + target_node + "_interleave",
         target_node=target_node,
         output=vds_name,
@@ -150,7 +155,10 @@ def one_vds(
         log_level=1,
     )
 
-    gen.generate_vds()
+    for gen in (interleave, reshape):
+        layout = gen.create_virtual_layout(gen.source_metadata)
+        gen.validate_node(vds)
+        vds.create_virtual_dataset(gen.target_node, layout, fillvalue=gen.fill_value)
 
 
 def create_vds(generator, raw_name, vds_path, child, uid_name, sum_name):
@@ -181,69 +189,75 @@ def create_vds(generator, raw_name, vds_path, child, uid_name, sum_name):
     ]
     shape = (hdf_shape, image_height, image_width)
 
-    # prepare a vds for the image data
-    one_vds(
-        vds_folder,
-        vds_name,
-        files,
-        image_width,
-        image_height,
-        shape,
-        generator,
-        alternates,
-        block_size,
-        "data",
-        "data",
-        data_type.lower(),
-    )
-    with h5py.File(vds_path, "r+", libver="latest") as vds:
+    # Make all the datasets, links and nexus nodes in a single pass over the
+    # vds file, as each open can be slow on a network filesystem
+    with h5py.File(vds_path, "a", libver="latest") as vds:
+        # prepare a vds for the image data
+        one_vds(
+            vds,
+            vds_folder,
+            vds_name,
+            files,
+            image_width,
+            image_height,
+            shape,
+            generator,
+            alternates,
+            block_size,
+            "data",
+            "data",
+            data_type.lower(),
+        )
         count = 1
         for f in files:
             vds["raw" + str(count)] = h5py.ExternalLink(f, "/data")
             vds["uid" + str(count)] = h5py.ExternalLink(f, "/uid")
             count += 1
 
-    shape = (hdf_shape, 1, 1)
-
-    # prepare a vds for the unique IDs
-    one_vds(
-        vds_folder,
-        vds_name,
-        files,
-        1,
-        1,
-        shape,
-        generator,
-        alternates,
-        block_size,
-        uid_name,
-        "uid",
-        "uint64",
-    )
-    # prepare a vds for the sums
-    one_vds(
-        vds_folder,
-        vds_name,
-        files,
-        1,
-        1,
-        shape,
-        generator,
-        alternates,
-        block_size,
-        sum_name,
-        "sum",
-        "uint64",
-    )
+        shape = (hdf_shape, 1, 1)
+
+        # prepare a vds for the unique IDs
+        one_vds(
+            vds,
+            vds_folder,
+            vds_name,
+            files,
+            1,
+            1,
+            shape,
+            generator,
+            alternates,
+            block_size,
+            uid_name,
+            "uid",
+            "uint64",
+        )
+        # prepare a vds for the sums
+        one_vds(
+            vds,
+            vds_folder,
+            vds_name,
+            files,
+            1,
+            1,
+            shape,
+            generator,
+            alternates,
+            block_size,
+            sum_name,
+            "sum",
+            "uint64",
+        )
+        add_nexus_nodes(generator, vds)
 
 
 set_bases = ["/entry/detector/", "/entry/detector_sum/", "/entry/detector_uid/"]
 set_data = ["/data", "/sum", "/uid"]
 
 
-def add_nexus_nodes(generator, vds_file_path):
-    """Add in the additional information to make this into a standard nexus
-    format file:-
+def add_nexus_nodes(generator, vds):
+    """Add in the additional information to make the open vds file into a
+    standard nexus format file:-
     (a) create the standard structure under the 'entry' group with a
     subgroup for each dataset. 'set_bases' lists the data sets we make here.
     (b) save a dataset for each axis in each of the dimensions of the scan
@@ -262,41 +276,40 @@ def add_nexus_nodes(generator, vds_file_path):
 
     pad_dims += ["."] * 2  # assume a 2 dimensional detector
 
-    with h5py.File(vds_file_path, "r+", libver="latest") as vds:
-        for data, node in zip(set_data, set_bases):
-            # create a group for this entry
-            vds.require_group(node)
-            # points to the axis demand data sets
-            vds[node].attrs["axes"] = pad_dims
-            vds[node].attrs["NX_class"] = ["NXdata"]
-
-            # points to the detector dataset for this entry
-            vds[node].attrs["signal"] = data.split("/")[-1]
-            # a hard link from this entry 'signal' to the actual data
-            vds[node + data] = vds[data]
-
-            axis_sets = {}
-            # iterate the axes in each dimension of the generator to create the
-            # axis information nodes
-            for i, d in enumerate(generator.dimensions):
-                for axis in d.axes:
-                    # add signal data dimension for axis
-                    axis_indices = f"{axis}_set_indices"
-                    vds[node].attrs[axis_indices] = i
-
-                    # demand positions for axis
-                    axis_set = f"{axis}_set"
-                    if axis_sets.get(axis_set):
-                        # link to the first entry's demand list
-                        vds[node + axis_set] = axis_sets[axis_set]
-                    else:
-                        # create the demand list for the first entry only
-                        axis_demands = d.get_positions(axis)
-                        vds.create_dataset(node + axis_set, data=axis_demands)
-                        vds[node + axis_set].attrs["units"] = generator.units[axis]
-                    axis_sets[axis_set] = vds[node + axis_set]
-
-        vds["entry"].attrs["NX_class"] = ["NXentry"]
+    for data, node in zip(set_data, set_bases):
+        # create a group for this entry
+        vds.require_group(node)
+        # points to the axis demand data sets
+        vds[node].attrs["axes"] = pad_dims
+        vds[node].attrs["NX_class"] = ["NXdata"]
+
+        # points to the detector dataset for this entry
+        vds[node].attrs["signal"] = data.split("/")[-1]
+        # a hard link from this entry 'signal' to the actual data
+        vds[node + data] = vds[data]
+
+        axis_sets = {}
+        # iterate the axes in each dimension of the generator to create the
+        # axis information nodes
+        for i, d in enumerate(generator.dimensions):
+            for axis in d.axes:
+                # add signal data dimension for axis
+                axis_indices = f"{axis}_set_indices"
+                vds[node].attrs[axis_indices] = i
+
+                # demand positions for axis
+                axis_set = f"{axis}_set"
+                if axis_sets.get(axis_set):
+                    # link to the first entry's demand list
+                    vds[node + axis_set] = axis_sets[axis_set]
+                else:
+                    # create the demand list for the first entry only
+                    axis_demands = d.get_positions(axis)
+                    vds.create_dataset(node + axis_set, data=axis_demands)
+                    vds[node + axis_set].attrs["units"] = generator.units[axis]
+                axis_sets[axis_set] = vds[node + axis_set]
+
+    vds["entry"].attrs["NX_class"] = ["NXentry"]
 
 
 # We will set these attributes on the child block, so don't save them
@@ -407,7 +420,6 @@ class OdinWriterPart(builtin.parts.ChildPart):
             self.uid_name,
             self.sum_name,
         )
-        add_nexus_nodes(generator, vds_full_filename)
 
         # Return the dataset information
         dataset_infos = list(
@@ -1 +1,8 @@
-from . import includes, parts
+from typing import TYPE_CHECKING
+
+from malcolm.core import lazy_import
+
+if TYPE_CHECKING:
+    from . import includes, parts
+
+__getattr__ = lazy_import(__name__, ["includes", "parts"])
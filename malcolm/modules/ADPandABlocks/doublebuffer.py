@@ -1,7 +1,9 @@
 from __future__ import annotations
 
 import logging
-from typing import Any, Dict, Iterator, List, Optional, Tuple, Type, TypeVar
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple, Type, TypeVar
+
+import numpy as np
 
 from malcolm.core import Block, Context, Future
 
@@ -28,17 +30,49 @@ MIN_TABLE_DURATION: float = 15.0
 
 T = TypeVar("T", bound="SequencerRows")  # Allows us to return cls from classmethod
 
+# The numpy dtype of each SequencerRow field, matching SequencerTable
+COLUMN_DTYPES: Dict[str, Any] = dict(
+    repeats=np.uint16,
+    trigger=object,
+    position=np.int32,
+    time1=np.uint32,
+    outa1=bool,
+    outb1=bool,
+    outc1=bool,
+    outd1=bool,
+    oute1=bool,
+    outf1=bool,
+    time2=np.uint32,
+    outa2=bool,
+    outb2=bool,
+    outc2=bool,
+    outd2=bool,
+    oute2=bool,
+    outf2=bool,
+)
+
+# {column_name: column_array} for some Sequencer rows
+Columns = Dict[str, np.ndarray]
+
 
 class SequencerRows:
-    """A class that represents a series of rows for the Sequencer (SEQ) block."""
+    """A class that represents a series of rows for the Sequencer (SEQ) block.
+
+    The rows are held as blocks of numpy columns that are only joined together when
+    needed, so extending by lots of small `SequencerRows` objects is cheap."""
 
     def __init__(self, rows: List[SequencerRow] = None) -> None:
-        self._rows: List[SequencerRow] = []
-        self._duration: float = 0
+        self._blocks: List[Columns] = []
+        self._length: int = 0
+        self._duration: int = 0
 
         if rows:
-            self._rows = rows
-            self._duration = self._calculate_duration(self._rows)
+            self._add_block(
+                {
+                    name: np.array(column, dtype=COLUMN_DTYPES[name])
+                    for name, column in zip(SequencerRow._fields, zip(*rows))
+                }
+            )
 
     @classmethod
     def from_tuple_list(cls: Type[T], rows: List[Tuple]) -> T:
@@ -55,17 +89,53 @@ class SequencerRows:
         trim=0,
     ) -> None:
         """Add a sequencer row with the given settings."""
-        complete_rows = count // MAX_REPEATS
-        remaining = count % MAX_REPEATS
-
-        row = self._seq_row(
-            MAX_REPEATS, trigger, position, half_duration, live, dead, trim
+        self.add_seq_entries(
+            [count], trigger, position, half_duration, live, dead, trim
         )
-        self._rows.extend([row] * complete_rows)
-        self._rows.append(
-            self._seq_row(remaining, trigger, position, half_duration, live, dead, trim)
+
+    def add_seq_entries(
+        self,
+        counts: Sequence[int],
+        trigger=Trigger.IMMEDIATE,
+        position=0,
+        half_duration=MIN_PULSE,
+        live=0,
+        dead=0,
+        trim=0,
+    ) -> None:
+        """Add a sequencer row for each of `counts`. The other settings are either
+        single values, or arrays of the same length as `counts`."""
+        entry_counts = np.asarray(counts, dtype=np.int64)
+        # Each entry is MAX_REPEATS rows repeated as many times as needed, then one
+        # row with what is left
+        complete_rows = entry_counts // MAX_REPEATS
+        rows_per_entry = complete_rows + 1
+        entries = np.repeat(np.arange(len(entry_counts)), rows_per_entry)
+        first_rows = np.cumsum(rows_per_entry) - rows_per_entry
+        row_in_entry = np.arange(len(entries)) - first_rows[entries]
+        repeats = np.where(
+            row_in_entry < complete_rows[entries],
+            MAX_REPEATS,
+            (entry_counts % MAX_REPEATS)[entries],
         )
-        self._duration += count * (2 * half_duration - trim)
+
+        def column(value, dtype=np.int64) -> np.ndarray:
+            return np.broadcast_to(np.asarray(value, dtype), entry_counts.shape)[
+                entries
+            ]
+
+        half_durations = column(half_duration)
+        columns = {
+            name: np.zeros(len(entries), dtype) for name, dtype in COLUMN_DTYPES.items()
+        }
+        columns["repeats"] = repeats.astype(np.uint16)
+        columns["trigger"] = column(trigger, object)
+        columns["position"] = column(position).astype(np.int32)
+        columns["time1"] = half_durations.astype(np.uint32)
+        columns["outa1"] = column(live, bool)
+        columns["outb1"] = column(dead, bool)
+        columns["time2"] = (half_durations - column(trim)).astype(np.uint32)
+        self._add_block(columns)
 
     def split(self, count: int) -> SequencerRows:
         """Truncate this object after `count` rows, and return the remainder.
@@ -73,59 +143,75 @@ class SequencerRows:
         We need the final row of this object to have a count of 1 in order to subtract
         the table switch delay."""
 
-        assert len(self._rows) > 0, "Zero length seq rows should never be split"
+        assert len(self) > 0, "Zero length seq rows should never be split"
 
-        if len(self._rows) >= count:
-            final_row = self._rows[count - 1]
-            if final_row.repeats == 0:  # Final row in continuous loop
-                assert len(self._rows) == count  # Continuous loop always at end
-                return SequencerRows()
-
-            if final_row.repeats == 1:
-                remainder = SequencerRows(self._rows[count:])
-                self._rows = self._rows[:count]
+        # The block may be shared with other objects by extend(), so don't
+        # assign to it
+        columns = dict(self._columns)
+        remainder = SequencerRows()
+        if len(self) >= count:
+            final_repeats = columns["repeats"][count - 1]
+            if final_repeats == 0:  # Final row in continuous loop
+                assert len(self) == count  # Continuous loop always at end
+                return remainder
 
-            elif final_row.repeats > 1:
-                remainder = SequencerRows(
-                    [final_row._replace(repeats=final_row.repeats - 1)]
-                )
-                remainder.extend(SequencerRows(self._rows[count:]))
-                self._rows = self._rows[: count - 1]
-                self._rows.append(final_row._replace(repeats=1))
+            remainder_columns = {k: v[count:] for k, v in columns.items()}
+            columns = {k: v[:count] for k, v in columns.items()}
+            if final_repeats > 1:
+                # Leave one repeat of the final row here, the rest go in remainder
+                final_row = {k: v[-1:] for k, v in columns.items()}
+                final_row["repeats"] = final_row["repeats"] - 1
+                remainder._add_block(final_row)
+                columns["repeats"] = columns["repeats"].copy()
+                columns["repeats"][-1] = 1
+            remainder._add_block(remainder_columns)
         else:
-            remainder = SequencerRows()
-
-            if self._rows[-1].repeats == 0:
+            final_repeats = columns["repeats"][-1]
+            if final_repeats == 0:
                 return remainder
 
-            if self._rows[-1].repeats > 1:
-                final_row = self._rows[-1]
-                self._rows[-1] = final_row._replace(repeats=final_row.repeats - 1)
-                self._rows += [final_row._replace(repeats=1)]
+            if final_repeats > 1:
+                # Split the final row into one with a single repeat and the rest
+                columns = {k: np.append(v, v[-1:]) for k, v in columns.items()}
+                columns["repeats"][-2] -= 1
+                columns["repeats"][-1] = 1
 
-        final_self_row = self._rows[-1]
-        self._rows[-1] = final_self_row._replace(
-            time2=final_self_row.time2 - SEQ_TABLE_SWITCH_DELAY
+        final_time2 = columns["time2"][-1]
+        assert final_time2 >= SEQ_TABLE_SWITCH_DELAY, (
+            f"Final row time2 of {final_time2} ticks is too short to subtract the "
+            f"table switch delay of {SEQ_TABLE_SWITCH_DELAY} ticks"
         )
-        self._duration -= SEQ_TABLE_SWITCH_DELAY
-        self._duration -= remainder.duration
+        columns["time2"] = columns["time2"].copy()
+        columns["time2"][-1] -= SEQ_TABLE_SWITCH_DELAY
+        self._blocks = []
+        self._length = 0
+        self._duration = 0
+        self._add_block(columns)
         return remainder
 
     def extend(self, other: SequencerRows) -> None:
         """Extend this object by the given `SequencerRows` object."""
-        self._rows += other._rows
+        # Columns are never modified in place, so the blocks can be shared
+        self._blocks += other._blocks
+        self._length += other._length
         self._duration += other._duration
 
     def get_table(self) -> SequencerTable:
         """Return a `SequencerTable` from this object's rows."""
-        return SequencerTable.from_rows(self._rows)
+        columns = dict(self._columns)
+        columns["trigger"] = columns["trigger"].tolist()
+        return SequencerTable(**columns)
 
     def as_tuples(self) -> Tuple[Tuple, ...]:
         """Return the sequencer rows as a tuple of tuples.
 
         This is used for comparisons during testing.
         """
-        return tuple(self._rows)
+        columns = self._columns
+        return tuple(
+            SequencerRow(*row)
+            for row in zip(*[columns[k].tolist() for k in SequencerRow._fields])
+        )
 
     @property
     def duration(self) -> float:
@@ -134,53 +220,36 @@ class SequencerRows:
 
     def __len__(self) -> int:
         """Return the number of Sequencer rows."""
-        return len(self._rows)
+        return self._length
 
-    @staticmethod
-    def _seq_row(
-        repeats: int = 1,
-        trigger: str = Trigger.IMMEDIATE,
-        position: int = 0,
-        half_duration: int = MIN_PULSE,
-        live: int = 0,
-        dead: int = 0,
-        trim: int = 0,
-    ) -> SequencerRow:
-        """Create a pulse with phase1 having the given live/dead values.
-
-        If trim=0, there is a 50% duty cycle. Trim (in ticks) reduces total duration by
-        subtracting ticks from the phase2 time.
-        """
-        return SequencerRow(
-            repeats,
-            trigger,
-            position,
-            # Phase1
-            half_duration,
-            live,
-            dead,
-            0,
-            0,
-            0,
-            0,
-            # Phase2
-            half_duration - trim,
-            0,
-            0,
-            0,
-            0,
-            0,
-            0,
-        )
+    def _add_block(self, columns: Columns) -> None:
+        """Add a block of columns to the end of this object."""
+        length = len(columns["repeats"])
+        if length:
+            self._blocks.append(columns)
+            self._length += length
+            self._duration += self._calculate_duration(columns)
 
-    @staticmethod
-    def _calculate_duration(rows: List[SequencerRow]) -> float:
-        """Return the duration of the given Sequencer rows (in list format)."""
-        duration = 0.0
-        for row in rows:
-            duration += row.repeats * (row.time1 + row.time2)
+    @property
+    def _columns(self) -> Columns:
+        """Return all the rows as a single block of columns."""
+        if not self._blocks:
+            return {name: np.empty(0, dtype) for name, dtype in COLUMN_DTYPES.items()}
+        elif len(self._blocks) > 1:
+            self._blocks = [
+                {
+                    name: np.concatenate([block[name] for block in self._blocks])
+                    for name in COLUMN_DTYPES
+                }
+            ]
+        return self._blocks[0]
 
-        return duration
+    @staticmethod
+    def _calculate_duration(columns: Columns) -> int:
+        """Return the duration of the given Sequencer rows (in columns format)."""
+        repeats = columns["repeats"].astype(np.int64)
+        times = columns["time1"].astype(np.int64) + columns["time2"]
+        return int(np.dot(repeats, times))
 
 
 class DoubleBuffer:
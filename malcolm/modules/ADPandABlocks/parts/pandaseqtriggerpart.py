@@ -135,67 +135,92 @@ class SeqTriggers:
         if len(durations) == 0:
             return SequencerRows()
 
-        pairwise_equal = np.empty(len(durations), dtype=bool)
+        duration_array = np.asarray(durations)
+        pairwise_equal = np.empty(len(duration_array), dtype=bool)
         pairwise_equal[0] = True  # Initial duration starts first row
 
-        np.not_equal(durations[:-1], durations[1:], out=pairwise_equal[1:])
-        start_indices = np.nonzero(pairwise_equal)
-        seq_durations = durations[start_indices]
-        seq_lengths = np.diff(np.append(start_indices, len(durations)))
+        np.not_equal(duration_array[:-1], duration_array[1:], out=pairwise_equal[1:])
+        start_indices = np.nonzero(pairwise_equal)[0]
+        seq_durations = duration_array[start_indices]
+        seq_lengths = np.diff(np.append(start_indices, len(duration_array)))
+        half_frames = np.round(seq_durations / TICK / 2).astype(np.int64)
 
         rows = SequencerRows()
-        for duration, count in zip(seq_durations, seq_lengths):
-            half_frame = int(round(duration / TICK / 2))
-            rows.add_seq_entry(count, half_duration=half_frame, live=1)
+        rows.add_seq_entries(seq_lengths, half_duration=half_frames, live=1)
 
         return rows
 
     def _create_triggered_rows(
-        self, points: Points, start_index: int, end_index: int, add_blind: bool
+        self, points: Points, row_starts: np.ndarray, start_of_scan: bool
     ) -> SequencerRows:
-        """Generate sequencer rows corresponding to a triggered points row."""
-        initial_point: Point = points[start_index]
-        half_frame: int = int(round(initial_point.duration / TICK / 2))
+        """Generate sequencer rows for a batch of points, where each of `row_starts`
+        is the index of the first point of a triggered scan row.
 
-        rows = SequencerRows()
+        If not `start_of_scan`, the first point is from the previous batch so is not
+        included. Otherwise it must be in `row_starts`, and does not get a blind row.
+        """
+        durations = points.duration
+        half_frames = np.round(durations / TICK / 2).astype(np.int64)
+        first = 0 if start_of_scan else 1
+        is_row_start = np.zeros(len(points), dtype=bool)
+        is_row_start[row_starts] = True
+
+        # Every scan row start gets an entry, as does every run of points within a
+        # scan row that have the same duration
+        new_entry = is_row_start[first:].copy()
+        new_entry[0] = True
+        new_entry[1:] |= is_row_start[first:-1]
+        new_entry[1:] |= durations[first + 1 :] != durations[first:-1]
+        entry_starts = np.flatnonzero(new_entry) + first
+        counts = np.diff(np.append(entry_starts, len(points)))
+        entry_is_row_start = is_row_start[entry_starts]
+
+        # Immediate rows for points within a scan row
+        triggers = np.full(len(entry_starts), Trigger.IMMEDIATE, dtype=object)
+        positions = np.zeros(len(entry_starts), dtype=np.int64)
+        half_durations = half_frames[entry_starts]
+        lives = np.ones(len(entry_starts), dtype=bool)
+        deads = np.zeros(len(entry_starts), dtype=bool)
+
+        # Triggered rows for the starts of scan rows, each with a row before it to
+        # be blind during the turnaround, apart from the start of the scan
+        row_entries = np.flatnonzero(entry_is_row_start)
+        blind_entries = row_entries[1:] if start_of_scan else row_entries
+        blind_half_durations = np.full(len(blind_entries), MIN_PULSE, dtype=np.int64)
         if self.trigger_enums:
-            # Position compare
-            # First row, or rows not joined
-            # Work out which axis moves most during this point
-            axis_name, compare_cts, increasing = self._what_moves_most(
-                initial_point, self.axis_mapping
-            )
-
-            if add_blind:
-                # How long to be blind for during the turnaround
-                blind = self._how_long_moving_wrong_way(
-                    axis_name, initial_point, increasing
+            # Position compare on whichever axis moves most during the first point
+            for i, entry in enumerate(row_entries):
+                point = points[entry_starts[entry]]
+                axis_name, compare_cts, increasing = self._what_moves_most(
+                    point, self.axis_mapping
                 )
-                half_blind = int(round(blind / TICK / 2))
-                rows.add_seq_entry(half_duration=half_blind, dead=1)
-
-            # Create a compare point for the next row
-            rows.add_seq_entry(
-                trigger=self.trigger_enums[(axis_name, increasing)],
-                position=compare_cts,
-                half_duration=half_frame,
-                live=1,
-            )
+                triggers[entry] = self.trigger_enums[(axis_name, increasing)]
+                positions[entry] = compare_cts
+                if start_of_scan and i == 0:
+                    continue
+                # How long to be blind for during the turnaround
+                self.last_point = points[entry_starts[entry] - 1]
+                blind = self._how_long_moving_wrong_way(axis_name, point, increasing)
+                blind_i = i - 1 if start_of_scan else i
+                blind_half_durations[blind_i] = int(round(blind / TICK / 2))
+            blind_trigger = Trigger.IMMEDIATE
         else:
-            # Row trigger coming in on BITA
-
-            if add_blind:
-                # Produce dead pulse as soon as row has finished
-                rows.add_seq_entry(
-                    half_duration=MIN_PULSE, dead=1, trigger=Trigger.BITA_0
-                )
-
-            rows.add_seq_entry(trigger=Trigger.BITA_1, half_duration=half_frame, live=1)
+            # Row trigger coming in on BITA, and dead pulse as soon as row has
+            # finished
+            triggers[row_entries] = Trigger.BITA_1
+            blind_trigger = Trigger.BITA_0
 
-        rows.extend(
-            self._create_immediate_rows(points.duration[start_index + 1 : end_index])
+        rows = SequencerRows()
+        rows.add_seq_entries(
+            np.insert(counts, blind_entries, 1),
+            trigger=np.insert(triggers, blind_entries, blind_trigger),
+            position=np.insert(positions, blind_entries, 0),
+            half_duration=np.insert(
+                half_durations, blind_entries, blind_half_durations
+            ),
+            live=np.insert(lives, blind_entries, False),
+            dead=np.insert(deads, blind_entries, True),
         )
-
         return rows
 
     @staticmethod
@@ -230,25 +255,18 @@ class SeqTriggers:
                 yield self._create_immediate_rows(durations)
                 self.last_point = points[-1]
             else:
-                start_indices, end_indices = self._get_row_indices(points)
-
-                # Handle the first scan row from the current batch of points
-                end = start_indices[0] if start_indices.size else len(points)
+                start_indices, _ = self._get_row_indices(points)
                 if self.last_point is None:
-                    # This is the beginning of the scan
-                    yield self._create_triggered_rows(points, 0, end, False)
-                    self.last_point = points[end - 1]
+                    # This is the beginning of the scan, so the first point starts
+                    # a scan row
+                    row_starts = np.append(0, start_indices).astype(int)
+                    yield self._create_triggered_rows(points, row_starts, True)
                 else:
                     # This is the beginning of subsequent batches.
-                    # Sequence table rows are only added here if the previous batch
-                    # of points finished in the middle of a continuous scan row.
                     # The first point of the current batch is from the previous batch.
-                    yield self._create_immediate_rows(points.duration[1:end])
-
-                # Remaining scan rows from the current batch of points.
-                for start_i, end_i in zip(start_indices, end_indices):
-                    yield self._create_triggered_rows(points, start_i, end_i, True)
-                    self.last_point = points[end_i - 1]
+                    row_starts = start_indices.astype(int)
+                    yield self._create_triggered_rows(points, row_starts, False)
+                self.last_point = points[-1]
 
         rows = SequencerRows()
         # add one last dead frame signal
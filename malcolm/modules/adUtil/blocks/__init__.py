@@ -1,5 +1,7 @@
-from malcolm.yamlutil import check_yaml_names, make_block_creator
+from malcolm.yamlutil import lazy_creators, make_block_creator
 
-reframe_plugin_block = make_block_creator(__file__, "reframe_plugin_block.yaml")
-
-__all__ = check_yaml_names(globals())
+__getattr__, __all__ = lazy_creators(
+    globals(),
+    make_block_creator,
+    "reframe_plugin_block.yaml",
+)
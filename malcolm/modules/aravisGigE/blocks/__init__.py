@@ -1,9 +1,9 @@
-from malcolm.yamlutil import check_yaml_names, make_block_creator
+from malcolm.yamlutil import lazy_creators, make_block_creator
 
-aravisGigE_driver_block = make_block_creator(__file__, "aravisGigE_driver_block.yaml")
-aravisGigE_runnable_block = make_block_creator(
-    __file__, "aravisGigE_runnable_block.yaml"
+__getattr__, __all__ = lazy_creators(
+    globals(),
+    make_block_creator,
+    "aravisGigE_driver_block.yaml",
+    "aravisGigE_runnable_block.yaml",
+    "aravisGigE_manager_block.yaml",
 )
-aravisGigE_manager_block = make_block_creator(__file__, "aravisGigE_manager_block.yaml")
-
-__all__ = check_yaml_names(globals())
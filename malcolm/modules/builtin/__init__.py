@@ -1 +1,11 @@
-from . import controllers, defines, hooks, infos, parameters, parts, util
+from typing import TYPE_CHECKING
+
+from malcolm.core import lazy_import
+
+if TYPE_CHECKING:
+    from . import controllers, defines, hooks, infos, parameters, parts, util
+
+__getattr__ = lazy_import(
+    __name__,
+    ["controllers", "defines", "hooks", "infos", "parameters", "parts", "util"],
+)
@@ -1,2 +1,20 @@
-from . import parts, util
-from .util import AConfig, AGroup, AMetaDescription, APartName, ASinkPort, AWidget
+from typing import TYPE_CHECKING
+
+from malcolm.core import lazy_import
+
+if TYPE_CHECKING:
+    from . import parts, util
+    from .util import AConfig, AGroup, AMetaDescription, APartName, ASinkPort, AWidget
+
+__getattr__ = lazy_import(
+    __name__,
+    ["parts", "util"],
+    {
+        "AConfig": "util",
+        "AGroup": "util",
+        "AMetaDescription": "util",
+        "APartName": "util",
+        "ASinkPort": "util",
+        "AWidget": "util",
+    },
+)
@@ -79,7 +79,7 @@ class CAActionPart(Part):
             pvs.append(self.status_pv)
         if self.message_pv:
             pvs.append(self.message_pv)
-        ca_values = util.catools.caget(pvs, throw=self.throw)
+        ca_values = util.bulk_caget(pvs, throw=self.throw)
         # check connection is ok
         try:
             for v in ca_values:
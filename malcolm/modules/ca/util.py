@@ -1,5 +1,6 @@
+import math
 import time
-from typing import Any, Callable, Optional, Sequence, Type, Union
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple, Type, Union
 
 from annotypes import Anno, Array
 
@@ -12,6 +13,9 @@ from malcolm.core import (
     Hook,
     Loggable,
     PartRegistrar,
+    Queue,
+    Spawned,
+    Timer,
     TimeStamp,
     VMeta,
     sleep,
@@ -42,6 +46,142 @@ class CatoolsDeferred:
 
 catools = CatoolsDeferred()
 
+
+class BulkCA:
+    """Gathers up the calls to a catools function that CA parts make before the
+    next cothread yield, and makes them as one call for each set of keyword
+    arguments. As the hooks of a Block are spawned together, and so are the
+    Puts of a put_attribute_values, the cagets and caputs of a whole Block are
+    done in one wave rather than part by part.
+
+    If resend_on_error then a call that fails is made again for each request
+    separately, so only the requests that asked for the bad PVs fail. This is
+    safe for cagets, but not for caputs, so otherwise the call is made with
+    throw=False and each request fails if any of its PVs returned an error"""
+
+    def __init__(self, func_name: str, resend_on_error: bool = True) -> None:
+        self.func_name = func_name
+        self.resend_on_error = resend_on_error
+        # {kwargs: [(pvs, args, queue for their results)]}
+        self._requests: Dict[Tuple, List[Tuple[Any, Tuple, Queue]]] = {}
+
+    def __call__(self, pvs: Union[str, Sequence[str]], *args: Any, **kwargs: Any):
+        """Like catools.<func_name>(pvs, *args, **kwargs), but done in the same
+        call as any others made before the next cothread yield"""
+        key = tuple(sorted(kwargs.items()))
+        queue = Queue()
+        requests = self._requests.setdefault(key, [])
+        if not requests:
+            # Make the call when the other cothreads have had a chance to add
+            # their requests
+            Spawned(self._call_requests, (key,), {})
+        requests.append((pvs, args, queue))
+        ret = queue.get()
+        if isinstance(ret, Exception):
+            raise ret
+        return ret
+
+    def _call_requests(self, key: Tuple) -> None:
+        requests = self._requests[key]
+        count = 0
+        while count != len(requests):
+            # Requests are still being added, so give them a chance to finish
+            count = len(requests)
+            sleep(0)
+        self._requests.pop(key)
+        try:
+            self._make_calls(dict(key), requests)
+        except Exception as e:
+            # Whatever went wrong, don't leave the callers waiting forever
+            for _, _, queue in requests:
+                queue.put(e)
+
+    def _make_calls(
+        self, kwargs: Dict[str, Any], requests: List[Tuple[Any, Tuple, Queue]]
+    ) -> None:
+        func = getattr(catools, self.func_name)
+        if len(requests) == 1:
+            # Pass the arguments through as they are
+            pvs, args, queue = requests[0]
+            try:
+                queue.put(func(pvs, *args, **kwargs))
+            except Exception as e:
+                queue.put(e)
+            return
+        all_pvs: List[str] = []
+        all_args: List[List] = [[] for _ in requests[0][1]]
+        for pvs, args, _ in requests:
+            if isinstance(pvs, str):
+                all_pvs.append(pvs)
+                for i, arg in enumerate(args):
+                    all_args[i].append(arg)
+            else:
+                all_pvs += pvs
+                for i, arg in enumerate(args):
+                    all_args[i] += list(arg)
+        if not self.resend_on_error:
+            self._call_without_throw(func, all_pvs, all_args, kwargs, requests)
+            return
+        try:
+            results = func(all_pvs, *all_args, **kwargs)
+        except Exception:
+            # One of the PVs failed, so make the calls separately so only the
+            # requests that asked for it fail
+            spawned = [
+                Spawned(func, (pvs,) + args, kwargs) for pvs, args, _ in requests
+            ]
+            for s, (_, _, queue) in zip(spawned, requests):
+                try:
+                    queue.put(s.get())
+                except Exception as e:
+                    queue.put(e)
+        else:
+            start = 0
+            for pvs, _, queue in requests:
+                if isinstance(pvs, str):
+                    queue.put(results[start])
+                    start += 1
+                else:
+                    queue.put(results[start : start + len(pvs)])
+                    start += len(pvs)
+
+    @staticmethod
+    def _call_without_throw(
+        func: Callable,
+        all_pvs: List[str],
+        all_args: List[List],
+        kwargs: Dict[str, Any],
+        requests: List[Tuple[Any, Tuple, Queue]],
+    ) -> None:
+        throw = kwargs.pop("throw", True)
+        try:
+            # Get a result for each PV rather than an exception for the first
+            # one that failed
+            results = func(all_pvs, *all_args, throw=False, **kwargs)
+        except Exception as e:
+            for _, _, queue in requests:
+                queue.put(e)
+            return
+        start = 0
+        for pvs, _, queue in requests:
+            if isinstance(pvs, str):
+                ret = results[start]
+                pv_results = [ret]
+                start += 1
+            else:
+                ret = pv_results = results[start : start + len(pvs)]
+                start += len(pvs)
+            failed = [r for r in pv_results if not getattr(r, "ok", True)]
+            if throw and failed:
+                # Only fail the request whose PV failed, raising its ca_nothing
+                queue.put(failed[0])
+            else:
+                queue.put(ret)
+
+
+bulk_caget = BulkCA("caget")
+bulk_caput = BulkCA("caput", resend_on_error=False)
+
 with Anno("Full pv of demand and default for rbv"):
     APv = str
 with Anno("Override for rbv"):
@@ -62,6 +202,61 @@ with Anno("throw error if PV not found"):
     AThrow = bool
 
 
+class UpdateWheel:
+    """Timer wheel that delivers the pending monitor updates of CABase objects
+    at the end of each tick of `granularity` seconds. Every object due in the
+    same tick shares one Timer, so monitor callbacks never have to sleep"""
+
+    def __init__(self, granularity: float) -> None:
+        assert granularity > 0, f"Granularity {granularity} should be positive"
+        self.granularity = granularity
+        # {tick: [CABase objects that are due in that tick]}
+        self.slots: Dict[int, List[CABase]] = {}
+        # The tick the timer is currently set to fire at
+        self.next_tick: Optional[int] = None
+        # Made when first needed so that it is made in cothread's thread
+        self.timer: Optional[Timer] = None
+
+    def schedule(self, ca: "CABase", when: float) -> None:
+        """Call ca._deliver_pending() at the end of the tick containing when"""
+        tick = math.ceil(when / self.granularity)
+        self.slots.setdefault(tick, []).append(ca)
+        if self.next_tick is None or tick < self.next_tick:
+            self._set_timer(tick)
+
+    def _set_timer(self, tick: int) -> None:
+        self.next_tick = tick
+        timeout = max(tick * self.granularity - time.time(), 0)
+        if self.timer is None:
+            self.timer = Timer(timeout, self._fire, reuse=True)
+        else:
+            self.timer.reset(timeout)
+
+    def _fire(self) -> None:
+        now_tick = math.ceil(time.time() / self.granularity)
+        due = [tick for tick in self.slots if tick <= now_tick]
+        for tick in sorted(due):
+            for ca in self.slots.pop(tick):
+                ca._deliver_pending()
+        if self.slots:
+            self._set_timer(min(self.slots))
+        else:
+            self.next_tick = None
+
+
+# {granularity: UpdateWheel}
+_update_wheels: Dict[float, UpdateWheel] = {}
+
+
+def get_update_wheel(granularity: float) -> UpdateWheel:
+    """Get the UpdateWheel shared by all CABase objects with this min_delta"""
+    try:
+        return _update_wheels[granularity]
+    except KeyError:
+        wheel = _update_wheels[granularity] = UpdateWheel(granularity)
+        return wheel
+
+
 class CABase(Loggable):
     def __init__(
         self,
@@ -91,9 +286,15 @@ class CABase(Loggable):
         self.attr = meta.create_attribute_model()
         # Camonitor subscription
         self.monitor = None
-        self._update_after = 0
+        self._update_after = 0.0
+        # Monitor updates before this are held back to keep to min_delta
+        self._hold_until = 0.0
         self._local_value: Optional[CATable] = None
         self._user_callback = callback
+        # The latest monitor update that arrived during a hold,
+        # and whether it is scheduled on an UpdateWheel to be delivered
+        self._pending: Any = None
+        self._pending_scheduled = False
 
     def disconnect(self):
         if self.monitor is not None:
@@ -103,6 +304,8 @@ class CABase(Loggable):
             else:
                 self.monitor.close()
             self.monitor = None
+        # Throw away any update that hasn't been delivered yet
+        self._pending = None
 
     def _update_value(self, value):
         # Attribute value might not be raw PV, PV which triggered update is
@@ -153,28 +356,50 @@ class CABase(Loggable):
         )
 
     def _monitor_callback(self, value, value_index=None):
-        now = time.time()
-        delta = now - self._update_after
         if value_index is not None and hasattr(self, "name_list"):
             value_key = self.name_list[value_index]
             self._local_value[value_key] = value
             self._local_value.raw_stamp = getattr(value, "raw_stamp", (None, None))
             self._local_value.ok = self._local_value.ok or value.ok
             self._local_value.severity = max(self._local_value.severity, value.severity)
-            self._update_value(self._local_value)
-        else:
+            value = self._local_value
+        if self.min_delta <= 0:
+            # No rate limiting, so always deliver now
             self._update_value(value)
-        # See how long to sleep for to make sure we don't get more than one
-        # update at < min_delta interval
+            return
+        now = time.time()
+        if self._pending is None and now >= self._hold_until:
+            self._deliver(value, now)
+        else:
+            # Keep the latest value, and deliver it when the hold is over rather
+            # than sleeping here and holding up every other monitor in the
+            # process
+            self._pending = value
+            if not self._pending_scheduled:
+                self._pending_scheduled = True
+                get_update_wheel(self.min_delta).schedule(self, self._hold_until)
+
+    def _deliver(self, value, now):
+        # Keep to the rate we got when the callback slept: an update within
+        # min_delta of the last is delivered, but holds the next until then
+        delta = now - self._update_after
         if delta > self.min_delta:
             # If we were more than min_delta late then reset next update time
             self._update_after = now + self.min_delta
         elif delta < 0:
-            # If delta is less than zero sleep for a bit
-            sleep(-delta)
+            # If delta is less than zero hold the next update for a bit
+            self._hold_until = self._update_after
         else:
             # If we were within the delta window just increment next update
             self._update_after += self.min_delta
+        self._update_value(value)
+
+    def _deliver_pending(self):
+        # Called by an UpdateWheel when the hold on updates is over
+        self._pending_scheduled = False
+        value, self._pending = self._pending, None
+        if value is not None:
+            self._deliver(value, time.time())
 
 
 class CAAttribute(CABase):
@@ -224,6 +449,19 @@ class CAAttribute(CABase):
         self.rbv = rbv
         # Camonitor subscription
         self.monitor = None
+        # The last monitor update, and the time.time() it arrived, so caput can
+        # use it as the readback if the IOC posted it while processing the put
+        self._latest: Any = None
+        self._latest_received = 0.0
+
+    def disconnect(self):
+        super().disconnect()
+        self._latest = None
+
+    def _monitor_callback(self, value, value_index=None):
+        self._latest = value
+        self._latest_received = time.time()
+        super()._monitor_callback(value, value_index)
 
     def reconnect(self):
         # release old monitor
@@ -233,7 +471,7 @@ class CAAttribute(CABase):
         if self.pv and self.pv != self.rbv:
             pvs.append(self.pv)
         ca_values = assert_connected(
-            catools.caget(
+            bulk_caget(
                 pvs,
                 format=catools.FORMAT_CTRL,
                 datatype=self.datatype,
@@ -260,16 +498,30 @@ class CAAttribute(CABase):
         else:
             timeout = self.timeout
         self.log.info("caput %s %s", self.pv, value)
-        catools.caput(
-            self.pv, value, wait=True, timeout=timeout, datatype=self.datatype
-        )
-        # now do a caget
-        value = catools.caget(
-            self.rbv,
-            format=catools.FORMAT_TIME,
-            datatype=self.datatype,
-            throw=self.throw,
-        )
+        put_time = time.time()
+        bulk_caput(self.pv, value, wait=True, timeout=timeout, datatype=self.datatype)
+        latest = self._latest
+        if (
+            self.pv == self.rbv
+            and latest is not None
+            and latest.ok
+            and self._latest_received >= put_time
+            and getattr(latest, "timestamp", 0) >= put_time
+        ):
+            # The IOC processed the put then posted this, and it arrives on the
+            # same circuit as the put callback, so it is the readback
+            value = latest
+        else:
+            # The put may not have posted a monitor (the value didn't change, or
+            # stayed within the deadband) so do a caget
+            value = bulk_caget(
+                self.rbv,
+                format=catools.FORMAT_TIME,
+                datatype=self.datatype,
+                throw=self.throw,
+            )
+        # Any monitor update waiting for min_delta is older than this
+        self._pending = None
         self._update_value(value)
 
 
@@ -327,7 +579,6 @@ class WaveformTableAttribute(CABase):
         self._local_value = CATable()
         for name in name_list:
             self._local_value[name] = []
-        self._update_after = 0
         self.limits_from_pv = limits_from_pv
 
     def reconnect(self):
@@ -335,7 +586,7 @@ class WaveformTableAttribute(CABase):
         self.disconnect()
         # make the connection in cothread's thread, use caget for initial
         ca_values = assert_connected(
-            catools.caget(
+            bulk_caget(
                 self.pv_list,
                 format=catools.FORMAT_CTRL,
                 datatype=self.datatype,
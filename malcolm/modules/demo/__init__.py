@@ -1 +1,8 @@
-from . import parts, util
+from typing import TYPE_CHECKING
+
+from malcolm.core import lazy_import
+
+if TYPE_CHECKING:
+    from . import parts, util
+
+__getattr__ = lazy_import(__name__, ["parts", "util"])
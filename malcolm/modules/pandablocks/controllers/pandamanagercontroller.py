@@ -1,6 +1,8 @@
 import json
+import os
 import re
 import time
+from collections import OrderedDict
 from typing import Any, Dict, Sequence, Set, Tuple
 
 from annotypes import Anno
@@ -10,7 +12,7 @@ from malcolm.core import Display, NumberMeta, Queue, TimeoutError, TimeStamp, Wi
 from malcolm.modules import builtin
 from malcolm.modules.builtin.util import LayoutTable
 
-from ..pandablocksclient import PandABlocksClient
+from ..pandablocksclient import BlockData, FieldData, PandABlocksClient, TableFieldData
 from ..parts.pandaactionpart import PandAActionPart
 from ..parts.pandabussespart import PandABussesPart
 from ..util import DOC_URL_BASE, ADocUrlBase
@@ -31,8 +33,57 @@ AInitialDesign = builtin.controllers.AInitialDesign
 ADescription = builtin.controllers.ADescription
 
 
-# Minimum period in seconds between updates of the last poll period attribute
+# Minimum period in seconds between updates of the poll reporting attributes
 POLL_PERIOD_REPORT = 1
+# While changes are flowing the poll period is divided by this after each poll,
+# down to poll_period * MIN_POLL_SCALE
+POLL_SPEEDUP = 2.0
+MIN_POLL_SCALE = 0.25
+# While idle the poll period is multiplied by this after each poll, up to
+# poll_period * MAX_POLL_SCALE
+POLL_BACKOFF = 1.25
+MAX_POLL_SCALE = 4.0
+
+
+# File in the config_dir/mri directory that caches the introspection of the blocks
+INTROSPECTION_CACHE = "introspection.cache"
+
+
+def introspection_to_json(idn, blocks_data, tables_fields):
+    """Serialize the results of get_blocks_data and get_tables_fields, keyed by
+    the *IDN? identification string of the PandA"""
+    return dict(
+        idn=idn,
+        blocks=[
+            [
+                block_name,
+                block_data.number,
+                block_data.description,
+                [[k] + list(v) for k, v in block_data.fields.items()],
+            ]
+            for block_name, block_data in blocks_data.items()
+        ],
+        tables=[
+            [block_name, field_name, [[k] + list(v) for k, v in fields.items()]]
+            for (block_name, field_name), fields in tables_fields.items()
+        ],
+    )
+
+
+def introspection_from_json(d):
+    """The inverse of introspection_to_json, returning blocks_data and
+    tables_fields"""
+    blocks_data = OrderedDict()
+    for block_name, number, description, fields in d["blocks"]:
+        blocks_data[block_name] = BlockData(
+            number, description, OrderedDict((f[0], FieldData(*f[1:])) for f in fields)
+        )
+    tables_fields = OrderedDict()
+    for block_name, field_name, fields in d["tables"]:
+        tables_fields[(block_name, field_name)] = OrderedDict(
+            (f[0], TableFieldData(*f[1:])) for f in fields
+        )
+    return blocks_data, tables_fields
 
 
 class PandAManagerController(builtin.controllers.ManagerController):
@@ -72,6 +123,10 @@ class PandAManagerController(builtin.controllers.ManagerController):
         self._client = PandABlocksClient(hostname, port, Queue)
         # The json layout stored in PandA
         self._json_layout: Dict[str, Dict[str, float]] = {}
+        # The block and field names of every change key we know about, with
+        # *METADATA.LABEL_block already mapped to (block, "LABEL")
+        # {block_name.field_name: (block_name, field_name)}
+        self._change_keys: Dict[str, Tuple[str, str]] = {}
         # Filled in on reset
         self._stop_queue = None
         self._poll_spawned = None
@@ -83,6 +138,21 @@ class PandAManagerController(builtin.controllers.ManagerController):
             display=Display(units="s", precision=3),
         ).create_attribute_model(poll_period)
         self.field_registry.add_attribute_model("lastPollPeriod", self.last_poll_period)
+        self.poll_cpu_time = NumberMeta(
+            "float64",
+            "The CPU time taken to handle the changes of the last poll",
+            tags=[Widget.TEXTUPDATE.tag()],
+            display=Display(units="s", precision=4),
+        ).create_attribute_model()
+        self.field_registry.add_attribute_model("pollCpuTime", self.poll_cpu_time)
+        self.change_latency = NumberMeta(
+            "float64",
+            "The time from asking for changes to notifying the Blocks, for the "
+            "last poll that had changes",
+            tags=[Widget.TEXTUPDATE.tag()],
+            display=Display(units="s", precision=4),
+        ).create_attribute_model()
+        self.field_registry.add_attribute_model("changeLatency", self.change_latency)
         # Bus tables
         self.busses: PandABussesPart = self._make_busses()
         self.add_part(self.busses)
@@ -113,23 +183,33 @@ class PandAManagerController(builtin.controllers.ManagerController):
         self.start_poll_loop()
         super().do_reset()
 
+    def adapt_poll_period(self, poll_period: float, changed: bool) -> float:
+        """Return the period to wait before the next poll, polling faster while
+        changes are flowing and backing off while idle"""
+        if changed:
+            return max(poll_period / POLL_SPEEDUP, self._poll_period * MIN_POLL_SCALE)
+        else:
+            return min(poll_period * POLL_BACKOFF, self._poll_period * MAX_POLL_SCALE)
+
     def _poll_loop(self):
-        """At self.poll_period poll for changes"""
+        """Poll for changes, at a period adapted from self.poll_period"""
         last_poll_update = time.time()
-        next_poll = time.time() + self._poll_period
+        poll_period = self._poll_period
+        next_poll = time.time() + poll_period
+        cpu_time = latency = None
         try:
             while True:
                 # Need to make sure we don't consume all the CPU, allow us to be
                 # active for 50% of the poll period, so we must sleep at least
                 # 50% of the poll period
-                min_sleep = self._poll_period * 0.5
+                min_sleep = poll_period * 0.5
                 sleep_for = next_poll - time.time()
                 if sleep_for < min_sleep:
                     # Going too fast, slow down a bit
-                    last_poll_period = self._poll_period + min_sleep - sleep_for
+                    last_poll_period = poll_period + min_sleep - sleep_for
                     sleep_for = min_sleep
                 else:
-                    last_poll_period = self._poll_period
+                    last_poll_period = poll_period
                 try:
                     # If told to stop, we will get something here and return
                     return self._stop_queue.get(timeout=sleep_for)
@@ -137,18 +217,31 @@ class PandAManagerController(builtin.controllers.ManagerController):
                     # No stop, no problem
                     pass
                 # Poll for changes
-                self.handle_changes(self._client.get_changes())
-                if (
-                    last_poll_period != self.last_poll_period.value
-                    and next_poll - last_poll_update > POLL_PERIOD_REPORT
-                ):
-                    self.last_poll_period.set_value(last_poll_period)
+                requested = time.time()
+                changes = list(self._client.get_changes())
+                cpu_start = time.thread_time()
+                self.handle_changes(changes)
+                cpu_time = time.thread_time() - cpu_start
+                if changes:
+                    latency = time.time() - requested
+                if next_poll - last_poll_update > POLL_PERIOD_REPORT:
+                    self._report_poll(last_poll_period, cpu_time, latency)
                     last_poll_update = next_poll
-                next_poll += last_poll_period
+                poll_period = self.adapt_poll_period(poll_period, bool(changes))
+                next_poll += poll_period
         except Exception as e:
             self.go_to_error_state(e)
             raise
 
+    def _report_poll(self, last_poll_period, cpu_time, latency):
+        for attr, value in (
+            (self.last_poll_period, last_poll_period),
+            (self.poll_cpu_time, cpu_time),
+            (self.change_latency, latency),
+        ):
+            if value is not None and value != attr.value:
+                attr.set_value(value)
+
     def stop_poll_loop(self):
         if self._poll_spawned:
             self._stop_queue.put(None)
@@ -162,19 +255,19 @@ class PandAManagerController(builtin.controllers.ManagerController):
         controllers = []
         child_parts = []
         pos_names = []
-        blocks_data = self._client.get_blocks_data()
+        blocks_data = self._get_introspection()
         for block_rootname, block_data in blocks_data.items():
-            block_names = []
-            if block_data.number == 1:
-                block_names.append(block_rootname)
-            else:
-                for i in range(block_data.number):
-                    block_names.append("%s%d" % (block_rootname, i + 1))
-            for block_name in block_names:
+            for block_name in self._block_names(block_rootname, block_data):
                 # Look through the BlockData for things we are interested in
                 for field_name, field_data in block_data.fields.items():
+                    key = f"{block_name}.{field_name}"
+                    self._change_keys[key] = (block_name, field_name)
                     if field_data.field_type == "pos_out":
-                        pos_names.append(f"{block_name}.{field_name}")
+                        pos_names.append(key)
+                self._change_keys[f"*METADATA.LABEL_{block_name}"] = (
+                    block_name,
+                    "LABEL",
+                )
 
                 # Make the child controller and add it to the process
                 controller, child_part = self._make_child_block(block_name, block_data)
@@ -213,6 +306,48 @@ class PandAManagerController(builtin.controllers.ManagerController):
             not self._bit_out_changes
         ), f"There are still bit_out changes {self._bit_out_changes}"
 
+    def _get_introspection(self):
+        """Get the blocks data and table fields of the PandA, from the cache if
+        it was made from the same firmware, otherwise from the PandA"""
+        idn = self._client.get_idn()
+        filename = os.path.join(self._make_config_dir(), INTROSPECTION_CACHE)
+        try:
+            with open(filename) as f:
+                cache = json.load(f)
+            if cache["idn"] == idn:
+                blocks_data, tables_fields = introspection_from_json(cache)
+                self._client.table_fields.update(tables_fields)
+                return blocks_data
+        except FileNotFoundError:
+            pass
+        except Exception:
+            self.log.exception(f"Ignoring bad introspection cache {filename}")
+        # Introspect every table of every block in one go
+        blocks_data = self._client.get_blocks_data()
+        block_fields = []
+        for block_rootname, block_data in blocks_data.items():
+            table_fields = [
+                field_name
+                for field_name, field_data in block_data.fields.items()
+                if field_data.field_type == "table"
+            ]
+            for block_name in self._block_names(block_rootname, block_data):
+                block_fields += [(block_name, f) for f in table_fields]
+        tables_fields = self._client.get_tables_fields(block_fields)
+        try:
+            with open(filename, "w") as f:
+                json.dump(introspection_to_json(idn, blocks_data, tables_fields), f)
+        except OSError:
+            self.log.exception(f"Can't write introspection cache {filename}")
+        return blocks_data
+
+    @staticmethod
+    def _block_names(block_rootname, block_data):
+        if block_data.number == 1:
+            return [block_rootname]
+        else:
+            return ["%s%d" % (block_rootname, i + 1) for i in range(block_data.number)]
+
     def _make_busses(self) -> PandABussesPart:
         return PandABussesPart("busses", self._client)
 
@@ -268,11 +403,9 @@ class PandAManagerController(builtin.controllers.ManagerController):
             bus_changes[k] = v
 
         # Add to the relevant Block changes dict
-        block_name, field_name = k.split(".", 1)
+        block_name, field_name = self._split_change_key(k)
         if block_name == "*METADATA":
-            if field_name.startswith("LABEL_"):
-                field_name, block_name = field_name.split("_", 1)
-            elif field_name == "LAYOUT" and v:
+            if field_name == "LAYOUT" and v:
                 # Set the layout table first so that related fields are set after
                 # possible deletion
                 self._json_layout = json.loads("".join(v))
@@ -285,7 +418,21 @@ class PandAManagerController(builtin.controllers.ManagerController):
                 return
         block_changes.setdefault(block_name, {})[field_name] = v
 
+    def _split_change_key(self, k: str) -> Tuple[str, str]:
+        try:
+            return self._change_keys[k]
+        except KeyError:
+            # First time we have seen this key, so split it and remember
+            block_name, field_name = k.split(".", 1)
+            if block_name == "*METADATA" and field_name.startswith("LABEL_"):
+                field_name, block_name = field_name.split("_", 1)
+            self._change_keys[k] = (block_name, field_name)
+            return block_name, field_name
+
     def handle_changes(self, changes: Sequence[Tuple[str, str]]) -> None:
+        if not changes and not self._bit_out_changes:
+            # Nothing to do
+            return
         ts = TimeStamp()
         # {block_name: {field_name: field_value}}
         block_changes: Dict[str, Any] = {}
@@ -298,7 +445,7 @@ class PandAManagerController(builtin.controllers.ManagerController):
         for k, v in bit_out_changes.items():
             self._bit_outs[k] = v
             bus_changes[k] = v
-            block_name, field_name = k.split(".")
+            block_name, field_name = self._split_change_key(k)
             block_changes.setdefault(block_name, {})[field_name] = v
 
         # Work out which change is needed for which block
@@ -1,5 +1,9 @@
+import base64
 import logging
-from collections import OrderedDict, namedtuple
+from collections import OrderedDict, deque, namedtuple
+from threading import Lock
+
+import numpy as np
 
 # Create a module level logger
 log = logging.getLogger(__name__)
@@ -12,12 +16,52 @@ TableFieldData = namedtuple(
 )
 
 
+class PandAResponse:
+    """The response to a message sent to the PandA, filled in by the recv loop
+    when it arrives"""
+
+    # Sentinel that says the response hasn't arrived yet
+    NOT_ARRIVED = object()
+
+    __slots__ = ["value", "waiter"]
+
+    def __init__(self):
+        self.value = self.NOT_ARRIVED
+        # Queue made only if someone has to wait for the value
+        self.waiter = None
+
+
 def strip_ok(resp):
     assert resp.startswith("OK ="), f"Expected 'OK =val', got {resp!r}"
     value = resp[4:]
     return value
 
 
+# How many bytes to ask the socket for at a time
+RECV_SIZE = 65536
+
+# How many bytes of table data to base64 encode on each line, a multiple of 3 so
+# that only the last line is padded
+BASE64_LINE_BYTES = 3 * 256
+
+
+def encode_table_base64(int_values):
+    """Encode table data as the lines that follow a PandA base64 table write
+
+    Args:
+        int_values (list): The uint32 values of the table
+
+    Returns:
+        str: Newline terminated lines of base64 encoded little endian uint32s
+    """
+    data = np.asarray(int_values, dtype="<u4").tobytes()
+    lines = [
+        base64.b64encode(data[i : i + BASE64_LINE_BYTES]).decode("ascii")
+        for i in range(0, len(data), BASE64_LINE_BYTES)
+    ]
+    return "".join(f"{line}\n" for line in lines)
+
+
 class PandABlocksClient:
     # Sentinel that tells the send_loop and recv_loop to stop
     STOP = object()
@@ -39,13 +83,23 @@ class PandABlocksClient:
         self._is_multiline = None
         # True when we have been started
         self.started = False
+        # Protects the send buffer and the responses waiting to arrive, as send
+        # and recv may be called from a different thread to the loops
+        self._lock = Lock()
         # Filled in on start
         self._socket = None
         self._send_spawned = None
-        self._send_queue = None
+        # Messages waiting for the send loop to send them in one write
+        self._send_buffer = []
+        # Holds STOP or None to wake the send loop when _send_buffer fills
+        self._send_wakeup = None
+        # PandAResponses in the order their messages were sent
+        self._responses = None
         self._recv_spawned = None
-        self._response_queues = None
         self._thread_pool = None
+        # Table fields we have already introspected
+        # {(block_name, field_name): OrderedDict(column_name: TableFieldData)}
+        self.table_fields = {}
 
     def start(self, spawn=None, socket_cls=None):
         if spawn is None:
@@ -56,10 +110,9 @@ class PandABlocksClient:
         if socket_cls is None:
             from socket import socket as socket_cls
         assert not self.started, "Send and recv threads already started"
-        # Holds (message, response_queue) to send next
-        self._send_queue = self.queue_cls()
-        # Holds response_queue to send next
-        self._response_queues = self.queue_cls()
+        self._send_buffer = []
+        self._send_wakeup = self.queue_cls()
+        self._responses = deque()
         self._socket = socket_cls()
         try:
             self._socket.connect((self.hostname, self.port))
@@ -75,7 +128,7 @@ class PandABlocksClient:
 
     def stop(self):
         assert self.started, "Send and recv threads not started"
-        self._send_queue.put((self.STOP, None))
+        self._send_wakeup.put(self.STOP)
         self._send_spawned.wait()
         import socket
 
@@ -93,16 +146,30 @@ class PandABlocksClient:
             self._thread_pool = None
 
     def send(self, message):
-        response_queue = self.queue_cls()
-        self._send_queue.put((message, response_queue))
-        return response_queue
-
-    def recv(self, response_queue, timeout=10.0):
-        response = response_queue.get(timeout=timeout)
-        if isinstance(response, Exception):
-            raise response
+        """Queue a message to be sent, returning a PandAResponse to pass to
+        recv(). Messages queued while the send loop is busy are sent together"""
+        response = PandAResponse()
+        with self._lock:
+            # Responses come back in the order messages are sent, so add them
+            # both while holding the lock
+            self._responses.append(response)
+            self._send_buffer.append(message)
+            wake = len(self._send_buffer) == 1
+        if wake:
+            self._send_wakeup.put(None)
+        return response
+
+    def recv(self, response, timeout=10.0):
+        if response.value is PandAResponse.NOT_ARRIVED:
+            with self._lock:
+                if response.value is PandAResponse.NOT_ARRIVED:
+                    response.waiter = self.queue_cls()
+            if response.waiter is not None:
+                response.waiter.get(timeout=timeout)
+        if isinstance(response.value, Exception):
+            raise response.value
         else:
-            return response
+            return response.value
 
     def send_recv(self, message, timeout=10.0):
         """Send a message to a PandABox and wait for the response
@@ -114,39 +181,53 @@ class PandABlocksClient:
         Returns:
             str: The response
         """
-        response_queue = self.send(message)
-        response = self.recv(response_queue, timeout)
-        return response
+        response = self.send(message)
+        return self.recv(response, timeout)
 
     def _send_loop(self):
-        """Service self._send_queue, sending requests to server"""
+        """Service self._send_buffer, sending all the messages that have been
+        queued since the last send in one write"""
         while True:
-            message, response_queue = self._send_queue.get()
-            if message is self.STOP:
+            if self._send_wakeup.get() is self.STOP:
                 break
+            with self._lock:
+                messages = self._send_buffer
+                self._send_buffer = []
+            if not messages:
+                continue
+            data = "".join(messages).encode("utf-8")
             try:
-                self._response_queues.put(response_queue)
-                self._socket.sendall(message.encode("utf-8"))
+                self._socket.sendall(data)
             except Exception:  # pylint:disable=broad-except
-                log.exception("Exception sending message %s", message)
+                log.exception("Exception sending messages %s", messages)
 
     def _get_lines(self):
-        buf = ""
+        buf = bytearray()
         while True:
-            lines = buf.split("\n")
-            for line in lines[:-1]:
-                yield line
-            buf = lines[-1]
             # Get something new from the socket
-            rx = self._socket.recv(4096).decode("utf-8")
+            rx = self._socket.recv(RECV_SIZE)
             if not rx:
                 break
             buf += rx
+            # Only decode and split up to the last complete line, leaving the
+            # rest in buf for the next recv
+            end = buf.rfind(b"\n")
+            if end >= 0:
+                yield from buf[:end].decode("utf-8").split("\n")
+                del buf[: end + 1]
 
     def _respond(self, resp):
         """Respond to the person waiting"""
-        response_queue = self._response_queues.get(timeout=0.1)
-        response_queue.put(resp)
+        with self._lock:
+            if self._responses:
+                response = self._responses.popleft()
+                response.value = resp
+                waiter = response.waiter
+            else:
+                log.warning("Dropping response %r as no message is waiting", resp)
+                waiter = None
+        if waiter is not None:
+            waiter.put(None)
         self._completed_response_lines = []
         self._is_multiline = None
 
@@ -194,13 +275,18 @@ class PandABlocksClient:
                 ["TTLIN", "TTLOUT"]
 
         Returns:
-            dict: {parameter: response_queue}
+            dict: {parameter: PandAResponse}
         """
         response_queues = OrderedDict()
         for parameter in parameter_list:
             response_queues[parameter] = self.send(request % parameter)
         return response_queues
 
+    def get_idn(self):
+        """Return the identification string, which includes the software and
+        FPGA versions"""
+        return strip_ok(self.send_recv("*IDN?\n"))
+
     def get_blocks_data(self):
         blocks = OrderedDict()
 
@@ -212,14 +298,12 @@ class PandABlocksClient:
         desc_queues = self.parameterized_send("*DESC.%s?\n", block_names)
         field_queues = self.parameterized_send("%s.*?\n", block_names)
 
-        # Create BlockData for each block
+        # Queue up the field descriptions and enums of every block before
+        # waiting for any of them
+        # {block_name: (unsorted_fields, field_desc_queues, enum_queues)}
+        field_requests = OrderedDict()
         # TODO: we sort here while server gives these in hash table order
         for block_name in sorted(block_names):
-            number = block_numbers[block_name]
-            description = strip_ok(self.recv(desc_queues[block_name]))
-            fields = OrderedDict()
-            blocks[block_name] = BlockData(number, description, fields)
-
             # Parse the field list
             unsorted_fields = {}
             for line in self.recv(field_queues[block_name]):
@@ -255,9 +339,22 @@ class PandABlocksClient:
             enum_queues = self.parameterized_send(
                 "*ENUMS.%s.%%s?\n" % block_name, enum_fields
             )
+            field_requests[block_name] = (
+                unsorted_fields,
+                field_desc_queues,
+                enum_queues,
+            )
+
+        # Create BlockData for each block
+        for block_name, requests in field_requests.items():
+            unsorted_fields, field_desc_queues, enum_queues = requests
+            number = block_numbers[block_name]
+            description = strip_ok(self.recv(desc_queues[block_name]))
+            fields = OrderedDict()
+            blocks[block_name] = BlockData(number, description, fields)
 
             # Get desc and enum data for each field
-            for field_name in field_names:
+            for field_name in field_desc_queues:
                 _, field_type, field_subtype = unsorted_fields[field_name]
                 if field_name in enum_queues:
                     labels = self.recv(enum_queues[field_name])
@@ -289,7 +386,8 @@ class PandABlocksClient:
         return bits
 
     def get_changes(self, include_errors=False):
-        table_queues = {}
+        changes = []
+        table_fields = []
         for line in self.send_recv("*CHANGES?\n"):
             if "=" in line:
                 field, val = line.split("=", 1)
@@ -297,7 +395,7 @@ class PandABlocksClient:
                 # table
                 field = line[:-1]
                 val = None
-                table_queues[field] = self.send(f"{field}?\n")
+                table_fields.append(field)
             elif line.endswith("(error)"):
                 if include_errors:
                     field = line.split(" ", 1)[0]
@@ -307,38 +405,79 @@ class PandABlocksClient:
             else:
                 log.warning("Can't parse line %r of changes", line)
                 continue
-            yield field, val
+            changes.append((field, val))
+        # Request all the changed tables in one go
+        table_queues = self.parameterized_send("%s?\n", table_fields)
+        yield from changes
         for field, q in table_queues.items():
             yield field, self.recv(q)
 
     def get_table_fields(self, block, field):
-        fields = OrderedDict()
-        enum_queues = {}
-        for line in self.send_recv(f"{block}.{field}.FIELDS?\n"):
-            split = line.split()
-            name = split[1].strip()
-            signed = False
-            if len(split) > 2:
-                # Field is an enum, get its values
-                if split[2] == "enum":
-                    enum_queues[name] = self.send(f"*ENUMS.{block}.{field}[].{name}?\n")
-                elif split[2] == "int":
-                    signed = True
-            fields[name] = (split[0], signed)
-
-        # Request description for each field
-        desc_queues = self.parameterized_send(
-            "*DESC.%s.%s[].%%s?\n" % (block, field), list(fields)
-        )
-        for name, (bits_str, signed) in fields.items():
-            bits_hi, bits_lo = [int(x) for x in bits_str.split(":")]
-            description = strip_ok(self.recv(desc_queues[name]))
-            if name in enum_queues:
-                labels = self.recv(enum_queues[name])
-            else:
-                labels = None
-            fields[name] = TableFieldData(bits_hi, bits_lo, description, labels, signed)
-        return fields
+        """Return the columns of a table, introspecting it if it isn't already
+        in self.table_fields"""
+        try:
+            fields = self.table_fields[(block, field)]
+        except KeyError:
+            fields = self.get_tables_fields([(block, field)])[(block, field)]
+        # Return a copy so the caller can modify it
+        return OrderedDict(fields)
+
+    def get_tables_fields(self, block_fields):
+        """Introspect the columns of a number of tables, sending all the
+        requests before waiting for any of them, and store them in
+        self.table_fields
+
+        Args:
+            block_fields (list): [(block_name, field_name)] of the tables
+
+        Returns:
+            dict: {(block_name, field_name): OrderedDict(column: TableFieldData)}
+        """
+        fields_queues = OrderedDict()
+        for block, field in block_fields:
+            fields_queues[(block, field)] = self.send(f"{block}.{field}.FIELDS?\n")
+
+        # Queue up the enums and descriptions of every table
+        # {(block, field): (fields, enum_queues, desc_queues)}
+        column_requests = OrderedDict()
+        for (block, field), q in fields_queues.items():
+            fields = OrderedDict()
+            enum_queues = {}
+            for line in self.recv(q):
+                split = line.split()
+                name = split[1].strip()
+                signed = False
+                if len(split) > 2:
+                    # Field is an enum, get its values
+                    if split[2] == "enum":
+                        enum_queues[name] = self.send(
+                            f"*ENUMS.{block}.{field}[].{name}?\n"
+                        )
+                    elif split[2] == "int":
+                        signed = True
+                fields[name] = (split[0], signed)
+
+            # Request description for each field
+            desc_queues = self.parameterized_send(
+                "*DESC.%s.%s[].%%s?\n" % (block, field), list(fields)
+            )
+            column_requests[(block, field)] = (fields, enum_queues, desc_queues)
+
+        tables_fields = OrderedDict()
+        for block_field, (fields, enum_queues, desc_queues) in column_requests.items():
+            for name, (bits_str, signed) in fields.items():
+                bits_hi, bits_lo = [int(x) for x in bits_str.split(":")]
+                description = strip_ok(self.recv(desc_queues[name]))
+                if name in enum_queues:
+                    labels = self.recv(enum_queues[name])
+                else:
+                    labels = None
+                fields[name] = TableFieldData(
+                    bits_hi, bits_lo, description, labels, signed
+                )
+            self.table_fields[block_field] = fields
+            tables_fields[block_field] = fields
+        return tables_fields
 
     def get_field(self, block, field):
         try:
@@ -370,3 +509,15 @@ class PandABlocksClient:
         lines += ["\n"]
         resp = self.send_recv("".join(lines))
         assert resp == "OK", f"Expected OK, got {resp!r}"
+
+    def set_table_base64(self, block, field, encoded):
+        """Write a table with the base64 syntax, which is quicker for the PandA
+        to parse and us to make than one decimal line per value
+
+        Args:
+            block (str): The block name, like SEQ1
+            field (str): The table field name, like TABLE
+            encoded (str): The table data from encode_table_base64()
+        """
+        resp = self.send_recv(f"{block}.{field}<B\n{encoded}\n")
+        assert resp == "OK", f"Expected OK, got {resp!r}"
@@ -12,7 +12,7 @@ from malcolm.core import (
     snake_to_camel,
 )
 
-from ..pandablocksclient import TableFieldData
+from ..pandablocksclient import TableFieldData, encode_table_base64
 from .pandafieldpart import ABlockName, AClient, AFieldName, AMeta, PandAFieldPart
 
 
@@ -90,6 +90,9 @@ class PandATablePart(PandAFieldPart):
         # TODO: this should be in the block data
         max_bits_hi = max(f.bits_hi for f in self.field_data.values())
         self.ints_per_row = int((max_bits_hi + 31) / 32)
+        # The last table we set, and its base64 encoded data
+        self._last_table = None
+        self._last_encoded = ""
         # Superclass will make the attribute for us
         super().__init__(client, meta, block_name, field_name)
 
@@ -98,8 +101,14 @@ class PandATablePart(PandAFieldPart):
         self.attr.set_value_alarm_ts(value, Alarm.ok, ts)
 
     def set_field(self, value):
-        int_values = self.list_from_table(value)
-        self.client.set_table(self.block_name, self.field_name, int_values)
+        if self._last_table is None or value != self._last_table:
+            # Only encode tables we haven't just sent
+            int_values = self.list_from_table(value)
+            self._last_encoded = encode_table_base64(int_values)
+            self._last_table = value
+        self.client.set_table_base64(
+            self.block_name, self.field_name, self._last_encoded
+        )
 
     def list_from_table(self, table):
         # Create a bit array we can contribute to
@@ -110,7 +119,8 @@ class PandATablePart(PandAFieldPart):
             column_value = table[column_name]
             if field_data.labels:
                 # Choice, lookup indexes of the label values
-                indexes = [field_data.labels.index(v) for v in column_value]
+                lookup = {label: i for i, label in enumerate(field_data.labels)}
+                indexes = [lookup[v] for v in column_value]
                 column_value = np.array(indexes, dtype=np.uint32)
             else:
                 # Array, unwrap to get the numpy array
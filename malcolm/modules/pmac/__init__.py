@@ -1,2 +1,10 @@
-from . import infos, parts, util
+from typing import TYPE_CHECKING
+
 from velocity_profile import velocityprofile as vp
+
+from malcolm.core import lazy_import
+
+if TYPE_CHECKING:
+    from . import infos, parts, util
+
+__getattr__ = lazy_import(__name__, ["infos", "parts", "util"])
@@ -1,11 +1,11 @@
-from malcolm.yamlutil import check_yaml_names, make_include_creator
+from malcolm.yamlutil import lazy_creators, make_include_creator
 
-compoundmotor_collection = make_include_creator(
-    __file__, "compoundmotor_collection.yaml"
+__getattr__, __all__ = lazy_creators(
+    globals(),
+    make_include_creator,
+    "compoundmotor_collection.yaml",
+    "cs_collection.yaml",
+    "motor_records.yaml",
+    "rawmotor_collection.yaml",
+    "trajectory_collection.yaml",
 )
-cs_collection = make_include_creator(__file__, "cs_collection.yaml")
-motor_records = make_include_creator(__file__, "motor_records.yaml")
-rawmotor_collection = make_include_creator(__file__, "rawmotor_collection.yaml")
-trajectory_collection = make_include_creator(__file__, "trajectory_collection.yaml")
-
-__all__ = check_yaml_names(globals())
@@ -37,7 +37,7 @@ class CompoundMotorSinkPortsPart(Part):
         self.disconnect()
         # make sure we can connect to the pvs
         ca_values = ca.util.assert_connected(
-            ca.util.catools.caget([self.rbv], format=ca.util.catools.FORMAT_CTRL)
+            ca.util.bulk_caget([self.rbv], format=ca.util.catools.FORMAT_CTRL)
         )
         # Set initial value
         self._update_value(ca_values[0])
@@ -1,5 +1,8 @@
+import copy
 import re
 from enum import Enum
+from threading import Thread
+from threading import get_ident as get_thread_ident
 from typing import Dict, List, Optional, Union
 
 import cothread
@@ -7,7 +10,7 @@ import numpy as np
 from annotypes import add_call_types
 from scanpointgenerator import CompoundGenerator, Point
 
-from malcolm.core import Block, Future, PartRegistrar, Put, Request
+from malcolm.core import Block, Future, PartRegistrar, Put, Queue, Request
 from malcolm.modules import builtin, scanning
 from malcolm.modules.scanning.infos import MotionTrigger
 
@@ -63,6 +66,14 @@ PROFILE_POINTS = 2000
 # How many points to extract from a scanpointgenerator each time
 BATCH_POINTS = 20000
 
+
+def yield_if_cothread() -> None:
+    """Yield so that we don't continuously block other cothreads, unless we are
+    in a lookahead thread where cothread can't be called"""
+    if get_thread_ident() == cothread.scheduler_thread_id:
+        cothread.Yield()
+
+
 # 80 char line lengths...
 AIV = builtin.parts.AInitialVisibility
 
@@ -100,6 +111,14 @@ class PmacChildPart(builtin.parts.ChildPart):
         self.time_since_last_pvt = 0
         # Stored generator for positions
         self.generator: CompoundGenerator = None
+        # How many profile points have been written to the child
+        self.points_written = 0
+        # Whether to calculate the next profile batch in a thread while running
+        self.use_lookahead = False
+        # Queue that will get the result of the lookahead thread calculating the
+        # next profile batch, or None if there isn't one running
+        self.lookahead: Optional[Queue] = None
+        self.lookahead_thread: Optional[Thread] = None
 
     def setup(self, registrar: PartRegistrar) -> None:
         super().setup(registrar)
@@ -173,7 +192,7 @@ class PmacChildPart(builtin.parts.ChildPart):
         # cycle
         trigger = get_motion_trigger(part_info)
         if trigger == scanning.infos.MotionTrigger.EVERY_POINT:
-            servo_freq = child.servoFrequency()
+            servo_freq = child.servoFreq.value
             duration = self.get_aligned_duration_with_servo_frequency(
                 servo_freq, duration
             )
@@ -366,6 +385,7 @@ class PmacChildPart(builtin.parts.ChildPart):
         axesToMove: scanning.hooks.AAxesToMove,
     ) -> None:
         context.unsubscribe_all()
+        self.discard_lookahead()
         child = context.block_view(self.mri)
 
         # Store what sort of triggers we need to output
@@ -406,6 +426,7 @@ class PmacChildPart(builtin.parts.ChildPart):
         # Set how far we should be going and the completed steps lookup
         self.steps_up_to = completed_steps + steps_to_do
         self.completed_steps_lookup = []
+        self.points_written = 0
         # Reset the profiles that still need to be sent
         self.profile = dict(
             timeArray=[],
@@ -427,16 +448,79 @@ class PmacChildPart(builtin.parts.ChildPart):
             child = context.block_view(self.mri)
             # Wait for the trajectory to run and complete
             child.pointsScanned.subscribe_value(self.update_step, child)
+            # Get the next batch ready while the first is running
+            self.use_lookahead = True
+            self.start_lookahead()
             # TODO: we should return at the end of the last point for PostRun
             child.executeProfile()
 
     @add_call_types
     def on_abort(self, context: scanning.hooks.AContext) -> None:
+        self.discard_lookahead()
         if self.generator:
             child = context.block_view(self.mri)
             # TODO: if we abort during move to start, what happens?
             child.abortProfile()
 
+    def start_lookahead(self) -> None:
+        """Calculate the next profile batch in a worker thread, so that
+        update_step only has to write it when the child needs more points"""
+        assert self.lookahead is None, "Lookahead already running"
+        if self.use_lookahead and self.end_index < self.steps_up_to:
+            # The thread calculates into a copy of us with its own profile and
+            # completed steps lookup, which are swapped in on the cothread
+            worker = copy.copy(self)
+            worker.profile = {k: list(v) for k, v in self.profile.items()}
+            worker.completed_steps_lookup = self.completed_steps_lookup[-1:]
+            self.lookahead = Queue()
+            self.lookahead_thread = Thread(
+                target=self._lookahead, args=(worker, self.lookahead), daemon=True
+            )
+            self.lookahead_thread.start()
+
+    def _lookahead(self, worker: "PmacChildPart", queue: Queue) -> None:
+        # In a worker thread, so the result is passed back with a Callback
+        try:
+            worker.calculate_generator_profile(worker.end_index)
+        except Exception as e:
+            self.log.debug(f"{self.name}: lookahead failed", exc_info=True)
+            cothread.Callback(queue.put, e)
+        else:
+            cothread.Callback(queue.put, worker)
+
+    def wait_for_lookahead(self, raise_error: bool = True, apply: bool = True) -> bool:
+        """Wait for the lookahead thread to finish if there is one running,
+        and swap in the points it calculated unless apply is False. Returns
+        True if there were points to swap in"""
+        if self.lookahead is None:
+            return False
+        result = self.lookahead.get()
+        # It has finished calculating, so this won't block for long
+        assert self.lookahead_thread, "No lookahead thread"
+        self.lookahead_thread.join()
+        self.lookahead = None
+        self.lookahead_thread = None
+        if isinstance(result, Exception):
+            if raise_error:
+                raise result
+            return False
+        elif apply:
+            self.profile = result.profile
+            # The worker's lookup started with our last element
+            start = min(len(self.completed_steps_lookup), 1)
+            self.completed_steps_lookup += result.completed_steps_lookup[start:]
+            self.end_index = result.end_index
+            self.tail_off_added = result.tail_off_added
+            self.time_since_last_pvt = result.time_since_last_pvt
+            return True
+        return False
+
+    def discard_lookahead(self) -> None:
+        """Stop any more lookahead threads being started, and wait for the
+        running one so it can't put points into the next scan's profile"""
+        self.use_lookahead = False
+        self.wait_for_lookahead(raise_error=False, apply=False)
+
     def update_step(self, scanned, child):
         # scanned is an index into the completed_steps_lookup, so a
         # "how far through the pmac trajectory" rather than a generator
@@ -446,15 +530,29 @@ class PmacChildPart(builtin.parts.ChildPart):
             if self.output_triggers == scanning.infos.MotionTrigger.EVERY_POINT:
                 completed_steps = self.completed_steps_lookup[scanned - 1]
                 self.registrar.report(scanning.infos.RunProgressInfo(completed_steps))
+            # If the lookahead is running it owns the profile, so leave it alone
+            # until we need the points it is calculating
+            calculated = written = False
+            if self.lookahead is not None:
+                if self.loading or self.points_written - scanned >= PROFILE_POINTS:
+                    return
+                self.loading = True
+                try:
+                    calculated = self.wait_for_lookahead()
+                finally:
+                    self.loading = False
             # Keep PROFILE_POINTS trajectory points in front
             if (
                 not self.loading
                 and self.end_index < self.steps_up_to
-                and len(self.completed_steps_lookup) - scanned < PROFILE_POINTS
+                and self.points_written - scanned < PROFILE_POINTS
             ):
                 self.loading = True
-                self.calculate_generator_profile(self.end_index)
+                if not calculated:
+                    self.calculate_generator_profile(self.end_index)
+                calculated = False
                 self.write_profile_points(child)
+                written = True
                 self.loading = False
 
             # If we got to the end, there might be some leftover points that
@@ -466,8 +564,10 @@ class PmacChildPart(builtin.parts.ChildPart):
                 and self.profile["timeArray"]
             ):
                 self.loading = True
-                self.calculate_generator_profile(self.end_index)
+                if not calculated:
+                    self.calculate_generator_profile(self.end_index)
                 self.write_profile_points(child)
+                written = True
                 # If we are triggering at every point, then only one load should be
                 # required. Otherwise for row triggering we may have more than 2000
                 # points left in the profile due to sparse generation, so skip the
@@ -478,6 +578,10 @@ class PmacChildPart(builtin.parts.ChildPart):
                     ], f"Why do we still have points? {self.profile}"
                 self.loading = False
 
+            # Get the next batch ready if we just wrote one
+            if written:
+                self.start_lookahead()
+
     def write_profile_points(self, child, cs_port=None):
         """Build profile using given data
 
@@ -513,6 +617,7 @@ class PmacChildPart(builtin.parts.ChildPart):
                 v = np.array(v, np.float64)
             args[k] = v
         child.writeProfile(**args)
+        self.points_written += len(args["timeArray"])
 
     user_program = {
         scanning.infos.MotionTrigger.NONE: {
@@ -684,6 +789,67 @@ class PmacChildPart(builtin.parts.ChildPart):
             {name: point.upper[name] for name in self.axis_mapping},
         )
 
+    def add_profile_points(
+        self, time_points, velocity_modes, user_programs, completed_steps, axis_points
+    ):
+        """Vectorized add_profile_point for a slab of points that are all shorter
+        than MAX_MOVE_TIME, taking numpy arrays rather than scalars"""
+        self.profile["timeArray"] += time_points.tolist()
+        self.profile["velocityMode"] += velocity_modes.tolist()
+        self.profile["userPrograms"] += user_programs.tolist()
+        self.completed_steps_lookup += completed_steps.tolist()
+        for k, v in axis_points.items():
+            cs_axis = self.axis_mapping[k].cs_axis.lower()
+            self.profile[cs_axis] += v.tolist()
+
+    def profile_points_room(self, points_per_add: int) -> int:
+        """How many adds of points_per_add profile points we can do before
+        check_profile_length_exceeds_profile_points() would become True"""
+        room = PROFILE_POINTS - len(self.profile["timeArray"])
+        return max(1, room // points_per_add + 1)
+
+    def add_generator_point_pairs(self, points, start, end, point_num, joined):
+        """Vectorized add_generator_point_pair for points[start:end], stopping
+        early when the profile is full. Return the index of the next point to do
+        """
+        end = min(end, start + self.profile_points_room(2))
+        half_durations = points.duration[start:end] / 2.0
+        if np.any(half_durations > MAX_MOVE_TIME):
+            # Needs splitting, so do the first point the slow way
+            self.add_generator_point_pair(points[start], point_num, joined[start])
+            return start + 1
+        points_are_joined = np.asarray(joined[start:end], dtype=bool)
+        # Interleave the position with the upper bound of each point
+        user_programs = np.empty((end - start, 2), np.int32)
+        user_programs[:, 0] = self.get_user_program(PointType.MID_POINT)
+        user_programs[:, 1] = np.where(
+            points_are_joined,
+            self.get_user_program(PointType.POINT_JOIN),
+            self.get_user_program(PointType.END_OF_ROW),
+        )
+        velocity_modes = np.empty((end - start, 2), np.int32)
+        velocity_modes[:, 0] = VelocityModes.AVERAGE_PREV_TO_NEXT
+        velocity_modes[:, 1] = np.where(
+            points_are_joined,
+            VelocityModes.AVERAGE_PREV_TO_NEXT,
+            VelocityModes.REAL_PREV_TO_CURRENT,
+        )
+        point_nums = np.arange(point_num, point_num + end - start)
+        self.add_profile_points(
+            np.repeat(half_durations, 2),
+            velocity_modes.ravel(),
+            user_programs.ravel(),
+            np.stack((point_nums, point_nums + 1), axis=1).ravel(),
+            {
+                name: np.stack(
+                    (points.positions[name][start:end], points.upper[name][start:end]),
+                    axis=1,
+                ).ravel()
+                for name in self.axis_mapping
+            },
+        )
+        return end
+
     def add_sparse_point(self, points, point_num, points_are_joined, same_velocities):
         """
         Add in points but skip those that are linear to create a sparse
@@ -761,14 +927,81 @@ class PmacChildPart(builtin.parts.ChildPart):
             profile_point_added = True
         return profile_point_added
 
-    def get_some_points(self, start_index):
+    def add_sparse_points(self, points, start, end, same_velocities):
+        """Vectorized add_sparse_point for points[start:end] which must all be
+        joined to their next point, stopping early when the profile is full.
+        Return the index of the next point to do and whether any profile points
+        were added
+        """
+        # Points that are joined to the next point are only added if their
+        # velocity changes, all the others are skipped
+        added = ~np.asarray(same_velocities[start:end], dtype=bool)
+        added_indices = np.flatnonzero(added)
+        room = self.profile_points_room(2)
+        if len(added_indices) > room:
+            end = start + added_indices[room - 1] + 1
+            added = added[: end - start]
+            added_indices = added_indices[:room]
+        durations = points.duration[start:end]
+        # Accumulate the durations of skipped points into the time of the next
+        # added point, or into time_since_last_pvt if there is none
+        skipped_before = np.cumsum(added) - added
+        skipped_time = np.bincount(
+            skipped_before[~added],
+            weights=durations[~added],
+            minlength=len(added_indices) + 1,
+        )
+        skipped_time[0] += self.time_since_last_pvt
+        if len(added_indices) == 0:
+            self.time_since_last_pvt = skipped_time[0]
+            return end, False
+        half_durations = durations[added_indices] / 2.0
+        time_points = np.stack(
+            (skipped_time[:-1] + half_durations, half_durations), axis=1
+        ).ravel()
+        if np.any(time_points > MAX_MOVE_TIME):
+            # Needs splitting, so do the first point the slow way
+            point_added = self.add_sparse_point(
+                points, start, True, same_velocities[start]
+            )
+            return start + 1, point_added
+        point_nums = added_indices + start
+        self.add_profile_points(
+            time_points,
+            np.full(len(time_points), VelocityModes.AVERAGE_PREV_TO_NEXT, np.int32),
+            np.tile(
+                np.array(
+                    [
+                        self.get_user_program(PointType.MID_POINT),
+                        self.get_user_program(PointType.POINT_JOIN),
+                    ],
+                    np.int32,
+                ),
+                len(point_nums),
+            ),
+            np.stack((point_nums, point_nums + 1), axis=1).ravel(),
+            {
+                name: np.stack(
+                    (
+                        points.positions[name][point_nums],
+                        points.upper[name][point_nums],
+                    ),
+                    axis=1,
+                ).ravel()
+                for name in self.axis_mapping
+            },
+        )
+        self.time_since_last_pvt = skipped_time[-1]
+        return end, True
+
+    def get_some_points(self, start_index, batch_points=BATCH_POINTS):
         # calculate the indices of the next batch of points to get for
         # the calculate_generator_profile loop
-        # cap at PROFILE_POINTS (+1 so we can always get next_point)
+        # cap at batch_points (+1 so we can always get next_point)
         if start_index == self.steps_up_to:
             return None, None, None
-        if self.steps_up_to - start_index > BATCH_POINTS:
-            up_to = BATCH_POINTS + start_index + 1
+        if self.steps_up_to - start_index > batch_points:
+            up_to = batch_points + start_index + 1
             points = self.generator.get_points(start_index, up_to)
         else:
             points = self.generator.get_points(start_index, self.steps_up_to)
@@ -778,6 +1011,23 @@ class PmacChildPart(builtin.parts.ChildPart):
 
         return points, joined, velocities
 
+    @staticmethod
+    def get_gap_indices(joined, points_to_do: int) -> np.ndarray:
+        """Return the indices of the first points_to_do points that are not
+        joined to their next point"""
+        joined = np.atleast_1d(np.asarray(joined, dtype=bool))
+        return np.flatnonzero(~joined[:points_to_do])
+
+    @staticmethod
+    def get_next_gap_index(gaps: np.ndarray, index: int, points_to_do: int) -> int:
+        """Return the first gap index at or after index, or points_to_do if
+        there isn't one"""
+        i = np.searchsorted(gaps, index)
+        if i < len(gaps):
+            return int(gaps[i])
+        else:
+            return points_to_do
+
     def check_profile_length_exceeds_profile_points(self) -> bool:
         # Check if we have exceeded the points number and need to write
         # Strictly less than so we always add one more point to the time
@@ -800,8 +1050,10 @@ class PmacChildPart(builtin.parts.ChildPart):
         start_batch_index = start_index
         point_index = start_index
         while True:
-            # Grab some points
-            points, joined, _ = self.get_some_points(start_batch_index)
+            # Grab some points, but no more than we could fit in the profile as
+            # each one adds at least 2 profile points
+            batch_points = min(BATCH_POINTS, self.profile_points_room(2))
+            points, joined, _ = self.get_some_points(start_batch_index, batch_points)
             if not points:
                 return True
 
@@ -814,21 +1066,28 @@ class PmacChildPart(builtin.parts.ChildPart):
             # Don't do all points in the batch otherwise we can get an index error
             # when adding the turnaround.
             points_to_do = num_points - 1
-            for i in range(points_to_do):
-                self.add_generator_point_pair(points[i], point_index, joined[i])
+            gaps = self.get_gap_indices(joined, points_to_do)
+            i = 0
+            while i < points_to_do:
+                # Add a slab of joined points up to and including the next gap
+                end = min(
+                    self.get_next_gap_index(gaps, i, points_to_do) + 1, points_to_do
+                )
+                next_i = self.add_generator_point_pairs(
+                    points, i, end, point_index, joined
+                )
+                point_index += next_i - i
+                i = next_i
 
                 # add in the turnaround between non-contiguous points
-                if not (joined[i]):
-                    self.insert_gap(points[i], points[i + 1], point_index + 1)
+                if not (joined[i - 1]):
+                    self.insert_gap(points[i - 1], points[i], point_index)
 
                 # Check if we have exceeded the profile points limit
                 if self.check_profile_length_exceeds_profile_points():
-                    self.end_index = point_index + 1
+                    self.end_index = point_index
                     return False
 
-                # Increment point index
-                point_index += 1
-
             # Check for the last point
             if last_point_in_batch:
                 # Add the final generator point
@@ -851,7 +1110,7 @@ class PmacChildPart(builtin.parts.ChildPart):
                 return True
 
             # Yield so that we don't continuously block other threads
-            cothread.Yield()
+            yield_if_cothread()
 
     def create_generator_profile_sparse(self, start_index: int) -> bool:
         # Ensure we have the correct trigger type
@@ -877,22 +1136,31 @@ class PmacChildPart(builtin.parts.ChildPart):
             # Don't do all points in the batch otherwise we can get an index error
             # when adding the turnaround.
             points_to_do = num_points - 1
-            for i in range(points_to_do):
-                point_added = self.add_sparse_point(points, i, joined[i], velocities[i])
-
-                # add in the turnaround between non-contiguous points
-                if not (joined[i]):
+            gaps = self.get_gap_indices(joined, points_to_do)
+            i = 0
+            while i < points_to_do:
+                if joined[i]:
+                    # Add a slab of joined points up to the next gap
+                    end = self.get_next_gap_index(gaps, i, points_to_do)
+                    next_i, point_added = self.add_sparse_points(
+                        points, i, end, velocities
+                    )
+                else:
+                    point_added = self.add_sparse_point(
+                        points, i, joined[i], velocities[i]
+                    )
+                    # add in the turnaround between non-contiguous points
                     self.insert_gap(points[i], points[i + 1], point_index + 1)
+                    next_i = i + 1
+                point_index += next_i - i
+                i = next_i
 
                 # Check if we have exceeded the profile points limit. Only check if we
                 # have actually added a point, otherwise we waste time.
                 if point_added and self.check_profile_length_exceeds_profile_points():
-                    self.end_index = point_index + 1
+                    self.end_index = point_index
                     return False
 
-                # Increment point index
-                point_index += 1
-
             # Check for the last point
             if last_point_in_batch:
                 point_added = self.add_sparse_point(points, points_to_do, False, False)
@@ -915,7 +1183,7 @@ class PmacChildPart(builtin.parts.ChildPart):
                 return True
 
             # Yield so that we don't continuously block other threads
-            cothread.Yield()
+            yield_if_cothread()
 
     def calculate_generator_profile(self, start_index, do_run_up=False):
         # If we are doing the first build, do_run_up will be passed to flag
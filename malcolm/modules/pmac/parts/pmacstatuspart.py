@@ -1,6 +1,15 @@
 from annotypes import Anno, add_call_types
 
-from malcolm.core import PartRegistrar
+from malcolm.core import (
+    NumberMeta,
+    PartRegistrar,
+    Response,
+    Return,
+    Subscribe,
+    Unsubscribe,
+    Update,
+    Widget,
+)
 from malcolm.modules import builtin, scanning
 
 from ..infos import PmacVariablesInfo
@@ -12,6 +21,14 @@ with Anno("The Servo Frequency of the PMAC in Hz"):
 class PmacStatusPart(builtin.parts.ChildPart):
     def setup(self, registrar: PartRegistrar) -> None:
         super().setup(registrar)
+        # Mirror servoFreq from our child so it can be read as an Attribute,
+        # which a cached validate can check hasn't changed
+        self.servo_freq = NumberMeta(
+            "float64",
+            "Servo interrupt frequency (Hz)",
+            tags=[Widget.TEXTUPDATE.tag()],
+        ).create_attribute_model()
+        registrar.add_attribute_model("servoFreq", self.servo_freq)
         # Add methods
         registrar.add_method_model(
             self.servo_frequency, "servoFrequency", needs_context=True
@@ -19,6 +36,29 @@ class PmacStatusPart(builtin.parts.ChildPart):
         # Hooks
         registrar.hook(scanning.hooks.ReportStatusHook, self.report_status)
 
+    @add_call_types
+    def on_init(self, context: builtin.hooks.AContext) -> None:
+        super().on_init(context)
+        subscribe = Subscribe(path=[self.mri, "servoFreq", "value"])
+        subscribe.set_callback(self.update_servo_freq)
+        # Wait for the first update to come in
+        assert self.child_controller, "No child controller"
+        self.child_controller.handle_request(subscribe).wait()
+
+    @add_call_types
+    def on_halt(self) -> None:
+        super().on_halt()
+        unsubscribe = Unsubscribe()
+        unsubscribe.set_callback(self.update_servo_freq)
+        assert self.child_controller, "No child controller"
+        self.child_controller.handle_request(unsubscribe)
+
+    def update_servo_freq(self, response: Response) -> None:
+        if isinstance(response, Update):
+            self.servo_freq.set_value(response.value)
+        elif not isinstance(response, Return):
+            self.log.warning(f"Got unexpected response {response}")
+
     @add_call_types
     def servo_frequency(self, context: builtin.hooks.AContext) -> AServoFrequency:
         return context.block_view(self.mri).servoFreq.value
@@ -64,9 +64,7 @@ class RawMotorSinkPortsPart(Part):
         self.disconnect()
         # make sure we can connect to the pvs
         ca_values = ca.util.assert_connected(
-            ca.util.catools.caget(
-                self.pvs + self.rbvs, format=ca.util.catools.FORMAT_CTRL
-            )
+            ca.util.bulk_caget(self.pvs + self.rbvs, format=ca.util.catools.FORMAT_CTRL)
         )
         # Set initial value
         self.port_choices = ca_values[0].enums
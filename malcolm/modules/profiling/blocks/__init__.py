@@ -1,7 +1,7 @@
-from malcolm.yamlutil import check_yaml_names, make_block_creator
+from malcolm.yamlutil import lazy_creators, make_block_creator
 
-profiling_web_server_block = make_block_creator(
-    __file__, "profiling_web_server_block.yaml"
+__getattr__, __all__ = lazy_creators(
+    globals(),
+    make_block_creator,
+    "profiling_web_server_block.yaml",
 )
-
-__all__ = check_yaml_names(globals())
@@ -1,6 +1,8 @@
-from malcolm.yamlutil import check_yaml_names, make_block_creator
+from malcolm.yamlutil import lazy_creators, make_block_creator
 
-pva_server_block = make_block_creator(__file__, "pva_server_block.yaml")
-pva_client_block = make_block_creator(__file__, "pva_client_block.yaml")
-
-__all__ = check_yaml_names(globals())
+__getattr__, __all__ = lazy_creators(
+    globals(),
+    make_block_creator,
+    "pva_server_block.yaml",
+    "pva_client_block.yaml",
+)
@@ -1,8 +1,8 @@
 from enum import Enum
-from typing import Any, Dict, List, Tuple, Union
+from typing import Any, Callable, Dict, List, Tuple, Union
 
 import numpy as np
-from annotypes import Array
+from annotypes import Array, Serializable
 from p4p import Type, Value
 
 from malcolm.compat import OrderedDict
@@ -37,7 +37,7 @@ type_specifiers.update({bool: "?", int: "l", float: "d"})
 def convert_to_type_tuple_value(value: Any) -> Tuple[Any, Any]:
     # cheaper than a subclass check
     value_for_set: Any
-    spec: Union[str, Tuple[str, Any, List]]
+    spec: Union[str, Tuple[str, Any, Tuple]]
     if value.__class__ is Array:
         if issubclass(value.typ, Enum):
             spec = "as"
@@ -82,7 +82,8 @@ def convert_to_type_tuple_value(value: Any) -> Tuple[Any, Any]:
                 t, v_set = convert_to_type_tuple_value(value[k])
                 fields.append((k, t))
                 value_for_set[k] = v_set
-        spec = ("S", typeid, fields)
+        # A tuple so that the spec can be used as a key into _types
+        spec = ("S", typeid, tuple(fields))
     elif isinstance(value, (AlarmSeverity, AlarmStatus)):
         spec = "i"
         value_for_set = value.value
@@ -115,15 +116,24 @@ def convert_from_type_spec(spec: str, val: Any) -> Any:
         return val
 
 
+# p4p Types keyed by (fields, typeid), as Blocks with the same layout of
+# fields will make the same Type
+_types: Dict[Tuple[Tuple, str], Type] = {}
+
+
 def convert_dict_to_value(d: Dict) -> Value:
     if d is None:
         val = EMPTY
     else:
         (_, typeid, fields), value_for_set = convert_to_type_tuple_value(d)
         try:
-            typ = Type(fields, typeid)
-        except RuntimeError as e:
-            raise RuntimeError(f"{e} when doing Type({fields}, {typeid})")
+            typ = _types[(fields, typeid)]
+        except KeyError:
+            try:
+                typ = Type(fields, typeid)
+            except RuntimeError as e:
+                raise RuntimeError(f"{e} when doing Type({fields}, {typeid})")
+            _types[(fields, typeid)] = typ
         val = Value(typ, value_for_set)
     return val
 
@@ -143,8 +153,86 @@ def convert_value_to_dict(v: Value) -> Dict:
     return d
 
 
+def _convert_any_for_set(value: Any) -> Any:
+    _, value_for_set = convert_to_type_tuple_value(value)
+    return value_for_set
+
+
+def _unchanged_for_set(value: Any) -> Any:
+    return value
+
+
+def _enum_for_set(value: Enum) -> Any:
+    return value.value
+
+
+def _serializable_for_set(value: Any) -> Dict[str, Any]:
+    return {k: convert_value_for_set(value[k]) for k in value if k != "typeid"}
+
+
+def _make_serializable_converter(cls: type) -> Callable[[Any], Any]:
+    # Numeric fields can be set as they are, anything else needs converting
+    call_types = cls.call_types  # type: ignore
+    plan = [
+        (k, anno.typ in (bool, int, float) and not anno.is_array)
+        for k, anno in call_types.items()
+        if k != "typeid"
+    ]
+
+    def convert(value: Any) -> Dict[str, Any]:
+        if value.call_types is not call_types:
+            # Some instances (like BlockModel) have their own fields
+            return _serializable_for_set(value)
+        d = {}
+        for k, unchanged in plan:
+            v = getattr(value, k)
+            d[k] = v if unchanged else convert_value_for_set(v)
+        return d
+
+    return convert
+
+
+def _make_set_converter(cls: type) -> Callable[[Any], Any]:
+    # Pick the branch of convert_to_type_tuple_value that instances of cls
+    # will take, without working out the type spec
+    if cls is Array or issubclass(cls, (list, dict)):
+        # Contents need inspecting on every call
+        return _convert_any_for_set
+    elif issubclass(cls, np.ndarray):
+        return _unchanged_for_set
+    elif hasattr(cls, "to_dict"):
+        if getattr(cls, "typeid", None) == NTTable.typeid:
+            # Needs labels adding from the meta
+            return _convert_any_for_set
+        elif issubclass(cls, Serializable):
+            # Fields are known up front, so work out which need converting
+            return _make_serializable_converter(cls)
+        return _serializable_for_set
+    elif issubclass(cls, Enum):
+        return _enum_for_set
+    elif issubclass(cls, str) or cls in type_specifiers:
+        return _unchanged_for_set
+    else:
+        # Let convert_to_type_tuple_value raise the error
+        return _convert_any_for_set
+
+
+# Functions to convert an instance of the key to a value that can be set on a
+# p4p Value, made the first time we see each class
+_set_converters: Dict[type, Callable[[Any], Any]] = {}
+
+
+def convert_value_for_set(value: Any) -> Any:
+    """Convert value so it can be set on an existing p4p Value. This gives the
+    same result as convert_to_type_tuple_value, but doesn't make the spec"""
+    cls = value.__class__
+    try:
+        converter = _set_converters[cls]
+    except KeyError:
+        converter = _set_converters.setdefault(cls, _make_set_converter(cls))
+    return converter(value)
+
+
 def update_path(value: Value, path: List[str], update: Any) -> None:
-    for p in path[:-1]:
-        value = value[p]
-    _, update = convert_to_type_tuple_value(update)
-    value[path[-1]] = update
+    # p4p can set nested fields from a dotted name in one go
+    value[".".join(path)] = convert_value_for_set(update)
@@ -1 +1,8 @@
-from . import controllers, hooks, infos, parts, util
+from typing import TYPE_CHECKING
+
+from malcolm.core import lazy_import
+
+if TYPE_CHECKING:
+    from . import controllers, hooks, infos, parts, util
+
+__getattr__ = lazy_import(__name__, ["controllers", "hooks", "infos", "parts", "util"])
@@ -1,6 +1,9 @@
+import inspect
+import json
 from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple, Type
 
-from annotypes import Anno, add_call_types, deserialize_object
+import numpy as np
+from annotypes import Anno, add_call_types, deserialize_object, json_encode
 from scanpointgenerator import CompoundGenerator
 
 from malcolm.compat import OrderedDict
@@ -9,6 +12,7 @@ from malcolm.core import (
     AbortedError,
     AMri,
     Context,
+    Display,
     NumberMeta,
     Part,
     Queue,
@@ -43,6 +47,9 @@ PartConfigureParams = Dict[Part, ConfigureParamsInfo]
 
 ss = RunnableStates
 
+# How many sets of validated parameters to remember
+VALIDATE_CACHE_SIZE = 50
+
 with Anno("The validated configure parameters"):
     AConfigureParams = ConfigureParams
 with Anno("Step to mark as the last completed step, -1 for current"):
@@ -118,6 +125,43 @@ def update_configure_model(
     configure_model.set_defaults(defaults)
 
 
+def same_value(a: Any, b: Any) -> bool:
+    """Whether two Attribute values are the same, even if not the same object"""
+    if a is b:
+        return True
+    if isinstance(a, np.ndarray) or isinstance(b, np.ndarray):
+        return np.array_equal(a, b)
+    try:
+        return bool(a == b)
+    except Exception:
+        return False
+
+
+def info_key(info: Any) -> str:
+    """A key made from the class and __init__ args of an Info, which is the same
+    for equal Infos. Raises if an arg isn't stored on it or can't be serialized
+    """
+    cls = type(info)
+    spec = inspect.getfullargspec(cls.__init__)
+    args = OrderedDict((x, getattr(info, x)) for x in spec.args[1:])
+    return f"{cls.__module__}.{cls.__qualname__}{json_encode(args)}"
+
+
+class CachedValidate:
+    """The params a validate returned, with the Attribute values its parts read
+    and the validates of child Blocks they called to get them"""
+
+    def __init__(
+        self,
+        validated: Dict[str, str],
+        reads: List[Tuple[Any, str, Any]],
+        child_validates: List[Tuple["RunnableController", Dict[str, Any]]],
+    ) -> None:
+        self.validated = validated
+        self.reads = reads
+        self.child_validates = child_validates
+
+
 class RunnableController(builtin.controllers.ManagerController):
     """RunnableDevice implementer that also exposes GUI for child parts"""
 
@@ -185,6 +229,23 @@ class RunnableController(builtin.controllers.ManagerController):
             "int32", "Readback of number of scan steps", tags=[Widget.TEXTUPDATE.tag()]
         ).create_attribute_model(0)
         self.field_registry.add_attribute_model("totalSteps", self.total_steps)
+        # Validated params keyed on the params and state they were validated
+        # with, so repeated configures can skip the ValidateHook
+        self.validate_cache: Dict[Tuple, CachedValidate] = {}
+        self.validate_calls = 0
+        self.validate_hits = 0
+        # Incremented whenever the design or child config attributes change
+        self.design_version = 0
+        # Create read-only attribute for how often the validate cache is used
+        self.validate_hit_rate = NumberMeta(
+            "float64",
+            "Percentage of validate calls answered from the cache",
+            tags=[Widget.TEXTUPDATE.tag()],
+            display=Display(units="%", precision=1),
+        ).create_attribute_model()
+        self.field_registry.add_attribute_model(
+            "validateHitRate", self.validate_hit_rate
+        )
         # Create the method models
         self.field_registry.add_method_model(self.validate)
         self.set_writeable_in(
@@ -334,6 +395,12 @@ class RunnableController(builtin.controllers.ManagerController):
         super().update_block_endpoints()
         self.update_configure_params()
 
+    def update_modified(self, part: Part = None, info: Any = None) -> None:
+        # Any change to the design or the config of our children might change
+        # what the parts will validate, so don't use older cached params
+        self.design_version += 1
+        super().update_modified(part, info)
+
     def _part_params(
         self, part_contexts: Dict[Part, Context] = None, params: ConfigureParams = None
     ) -> PartContextParams:
@@ -363,17 +430,23 @@ class RunnableController(builtin.controllers.ManagerController):
         Doesn't take device state into account so can be run in any state
         """
         iterations = 10
-        # We will return this, so make sure we fill in defaults
-        for k, default in self._block.configure.meta.defaults.items():
-            kwargs.setdefault(k, default)
-        # The validated parameters we will eventually return
-        params = ConfigureParams(generator, axesToMove, breakpoints, **kwargs)
-        # Make some tasks just for validate
-        part_contexts = self.create_part_contexts()
-        # Get any status from all parts
-        status_part_info = self.run_hooks(
-            ReportStatusHook(p, c) for p, c in part_contexts.items()
+        params, part_contexts, status_part_info = self._validate_setup(
+            generator, axesToMove, breakpoints, kwargs
         )
+        # If we have validated these params in the same state, use the result
+        encoded = self._encode_params(params)
+        key = self._validate_key(encoded, part_contexts, status_part_info)
+        cached = self._cached_validate(key)
+        self._update_validate_hit_rate(hit=cached is not None)
+        if key and encoded and cached is not None:
+            # Move to the end so it is the last to be evicted
+            self.validate_cache[key] = self.validate_cache.pop(key)
+            return self._params_from_cache(params, encoded, cached.validated)
+        # Record what the parts read and post, so we can tell if it changes
+        reads: List[Tuple[Any, str, Any]] = []
+        posts: List[Tuple[List[str], Any]] = []
+        for context in part_contexts.values():
+            context.record_reads(reads, posts)
         while iterations > 0:
             # Try up to 10 times to get a valid set of parameters
             iterations -= 1
@@ -411,10 +484,149 @@ class RunnableController(builtin.controllers.ManagerController):
                             f"{self.mri}: tweaking {tweak.parameter} to {deserialized}"
                         )
             else:
-                # Consistent set, just return the params
+                # Consistent set, cache and return the params
+                validated = self._encode_params(params)
+                if key and validated:
+                    self._cache_validate(key, validated, reads, posts)
                 return params
         raise ValueError("Could not get a consistent set of parameters")
 
+    def _validate_setup(
+        self,
+        generator: AGenerator,
+        axesToMove: AAxesToMove,
+        breakpoints: ABreakpoints,
+        kwargs: Dict[str, Any],
+    ) -> Tuple[ConfigureParams, Dict[Part, Context], Dict[str, Any]]:
+        # We will return this, so make sure we fill in defaults
+        for k, default in self._block.configure.meta.defaults.items():
+            kwargs.setdefault(k, default)
+        # The validated parameters we will eventually return
+        params = ConfigureParams(generator, axesToMove, breakpoints, **kwargs)
+        # Make some tasks just for validate
+        part_contexts = self.create_part_contexts()
+        # Get any status from all parts
+        status_part_info = self.run_hooks(
+            ReportStatusHook(p, c) for p, c in part_contexts.items()
+        )
+        return params, part_contexts, status_part_info
+
+    @staticmethod
+    def _encode_params(params: ConfigureParams) -> Optional[Dict[str, str]]:
+        # Serialize each of the params separately so we can tell which ones
+        # were tweaked, or return None if they can't be serialized
+        try:
+            return {k: json_encode(getattr(params, k)) for k in params.call_types}
+        except Exception:
+            return None
+
+    def _validate_key(
+        self,
+        encoded: Optional[Dict[str, str]],
+        part_contexts: Dict[Part, Context],
+        status_part_info: Dict[str, Any],
+    ) -> Optional[Tuple]:
+        """Make a key for the validate cache from the params, our design and the
+        status of our parts, or None if they can't be serialized"""
+        if encoded is None:
+            return None
+        our_config = {k: a.value for k, a in self.our_config_attributes.items()}
+        try:
+            state = (
+                json_encode(our_config),
+                tuple(p.name for p in part_contexts),
+                tuple(
+                    (name, tuple(info_key(info) for info in infos or ()))
+                    for name, infos in status_part_info.items()
+                ),
+                self.design_version,
+            )
+        except Exception:
+            self.log.debug(f"{self.mri}: can't cache validate", exc_info=True)
+            return None
+        return tuple(encoded.items()), state
+
+    def _cached_validate(self, key: Optional[Tuple]) -> Optional["CachedValidate"]:
+        # Get the cached result for key if nothing it depends on has changed
+        cached = self.validate_cache.get(key) if key else None
+        if cached is None:
+            return None
+        for model, child_name, value in cached.reads:
+            if not same_value(model[child_name], value):
+                return None
+        for controller, post_params in cached.child_validates:
+            if not controller._validate_would_hit(post_params):
+                return None
+        return cached
+
+    def _cache_validate(
+        self,
+        key: Tuple,
+        validated: Dict[str, str],
+        reads: List[Tuple[Any, str, Any]],
+        posts: List[Tuple[List[str], Any]],
+    ) -> None:
+        assert self.process, "No attached process"
+        child_validates = []
+        for path, post_params in posts:
+            controller = self.process.get_controller(path[0])
+            if isinstance(controller, RunnableController) and path[1:] == ["validate"]:
+                child_validates.append((controller, dict(post_params)))
+            else:
+                # We can't tell when what another Method returns will change,
+                # or what the validate of a proxied Block reads, so don't cache
+                self.log.debug(f"{self.mri}: can't cache validate that posts {path}")
+                return
+        # Only the first value read from each Attribute matters
+        first_reads: Dict[Tuple[int, str], Tuple[Any, str, Any]] = {}
+        for model, child_name, value in reads:
+            first_reads.setdefault((id(model), child_name), (model, child_name, value))
+        self.validate_cache[key] = CachedValidate(
+            validated, list(first_reads.values()), child_validates
+        )
+        if len(self.validate_cache) > VALIDATE_CACHE_SIZE:
+            del self.validate_cache[next(iter(self.validate_cache))]
+
+    def _validate_would_hit(self, post_params: Dict[str, Any]) -> bool:
+        """Whether validate(**post_params) would be answered from the cache"""
+        # Check them the way a Post to validate would
+        kwargs = dict(self._block.validate.meta.takes.validate(post_params))
+        params, part_contexts, status_part_info = self._validate_setup(
+            kwargs.pop("generator"),
+            kwargs.pop("axesToMove", None),
+            kwargs.pop("breakpoints", None),
+            kwargs,
+        )
+        encoded = self._encode_params(params)
+        key = self._validate_key(encoded, part_contexts, status_part_info)
+        return self._cached_validate(key) is not None
+
+    def _params_from_cache(
+        self,
+        params: ConfigureParams,
+        encoded: Dict[str, str],
+        cached: Dict[str, str],
+    ) -> ConfigureParams:
+        # Like the ValidateHook loop, keep the objects we were given for the
+        # params that weren't tweaked, so they compare equal to the caller's,
+        # and make new objects for the ones that were
+        takes = self._block.configure.meta.takes.elements
+        for k, v in cached.items():
+            if encoded.get(k) != v:
+                value = json.loads(v)
+                if k in takes:
+                    value = takes[k].validate(value)
+                setattr(params, k, value)
+        return params
+
+    def _update_validate_hit_rate(self, hit: bool) -> None:
+        self.validate_calls += 1
+        if hit:
+            self.validate_hits += 1
+        self.validate_hit_rate.set_value(
+            100.0 * self.validate_hits / self.validate_calls
+        )
+
     def abortable_transition(self, state):
         with self._lock:
             # We might have been aborted just now, so this will fail
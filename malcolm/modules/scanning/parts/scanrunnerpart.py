@@ -1,7 +1,9 @@
 import os
+import time
+from collections import deque
 from datetime import datetime
 from enum import Enum
-from typing import Any, Dict, Optional
+from typing import Any, Deque, Dict, Optional, Tuple
 
 from annotypes import add_call_types
 from ruamel.yaml import YAML, YAMLError
@@ -9,6 +11,7 @@ from scanpointgenerator import CompoundGenerator, LineGenerator
 
 from malcolm.core import (
     AbortedError,
+    BooleanMeta,
     NotWriteableError,
     NumberMeta,
     PartRegistrar,
@@ -74,6 +77,11 @@ class ScanRunnerPart(ChildPart):
         self.runner_config = None
         self.context: Optional[AContext] = None
         self.scan_sets: Dict[str, Scan] = {}
+        # (generator, scan directory) of the scans still to run, so the next
+        # one can be validated while the current one runs
+        self.upcoming_scans: Deque[Tuple[CompoundGenerator, str]] = deque()
+        # When the last scan stopped running, to report the gap between scans
+        self.last_run_end: Optional[float] = None
 
         self.runner_state = StringMeta(
             "Runner state", tags=Widget.TEXTUPDATE.tag()
@@ -103,6 +111,12 @@ class ScanRunnerPart(ChildPart):
             "Root output directory (will create a sub-directory inside)",
             tags=[config_tag(), Widget.TEXTINPUT.tag()],
         ).create_attribute_model()
+        self.prepare_next_scan = BooleanMeta(
+            "Validate the next scan while the current one runs, which only "
+            "warms the scan block's validate cache",
+            writeable=True,
+            tags=[Widget.CHECKBOX.tag(), config_tag()],
+        ).create_attribute_model(False)
 
     def setup(self, registrar: PartRegistrar) -> None:
         super().setup(registrar)
@@ -137,6 +151,11 @@ class ScanRunnerPart(ChildPart):
         registrar.add_attribute_model(
             "outputDirectory", self.output_directory, self.output_directory.set_value
         )
+        registrar.add_attribute_model(
+            "prepareNextScan",
+            self.prepare_next_scan,
+            self.prepare_next_scan.set_value,
+        )
 
         # Methods
         registrar.add_method_model(self.loadFile)
@@ -294,6 +313,16 @@ class ScanRunnerPart(ChildPart):
         self.context = context
         scan_block = self.context.block_view(self.mri)
 
+        # Queue up the scans so the next one can be prepared in advance
+        self.last_run_end = None
+        self.upcoming_scans.clear()
+        if self.prepare_next_scan.value:
+            for scan_set in self.scan_sets.values():
+                set_directory = self.get_set_directory(sub_directory, scan_set.name)
+                for scan_number in range(1, scan_set.repeats + 1):
+                    scan_directory = self.get_scan_directory(set_directory, scan_number)
+                    self.upcoming_scans.append((scan_set.generator, scan_directory))
+
         # Cycle through the scan sets
         for key in self.scan_sets:
             self.run_scan_set(
@@ -304,8 +333,12 @@ class ScanRunnerPart(ChildPart):
         self.current_scan_set.set_value("")
         self.runner_status_message.set_value("Scans complete")
 
+    @staticmethod
+    def get_set_directory(sub_directory: str, set_name: str) -> str:
+        return f"{sub_directory}/scanset-{set_name}"
+
     def create_and_get_set_directory(self, sub_directory: str, set_name: str) -> str:
-        set_directory = f"{sub_directory}/scanset-{set_name}"
+        set_directory = self.get_set_directory(sub_directory, set_name)
         self.create_directory(set_directory)
         return set_directory
 
@@ -333,10 +366,14 @@ class ScanRunnerPart(ChildPart):
                 scan_set.generator,
             )
 
+    @staticmethod
+    def get_scan_directory(set_directory: str, scan_number: int) -> str:
+        return f"{set_directory}/scan-{scan_number}"
+
     def create_and_get_scan_directory(
         self, set_directory: str, scan_number: int
     ) -> str:
-        scan_directory = f"{set_directory}/scan-{scan_number}"
+        scan_directory = self.get_scan_directory(set_directory, scan_number)
         self.create_directory(scan_directory)
         return scan_directory
 
@@ -344,6 +381,23 @@ class ScanRunnerPart(ChildPart):
     def scan_is_aborting(scan_block):
         return scan_block.state.value is RunnableStates.ABORTING
 
+    def validate_next_scan(self, scan_block: Any) -> Any:
+        """Start validating the scan after this one, returning the future for
+        it, or None if there isn't one queued"""
+        if not self.upcoming_scans:
+            return None
+        generator, scan_directory = self.upcoming_scans[0]
+        return scan_block.validate_async(generator, fileDir=scan_directory)
+
+    def wait_for_next_scan(self, future: Any) -> None:
+        # The validate is only to warm the scan block's cache, so a failure
+        # will be reported properly when that scan is configured
+        assert self.context, "No context found"
+        try:
+            self.context.wait_all_futures(future)
+        except Exception as e:
+            self.log.warning(f"Validating next scan failed: {e}")
+
     def run_scan(
         self,
         set_name: str,
@@ -358,6 +412,8 @@ class ScanRunnerPart(ChildPart):
 
         # Make individual scan directory
         scan_directory = self.create_and_get_scan_directory(set_directory, scan_number)
+        if self.upcoming_scans:
+            self.upcoming_scans.popleft()
 
         # Check if scan can be reset or run
         while self.scan_is_aborting(scan_block):
@@ -382,7 +438,11 @@ class ScanRunnerPart(ChildPart):
 
         # Run if configure was successful
         start_time = self.get_current_datetime()
+        gap = None
+        if self.last_run_end is not None:
+            gap = time.time() - self.last_run_end
         if outcome is None:
+            next_scan = self.validate_next_scan(scan_block)
             try:
                 scan_block.run()
             except TimeoutError:
@@ -403,11 +463,14 @@ class ScanRunnerPart(ChildPart):
                 )
             else:
                 outcome = ScanOutcome.SUCCESS
+            if next_scan is not None:
+                self.wait_for_next_scan(next_scan)
+        self.last_run_end = time.time()
 
         # Record the outcome
         end_time = self.get_current_datetime()
         report_string = self.get_report_string(
-            set_name, scan_number, outcome, start_time, end_time
+            set_name, scan_number, outcome, start_time, end_time, gap
         )
         self.add_report_line(report_filepath, report_string)
 
@@ -434,10 +497,14 @@ class ScanRunnerPart(ChildPart):
         scan_outcome: ScanOutcome,
         start_time: str,
         end_time: str,
+        gap: Optional[float] = None,
     ) -> str:
+        # The gap is the time in seconds from the end of the previous scan's
+        # run to the start of this one's, or "-" for the first scan
+        gap_str = "-" if gap is None else f"{gap:.3f}"
         report_str = (
             f"{set_name:<30}{scan_number:<10}{self.get_enum_label(scan_outcome):<14}"
-            f"{start_time:<20}{end_time}"
+            f"{start_time:<20}{end_time:<20}{gap_str}"
         )
         return report_str
 
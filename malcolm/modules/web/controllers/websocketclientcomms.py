@@ -25,7 +25,13 @@ from malcolm.core import (
 )
 from malcolm.modules import builtin
 
-from ..util import BlockTable, IOLoopHelper
+from ..util import (
+    BATCH_TYPEID,
+    BINARY_SUBPROTOCOL,
+    BlockTable,
+    IOLoopHelper,
+    decode_binary,
+)
 
 Key = Tuple[Callable[[Response], None], int]
 
@@ -35,6 +41,8 @@ with Anno("Port number to run up under"):
     APort = int
 with Anno("Time to wait for connection"):
     AConnectTimeout = float
+with Anno("Minimum time in seconds between updates to proxied Blocks, 0 is no limit"):
+    AMinPeriod = float
 
 
 class WebsocketClientComms(builtin.controllers.ClientComms):
@@ -46,11 +54,13 @@ class WebsocketClientComms(builtin.controllers.ClientComms):
         hostname: AHostname = "localhost",
         port: APort = 8008,
         connect_timeout: AConnectTimeout = DEFAULT_TIMEOUT,
+        min_period: AMinPeriod = 0.0,
     ) -> None:
         super().__init__(mri)
         self.hostname = hostname
         self.port = port
         self.connect_timeout = connect_timeout
+        self.min_period = min_period
         self._connected_queue = Queue()
         # {new_id: request}
         self._request_lookup: Dict[int, Request] = {}
@@ -80,7 +90,9 @@ class WebsocketClientComms(builtin.controllers.ClientComms):
         # Called from tornado
         url = "ws://%s:%d/ws" % (self.hostname, self.port)
         self._conn = yield websocket_connect(
-            url, connect_timeout=self.connect_timeout - 0.5
+            url,
+            connect_timeout=self.connect_timeout - 0.5,
+            subprotocols=[BINARY_SUBPROTOCOL],
         )
         cothread.Callback(self._connected_queue.put, None)
         while True:
@@ -99,23 +111,36 @@ class WebsocketClientComms(builtin.controllers.ClientComms):
         """
         # Called in tornado loop
         try:
-            self.log.debug("Got message %s", message)
-            d = json_decode(message)
-            response = deserialize_object(d, Response)
-            if isinstance(response, (Return, Error)):
-                request = self._request_lookup.pop(response.id)
-                if isinstance(response, Error):
-                    # Make the message an exception so it can be raised
-                    response.message = ResponseError(response.message)
+            if isinstance(message, bytes):
+                # Server negotiated BINARY_SUBPROTOCOL and sent us arrays
+                self.log.debug("Got binary message of %d bytes", len(message))
+                d = decode_binary(message)
+            else:
+                self.log.debug("Got message %s", message)
+                d = json_decode(message)
+            if d.get("typeid", None) == BATCH_TYPEID:
+                for response_dict in d["messages"]:
+                    self._handle_response_dict(response_dict)
             else:
-                request = self._request_lookup[response.id]
-            # Transfer the work of the callback to cothread
-            cothread.Callback(request.callback, response)
+                self._handle_response_dict(d)
         except Exception:
             # If we don't catch the exception here, tornado will spew odd
             # error messages about 'HTTPRequest' object has no attribute 'path'
             self.log.exception("on_message(%r) failed", message)
 
+    def _handle_response_dict(self, d):
+        # Called in tornado loop
+        response = deserialize_object(d, Response)
+        if isinstance(response, (Return, Error)):
+            request = self._request_lookup.pop(response.id)
+            if isinstance(response, Error):
+                # Make the message an exception so it can be raised
+                response.message = ResponseError(response.message)
+        else:
+            request = self._request_lookup[response.id]
+        # Transfer the work of the callback to cothread
+        cothread.Callback(request.callback, response)
+
     def _report_fault(self):
         # Called in cothread thread
         with self._lock:
@@ -161,7 +186,7 @@ class WebsocketClientComms(builtin.controllers.ClientComms):
             block (BlockModel): The local proxy Block to keep in sync
         """
         # Send a root Subscribe to the server
-        subscribe = Subscribe(path=[mri], delta=True)
+        subscribe = Subscribe(path=[mri], delta=True, minPeriod=self.min_period)
         done_queue = Queue()
 
         def handle_response(response):
@@ -3,7 +3,8 @@ import logging
 import os
 import socket
 import struct
-from typing import Dict, Optional
+import threading
+from typing import Dict, List, Optional, Union
 
 import cothread
 from annotypes import Anno, add_call_types, deserialize_object, json_decode, json_encode
@@ -28,7 +29,7 @@ from malcolm.modules import builtin
 
 from ..hooks import ReportHandlersHook, UHandlerInfos
 from ..infos import HandlerInfo
-from ..util import IOLoopHelper
+from ..util import BATCH_TYPEID, BINARY_SUBPROTOCOL, IOLoopHelper, encode_binary
 
 # Create a module level logger
 log = logging.getLogger(__name__)
@@ -68,6 +69,10 @@ class MalcWebSocketHandler(WebSocketHandler):
     _writeable = None
     _queue: Optional[Queue] = None
     _counter = None
+    _batched = False
+    _binary = False
+    _pending: List[Response]
+    _pending_lock: threading.Lock
 
     def initialize(self, registrar=None, validators=()):
         self._registrar = registrar
@@ -76,6 +81,24 @@ class MalcWebSocketHandler(WebSocketHandler):
         self._validators = validators
         self._queue = Queue()
         self._counter = 0
+        # Responses waiting to be sent in the next batch
+        self._pending = []
+        self._pending_lock = threading.Lock()
+
+    def select_subprotocol(self, subprotocols):
+        # called in tornado's thread when the client connects
+        if BINARY_SUBPROTOCOL in subprotocols:
+            # Client understands numpy arrays sent as binary frames
+            self._binary = True
+            return BINARY_SUBPROTOCOL
+        return None
+
+    def encode(self, o):
+        # called in tornado's thread
+        if self._binary:
+            return encode_binary(o)
+        else:
+            return json_encode(o)
 
     def on_message(self, message):
         # called in tornado's thread
@@ -97,9 +120,40 @@ class MalcWebSocketHandler(WebSocketHandler):
                 self.request.remote_ip,
             )
 
-        msg_id = -1
         try:
             d = json_decode(message)
+            if not isinstance(d, dict):
+                raise ValueError(f"Expected a JSON object, got {message}")
+            batch = d.get("typeid", None) == BATCH_TYPEID
+            if batch:
+                request_dicts = d.get("messages", [])
+                if not isinstance(request_dicts, list):
+                    raise ValueError("Batch messages should be a list")
+        except Exception as e:
+            log.exception("Error handling message:\n%s", message)
+            self.write_message(json_encode(Error(-1, e)))
+            return
+        if batch:
+            # From now on send our responses in batches too
+            self._batched = True
+            errors = []
+            for request_dict in request_dicts:
+                error = self._handle_request(request_dict)
+                if error:
+                    errors.append(error)
+            if errors:
+                self.write_message(
+                    json_encode(dict(typeid=BATCH_TYPEID, messages=errors))
+                )
+        else:
+            error = self._handle_request(d)
+            if error:
+                self.write_message(json_encode(error))
+
+    def _handle_request(self, d: Dict) -> Optional[Error]:
+        # called in tornado's thread
+        msg_id = -1
+        try:
             try:
                 msg_id = d["id"]
             except KeyError:
@@ -119,14 +173,21 @@ class MalcWebSocketHandler(WebSocketHandler):
                 raise ValueError(f"Put/Post is forbidden from {self.request.remote_ip}")
             self._registrar.report(builtin.infos.RequestInfo(request, mri))
         except Exception as e:
-            log.exception("Error handling message:\n%s", message)
-            error = Error(msg_id, e)
-            error_message = error.to_dict()
-            self.write_message(json_encode(error_message))
+            log.exception("Error handling message:\n%s", d)
+            return Error(msg_id, e)
+        return None
 
     def on_response(self, response):
         # called from cothread
-        IOLoopHelper.call(self._on_response, response)
+        if self._batched:
+            with self._pending_lock:
+                self._pending.append(response)
+                if len(self._pending) > 1:
+                    # Already waiting for _on_batched_responses to send them
+                    return
+            IOLoopHelper.call(self._on_batched_responses)
+        else:
+            IOLoopHelper.call(self._on_response, response)
         # Wait for completion once every 10 message
         self._counter += 1
         if self._counter % 10 == 0:
@@ -135,30 +196,45 @@ class MalcWebSocketHandler(WebSocketHandler):
 
     def _on_response(self, response: Response) -> None:
         # called from tornado thread
-        message = json_encode(response)
+        self._write_responses(self.encode(response), [response])
+
+    def _on_batched_responses(self) -> None:
+        # called from tornado thread, sends everything produced since the
+        # first response was added
+        with self._pending_lock:
+            responses, self._pending = self._pending, []
+        message = self.encode(dict(typeid=BATCH_TYPEID, messages=responses))
+        self._write_responses(message, responses)
+
+    def _write_responses(
+        self, message: Union[str, bytes], responses: List[Response]
+    ) -> None:
+        # called from tornado thread
         try:
-            self.write_message(message)
+            self.write_message(message, binary=isinstance(message, bytes))
         except WebSocketError:
             # The websocket is dead. If the response was a Delta or Update, then
             # unsubscribe so the local controller doesn't keep on trying to
             # respond
-            if isinstance(response, (Delta, Update)):
-                # Websocket is dead so we can clear the subscription key.
-                # Subsequent updates may come in before the unsubscribe, but
-                # ignore them as we can't do anything about it
-                mri = self._id_to_mri.pop(response.id, None)
-                if mri:
-                    log.info("WebSocket Error: unsubscribing from stale handle")
-                    unsubscribe = Unsubscribe(response.id)
-                    unsubscribe.set_callback(self.on_response)
-                    if self._registrar:
-                        self._registrar.report(
-                            builtin.infos.RequestInfo(unsubscribe, mri)
-                        )
+            for response in responses:
+                if isinstance(response, (Delta, Update)):
+                    self._unsubscribe_stale(response.id)
         finally:
             assert self._queue, "No queue"
             cothread.Callback(self._queue.put, None)
 
+    def _unsubscribe_stale(self, msg_id: int) -> None:
+        # Websocket is dead so we can clear the subscription key.
+        # Subsequent updates may come in before the unsubscribe, but
+        # ignore them as we can't do anything about it
+        mri = self._id_to_mri.pop(msg_id, None)
+        if mri:
+            log.info("WebSocket Error: unsubscribing from stale handle")
+            unsubscribe = Unsubscribe(msg_id)
+            unsubscribe.set_callback(self.on_response)
+            if self._registrar:
+                self._registrar.report(builtin.infos.RequestInfo(unsubscribe, mri))
+
     # http://stackoverflow.com/q/24851207
     # TODO: remove this when the web gui is hosted from the box
     def check_origin(self, origin):
@@ -1,13 +1,121 @@
 import asyncio
 import atexit
+import json
+import struct
 from threading import Thread
-from typing import Optional, Union
+from typing import Any, List, Optional, Union
 
-from annotypes import Anno, Array
+import numpy as np
+from annotypes import Anno, Array, FrozenOrderedDict, json_encode, serialize_object
 from tornado.ioloop import IOLoop
 
 from malcolm.core import Table
 
+# Envelope for a websocket frame containing many requests or responses
+BATCH_TYPEID = "malcolm:core/Batch:1.0"
+
+# Websocket subprotocol a client asks for if it understands binary frames
+BINARY_SUBPROTOCOL = "malcolm.binary.1"
+# Key of the dict that replaces each numpy array in the JSON header
+BINARY_KEY = "$binary"
+# Binary buffers start on multiples of this many bytes
+BINARY_ALIGN = 8
+
+
+def _serialize_with_buffers(o: Any, buffers: List[np.ndarray]) -> Any:
+    # Like serialize_object, but numeric numpy arrays are appended to buffers
+    # and replaced with placeholders rather than turned into lists
+    if o.__class__ is Array:
+        o = o.seq
+    if isinstance(o, np.ndarray) and o.dtype.kind in "biuf":
+        if o.dtype.byteorder == ">":
+            o = o.astype(o.dtype.newbyteorder("<"))
+        # ascontiguousarray makes 0-d arrays 1-d, so keep the original shape
+        buffer = np.ascontiguousarray(o).reshape(o.shape)
+        buffers.append(buffer)
+        return buffer
+    elif hasattr(o, "to_dict"):
+        keys = list(o.call_types)
+        if o.typeid:
+            keys.insert(0, "typeid")
+        return {k: _serialize_with_buffers(getattr(o, k), buffers) for k in keys}
+    elif isinstance(o, dict):
+        return {k: _serialize_with_buffers(v, buffers) for k, v in o.items()}
+    elif isinstance(o, (list, tuple)):
+        if o and isinstance(o[0], (str, int, float)):
+            # A list of primitives, no need to recurse
+            return o
+        return [_serialize_with_buffers(x, buffers) for x in o]
+    else:
+        return serialize_object(o)
+
+
+def encode_binary(o: Any) -> Union[str, bytes]:
+    """Serialize o for a websocket that negotiated BINARY_SUBPROTOCOL.
+
+    If there are no numeric numpy arrays in o then this is just JSON. Otherwise
+    it is a binary frame containing:
+
+    - The length of the header as a little-endian uint32
+    - The header, which is the JSON of o with each numpy array replaced with
+      {"$binary": {"dtype": "<f8", "offset": 0, "shape": [2, 3]}}
+    - Padding up to a multiple of BINARY_ALIGN bytes
+    - The raw little-endian data of each array, each starting on a multiple of
+      BINARY_ALIGN bytes in C order. offset is relative to the start of the
+      first one
+    """
+    buffers: List[np.ndarray] = []
+    serialized = _serialize_with_buffers(o, buffers)
+    if not buffers:
+        return json_encode(serialized)
+    # Work out where each one goes, then substitute placeholders for them
+    specs = {}
+    offset = 0
+    for buffer in buffers:
+        specs[id(buffer)] = dict(
+            dtype=buffer.dtype.str, offset=offset, shape=list(buffer.shape)
+        )
+        offset += -(-buffer.nbytes // BINARY_ALIGN) * BINARY_ALIGN
+
+    def default(ob):
+        try:
+            return {BINARY_KEY: specs[id(ob)]}
+        except KeyError:
+            # Numpy scalars and the like
+            return serialize_object(ob)
+
+    header = json.dumps(serialized, default=default).encode()
+    parts = [struct.pack("<I", len(header)), header]
+    padding = -(len(header) + 4) % BINARY_ALIGN
+    parts.append(b"\0" * padding)
+    for buffer in buffers:
+        # memoryview so the data is only copied once, into the frame
+        parts.append(buffer.reshape(-1).data.cast("B"))
+        parts.append(b"\0" * (-buffer.nbytes % BINARY_ALIGN))
+    return b"".join(parts)
+
+
+def decode_binary(frame: bytes, dict_cls=FrozenOrderedDict) -> Any:
+    """Deserialize a binary frame made by encode_binary. The numpy arrays it
+    contains are read-only views of frame"""
+    (header_length,) = struct.unpack_from("<I", frame)
+    start = 4 + header_length
+    start += -start % BINARY_ALIGN
+
+    def object_pairs_hook(pairs):
+        if len(pairs) == 1 and pairs[0][0] == BINARY_KEY:
+            spec = pairs[0][1]
+            shape = tuple(spec["shape"])
+            return np.frombuffer(
+                frame,
+                dtype=spec["dtype"],
+                count=int(np.prod(shape)),
+                offset=start + spec["offset"],
+            ).reshape(shape)
+        return dict_cls(pairs)
+
+    return json.loads(frame[4 : 4 + header_length], object_pairs_hook=object_pairs_hook)
+
 
 class IOLoopHelper:
     _loop: Optional[IOLoop] = None
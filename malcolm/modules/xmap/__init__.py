@@ -1 +1,8 @@
-from . import parts
+from typing import TYPE_CHECKING
+
+from malcolm.core import lazy_import
+
+if TYPE_CHECKING:
+    from . import parts
+
+__getattr__ = lazy_import(__name__, ["parts"])
@@ -86,6 +86,43 @@ def check_yaml_names(globals_d: (Dict[str, Any])) -> List[str]:
     return all_list
 
 
+def lazy_creators(
+    globals_d: Dict[str, Any],
+    make_creator: Callable[[str, str], Callable[..., Any]],
+    *filenames: str,
+) -> Tuple[Callable[[str], Callable[..., Any]], List[str]]:
+    """Make a module __getattr__ that only parses the YAML file of a creator
+    when it is first accessed
+
+    Args:
+        globals_d: The globals() of the blocks or includes package
+        make_creator: make_block_creator or make_include_creator
+        filenames: The YAML filenames in the same dir as the package, each
+            of which makes a creator with the same name as its base
+
+    Returns:
+        tuple: (__getattr__, __all__) for the package
+    """
+    yamlnames = OrderedDict()
+    for filename in filenames:
+        assert filename.endswith(".yaml"), f"Expected <yamlname>.yaml, got {filename!r}"
+        yamlnames[filename[:-5]] = filename
+
+    def __getattr__(name: str) -> Callable[..., Any]:
+        try:
+            filename = yamlnames[name]
+        except KeyError:
+            raise AttributeError(
+                f"module {globals_d['__name__']!r} has no attribute {name!r}"
+            )
+        creator = make_creator(globals_d["__file__"], filename)
+        # Store it so we aren't called again for this name
+        globals_d[name] = creator
+        return creator
+
+    return __getattr__, list(yamlnames)
+
+
 def make_include_creator(
     yaml_path: str, filename: str = None
 ) -> Callable[..., Tuple[List[Controller], List[Part]]]:
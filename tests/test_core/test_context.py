@@ -61,6 +61,17 @@ class TestContext(unittest.TestCase):
         self.assert_handle_request_called_with(Post(1, ["block", "method"], dict(b=32)))
         assert result == dict(a=2)
 
+    def test_record_reads(self):
+        reads, posts = [], []
+        self.o.record_reads(reads, posts)
+        data = dict(value=3, meta="meta")
+        self.o.make_view(self.controller, data, "meta")
+        self.o.make_view(self.controller, data, "value")
+        assert reads == [(data, "value", 3)]
+        self.o._q.put(Return(1, dict(a=2)))
+        self.o.post(["block", "method"], dict(b=32))
+        assert posts == [(["block", "method"], dict(b=32))]
+
     def test_post_failure(self):
         self.o._q.put(Error(1, ValueError("Test Exception")))
         with self.assertRaises(ValueError) as cm:
@@ -82,6 +82,22 @@ class TestController(unittest.TestCase):
         assert list_view[0] == "return"
         assert b.meta.tags == [f"version:pymalcolm:{__version__}"]
 
+    def test_get_reuses_unchanged_frozen_objects(self):
+        q = Queue()
+        request = Get(id=44, path=["mri"])
+        request.set_callback(q.put)
+        self.o.handle_request(request)
+        first = q.get(timeout=0.1).value
+        self.part.my_attribute.set_value("hello_block2")
+        self.o.handle_request(request)
+        second = q.get(timeout=0.1).value
+        assert first["myAttribute"]["value"] == "hello_block"
+        assert second["myAttribute"]["value"] == "hello_block2"
+        # Only the changed path was frozen again
+        assert first["myAttribute"] is not second["myAttribute"]
+        assert first["myAttribute"]["meta"] is second["myAttribute"]["meta"]
+        assert first["method"] is second["method"]
+
     def test_handle_request(self):
         q = Queue()
 
@@ -1,14 +1,29 @@
+import time
 import unittest
 from threading import RLock
+from typing import Union
 
-from annotypes import serialize_object
-from mock import Mock
+from annotypes import Anno, Array, json_encode, serialize_object
+from mock import Mock, patch
 
 # module imports
 from malcolm.compat import OrderedDict
-from malcolm.core.notifier import Notifier
+from malcolm.core.concurrency import sleep
+from malcolm.core.notifier import FrozenCache, Notifier, squash_changes
 from malcolm.core.request import Return, Subscribe, Unsubscribe
 from malcolm.core.response import Delta, Update
+from malcolm.core.table import Table
+
+with Anno("Numbers"):
+    ANumbers = Union[Array[int]]
+with Anno("Strings"):
+    AStrings = Union[Array[str]]
+
+
+class MyTable(Table):
+    def __init__(self, a: ANumbers, b: AStrings) -> None:
+        self.a = a
+        self.b = b
 
 
 class Dummy(object):
@@ -125,6 +140,26 @@ class TestNotifier(unittest.TestCase):
             r2.callback, Delta(changes=[[["attr"], dict(value=22)]])
         )
 
+    def test_table_change_only_notifies_changed_columns(self):
+        t1 = MyTable(a=[1, 2], b=["x", "y"])
+        self.block["attr"] = Dummy()
+        self.block.attr["value"] = t1
+        ra = Subscribe(path=["b", "attr", "value", "a"], delta=False)
+        ra.set_callback(Mock())
+        rb = Subscribe(path=["b", "attr", "value", "b"], delta=False)
+        rb.set_callback(Mock())
+        self.handle_subscribe(ra)
+        self.handle_subscribe(rb)
+        ra.callback.reset_mock()
+        rb.callback.reset_mock()
+        # Change just column b
+        t2 = MyTable(a=t1.a, b=["x", "z"])
+        with self.o.changes_squashed:
+            self.block.attr["value"] = t2
+            self.o.add_squashed_change(["b", "attr", "value"], t2)
+        ra.callback.assert_not_called()
+        self.assert_called_with(rb.callback, Update(value=["x", "z"]))
+
     def test_update_squashing(self):
         # set some data
         self.block["attr"] = Dummy()
@@ -160,3 +195,181 @@ class TestNotifier(unittest.TestCase):
         expected["attr"]["value"] = 33
         expected["attr2"]["value"] = "tr"
         self.assert_called_with(r2.callback, Update(value=expected))
+
+    def test_overwritten_changes_squashed(self):
+        self.block["attr"] = Dummy()
+        self.block.attr["value"] = 32
+        r1 = Subscribe(path=["b"], delta=True)
+        r1.set_callback(Mock())
+        self.handle_subscribe(r1)
+        r1.callback.reset_mock()
+        with self.o.changes_squashed:
+            for i in range(5):
+                self.block.attr["value"] = i
+                self.o.add_squashed_change(["b", "attr", "value"], i)
+        self.assert_called_with(r1.callback, Delta(changes=[[["attr", "value"], 4]]))
+        r1.callback.reset_mock()
+        # A change to a parent overwrites changes to its children
+        with self.o.changes_squashed:
+            self.block.attr["value"] = 5
+            self.o.add_squashed_change(["b", "attr", "value"], 5)
+            self.o.add_squashed_change(["b", "attr"], self.block.attr)
+        self.assert_called_with(r1.callback, Delta(changes=[[["attr"], dict(value=5)]]))
+
+    def set_values(self, *values):
+        for value in values:
+            with self.o.changes_squashed:
+                self.block.attr["value"] = value
+                self.o.add_squashed_change(["b", "attr", "value"], value)
+
+    def test_throttled_update(self):
+        self.block["attr"] = Dummy()
+        self.block.attr["value"] = 32
+        r1 = Subscribe(path=["b", "attr", "value"], minPeriod=0.1)
+        r1.set_callback(Mock())
+        self.handle_subscribe(r1)
+        self.assert_called_with(r1.callback, Update(value=32))
+        r1.callback.reset_mock()
+        self.set_values(1, 2, 3)
+        r1.callback.assert_not_called()
+        sleep(0.15)
+        self.assert_called_with(r1.callback, Update(value=3))
+        r1.callback.reset_mock()
+        # After a quiet period the first update goes straight out
+        sleep(0.15)
+        self.set_values(4)
+        self.assert_called_with(r1.callback, Update(value=4))
+
+    def test_throttled_delta(self):
+        self.block["attr"] = Dummy()
+        self.block.attr["value"] = 32
+        self.block["attr2"] = Dummy()
+        self.block.attr2["value"] = "st"
+        r1 = Subscribe(path=["b"], delta=True, minPeriod=0.1)
+        r1.set_callback(Mock())
+        self.handle_subscribe(r1)
+        r1.callback.reset_mock()
+        self.set_values(1, 2)
+        with self.o.changes_squashed:
+            self.block.attr2["value"] = "tr"
+            self.o.add_squashed_change(["b", "attr2", "value"], "tr")
+        self.set_values(3)
+        r1.callback.assert_not_called()
+        sleep(0.15)
+        self.assert_called_with(
+            r1.callback,
+            Delta(changes=[[["attr2", "value"], "tr"], [["attr", "value"], 3]]),
+        )
+
+    def test_unsubscribe_drops_throttled(self):
+        self.block["attr"] = Dummy()
+        self.block.attr["value"] = 32
+        r1 = Subscribe(path=["b", "attr", "value"], minPeriod=0.1)
+        r1.set_callback(Mock())
+        self.handle_subscribe(r1)
+        r1.callback.reset_mock()
+        self.set_values(1)
+        unsub = Unsubscribe()
+        unsub.set_callback(r1.callback)
+        self.handle_unsubscribe(unsub)
+        self.assert_called_with(r1.callback, Return(value=None))
+        r1.callback.reset_mock()
+        sleep(0.15)
+        r1.callback.assert_not_called()
+        assert not self.o._throttles
+
+
+class TestFrozenCache(unittest.TestCase):
+    def setUp(self):
+        self.o = FrozenCache()
+        self.data = OrderedDict(a=OrderedDict(value=1), b=OrderedDict(value=2))
+
+    def test_reuses_frozen(self):
+        first = self.o.freeze(self.data)
+        assert first == dict(a=dict(value=1), b=dict(value=2))
+        assert self.o.freeze(self.data) is first
+
+    def test_invalidate_only_changed_path(self):
+        first = self.o.freeze(self.data)
+        self.data["a"]["value"] = 3
+        self.o.invalidate(["a", "value"])
+        second = self.o.freeze(self.data)
+        assert second == dict(a=dict(value=3), b=dict(value=2))
+        assert second is not first
+        assert second["a"] is not first["a"]
+        assert second["b"] is first["b"]
+
+    def test_invalidate_root(self):
+        first = self.o.freeze(self.data)
+        self.o.invalidate([])
+        assert not self.o.children
+        second = self.o.freeze(self.data)
+        assert second == first
+        assert second["b"] is not first["b"]
+
+
+class TestSquashChanges(unittest.TestCase):
+    def test_empty(self):
+        assert squash_changes([]) == []
+
+    def test_same_path_keeps_last(self):
+        changes = [[["a", "value"], 1], [["b"], 2], [["a", "value"], 3]]
+        assert squash_changes(changes) == [[["b"], 2], [["a", "value"], 3]]
+
+    def test_parent_overwrites_child(self):
+        changes = [[["a", "value"], 1], [["a", "alarm"], 2], [["a"], 3]]
+        assert squash_changes(changes) == [[["a"], 3]]
+
+    def test_child_after_parent_kept(self):
+        changes = [[["a"], 1], [["a", "value"], 2]]
+        assert squash_changes(changes) == changes
+
+    def test_delete_overwrites(self):
+        changes = [[["a", "value"], 1], [["a"]], [["b"], 2]]
+        assert squash_changes(changes) == [[["a"]], [["b"], 2]]
+
+    def test_root_overwrites_everything(self):
+        changes = [[["a"], 1], [["b", "value"], 2], [[], 3]]
+        assert squash_changes(changes) == [[[], 3]]
+
+
+class TestNotifierBenchmark(unittest.TestCase):
+    """Fan-out of a fast scan updating completedSteps to many subscribers"""
+
+    subscribers = 300
+    updates = 20
+
+    def run_scan(self, squash):
+        block = Dummy()
+        block["completedSteps"] = Dummy()
+        block.completedSteps["value"] = 0
+        o = Notifier("Notifier", RLock(), block)
+        responses = []
+        for _ in range(self.subscribers):
+            request = Subscribe(path=["b"], delta=True)
+            request.set_callback(responses.append)
+            for cb, response in o.handle_subscribe(request):
+                cb(response)
+        del responses[:]
+        with patch(
+            "malcolm.core.notifier.squash_changes", squash_changes if squash else list
+        ):
+            start = time.time()
+            with o.changes_squashed:
+                for i in range(self.updates):
+                    block.completedSteps["value"] = i
+                    o.add_squashed_change(["b", "completedSteps", "value"], i)
+            elapsed = time.time() - start
+        nbytes = sum(len(json_encode(r)) for r in responses)
+        return len(responses), nbytes, elapsed
+
+    def test_squashing_reduces_delta_bytes(self):
+        n_raw, bytes_raw, t_raw = self.run_scan(squash=False)
+        n_squashed, bytes_squashed, t_squashed = self.run_scan(squash=True)
+        print(
+            f"{self.subscribers} subscribers, {self.updates} updates: "
+            f"unsquashed {bytes_raw} bytes in {t_raw:.4f}s, "
+            f"squashed {bytes_squashed} bytes in {t_squashed:.4f}s"
+        )
+        assert n_raw == n_squashed == self.subscribers
+        assert bytes_squashed * 4 < bytes_raw
@@ -1,8 +1,9 @@
+import time
 import unittest
 
 from mock import MagicMock
 
-from malcolm.core import Process, ProcessStartHook
+from malcolm.core import Get, Part, Process, ProcessStartHook, Queue, sleep
 from malcolm.core.controller import Controller
 from malcolm.testutil import PublishController, UnpublishableController
 
@@ -43,3 +44,100 @@ class TestProcess(unittest.TestCase):
         assert c.published == ["mri", "mri2"]
         self.o.add_controller(UnpublishableController("mri3"))
         assert c.published == ["mri", "mri2"]
+
+    def test_publish_children_once(self):
+        c = PublishController("mri")
+        self.o.add_controller(c)
+        parent = Controller(mri="parent")
+        child_part = Part("child")
+        child_part.mri = "child"
+        parent.add_part(child_part)
+        self.o.add_controllers([Controller(mri="child"), parent])
+        # Child is published after its parent, and nothing twice
+        assert c.published == ["mri", "parent", "child"]
+        self.o.add_controller(Controller(mri="mri2"))
+        assert c.published == ["mri", "parent", "child", "mri2"]
+
+    def test_startup_times(self):
+        class SlowController(Controller):
+            def on_hook(self, hook):
+                if isinstance(hook, ProcessStartHook):
+                    hook(self.on_start)
+
+            def on_start(self):
+                sleep(0.05)
+
+        self.o.add_controllers([SlowController("slow"), Controller("fast")])
+        assert list(self.o.startup_times) == ["slow", "fast"]
+        assert self.o.startup_times["slow"]["start"] >= 0.05
+        assert self.o.startup_times["slow"]["setup"] < 0.05
+        # Doesn't hook ProcessStartHook, so only has a setup time
+        assert list(self.o.startup_times["fast"]) == ["setup"]
+
+    def test_spawned_discarded_when_done(self):
+        s = self.o.spawn(lambda: None)
+        assert s in self.o._spawned
+        s.wait(1)
+        assert s not in self.o._spawned
+
+
+class TestProcessPool(TestProcess):
+    def setUp(self):
+        self.o = Process("proc", pool_size=4)
+        self.o.start()
+
+    def test_requests_are_spawned(self):
+        # Even Gets are handled in a worker, so the caller's locks can't nest
+        # with the controller's
+        self.o.add_controller(Controller(mri="mri"))
+        q = Queue()
+        request = Get(id=1, path=["mri", "meta"])
+        request.set_callback(q.put)
+        s = self.o.get_controller("mri").handle_request(request)
+        assert s.ready() is False
+        assert q.get(timeout=1).id == 1
+
+    def test_stop_waits_for_busy_workers(self):
+        process = Process("proc2", pool_size=4)
+        process.start()
+        q = Queue()
+        s = process.spawn(q.get, 1)
+        # Take it out of the process' tracking, so only the pool waits for it
+        process._spawned.discard(s)
+        process.spawn(q.put, 2)
+        process.stop(timeout=1)
+        assert s.ready() is True
+        assert s.get() == 2
+
+
+class TestRequestThroughput(unittest.TestCase):
+    """Compare handling lots of Gets in spawn and pooled mode"""
+
+    requests = 2000
+
+    def handle_gets(self, pool_size):
+        process = Process("proc", pool_size=pool_size)
+        process.add_controller(Controller(mri="mri"))
+        process.start()
+        controller = process.get_controller("mri")
+        q = Queue()
+        start = time.time()
+        for i in range(self.requests):
+            request = Get(id=i, path=["mri", "meta"])
+            request.set_callback(q.put)
+            controller.handle_request(request)
+        responses = [q.get(timeout=5) for _ in range(self.requests)]
+        elapsed = time.time() - start
+        process.stop(timeout=1)
+        assert [r.id for r in sorted(responses, key=lambda r: r.id)] == list(
+            range(self.requests)
+        )
+        return elapsed
+
+    def test_throughput(self):
+        spawn_time = self.handle_gets(pool_size=0)
+        pool_time = self.handle_gets(pool_size=4)
+        print(
+            f"{self.requests} Gets: spawn {self.requests / spawn_time:.0f}/s, "
+            f"pooled {self.requests / pool_time:.0f}/s"
+        )
@@ -1,7 +1,7 @@
 import os
 import unittest
 
-from annotypes import json_decode
+from annotypes import deserialize_object, json_decode
 from mock import ANY, MagicMock
 
 from malcolm.compat import OrderedDict
@@ -142,6 +142,14 @@ class TestSubscribe(unittest.TestCase):
     def test_doc(self):
         assert get_doc_json("subscribe_xspress3") == self.o.to_dict()
 
+    def test_min_period(self):
+        o = Subscribe(11, self.path, self.delta, minPeriod=0.1)
+        d = o.to_dict()
+        assert d["minPeriod"] == 0.1
+        assert deserialize_object(d).minPeriod == 0.1
+        assert "minPeriod" not in self.o.to_dict()
+        assert deserialize_object(self.o.to_dict()).minPeriod == 0.0
+
 
 class TestUnsubscribe(unittest.TestCase):
     def setUp(self):
@@ -1,6 +1,9 @@
 import unittest
 
-from malcolm.core import Queue, Spawned
+from mock import patch
+
+from malcolm.core import Queue, Spawned, sleep
+from malcolm.core.concurrency import SpawnPool
 from malcolm.core.errors import UnexpectedError
 
 
@@ -36,3 +39,43 @@ class TestSpawned(unittest.TestCase):
         assert self.q.get(1) == UnexpectedError
         with self.assertRaises(UnexpectedError):
             s.get()
+
+
+class TestSpawnPool(unittest.TestCase):
+    def setUp(self):
+        self.pool = SpawnPool(2)
+
+    def tearDown(self):
+        self.pool.close()
+
+    def test_reuses_workers(self):
+        s = Spawned(do_div, (40, 2, Queue()), {}, self.pool)
+        assert s.get(1) == 20
+        # The worker is now idle, so the next one shouldn't make a new one
+        with patch("cothread.Spawn") as mock_spawn:
+            s = Spawned(do_div, (40, 4, Queue()), {}, self.pool)
+            assert s.get(1) == 10
+        mock_spawn.assert_not_called()
+
+    def test_keeps_size_idle(self):
+        spawned = [Spawned(do_div, (40, 2, Queue()), {}, self.pool) for _ in range(5)]
+        for s in spawned:
+            s.wait(1)
+        sleep(0)
+        assert self.pool._idle == 2
+
+    def test_blocking_functions_dont_deadlock(self):
+        q = Queue()
+        waiters = [Spawned(q.get, (1,), {}, self.pool) for _ in range(3)]
+        putters = [Spawned(q.put, (i,), {}, self.pool) for i in range(3)]
+        for s in putters:
+            s.wait(1)
+        assert sorted(s.get(1) for s in waiters) == [0, 1, 2]
+
+    def test_close_waits_for_busy_workers(self):
+        q = Queue()
+        s = Spawned(q.get, (1,), {}, self.pool)
+        Spawned(q.put, (3,), {}, self.pool)
+        self.pool.close(timeout=1)
+        assert s.get(0) == 3
+        assert not self.pool._busy
@@ -51,3 +51,35 @@ class TestTable(unittest.TestCase):
     def test_not_equal(self):
         t2 = MyTable(AA(["x", "y", "z"]), AB(numpy.arange(3)))
         assert self.t != t2
+
+    def test_from_rows_makes_numpy_columns(self):
+        x = MyTable.from_rows([["x", 1], ["y", 2], ["z", 3]])
+        assert x.a.seq == ["x", "y", "z"]
+        assert x.b.seq.dtype == numpy.int64
+        assert self.t == x
+
+    def test_from_structured_array(self):
+        rows = numpy.array(
+            [("x", 1), ("y", 2), ("z", 3)], dtype=[("a", "U1"), ("b", numpy.int32)]
+        )
+        x = MyTable.from_rows(rows)
+        assert x.to_dict() == self.serialized
+        assert x.b.seq.dtype == numpy.int64
+        assert x.b.seq.flags.c_contiguous
+
+    def test_rows_gives_python_scalars(self):
+        t = MyTable(AA(["x", "y", "z"]), AB(numpy.arange(3) + 1))
+        rows = list(t.rows())
+        assert rows == [["x", 1], ["y", 2], ["z", 3]]
+        assert type(rows[0][1]) is int
+
+    def test_not_equal_lengths(self):
+        t2 = MyTable(AA(["x", "y"]), AB(numpy.arange(2)))
+        assert self.t != t2
+
+    def test_changed_columns(self):
+        t2 = MyTable(self.t.a, AB(numpy.array([1, 2, 4])))
+        assert t2.changed_columns(self.t) == ["b"]
+        assert self.t.changed_columns(self.t) == []
+        t3 = MyTable(AA(["x", "y", "w"]), self.t.b)
+        assert t3.changed_columns(t2) == ["a", "b"]
@@ -1,3 +1,4 @@
+import time
 import unittest
 
 from annotypes import Anno, add_call_types
@@ -6,11 +7,13 @@ from mock import Mock
 from malcolm.core import (
     Attribute,
     BlockModel,
+    Context,
     Controller,
     MethodModel,
     Part,
     Process,
     StringMeta,
+    views,
 )
 from malcolm.core.models import BlockMeta
 from malcolm.core.views import make_view
@@ -75,6 +78,24 @@ class TestBlock(unittest.TestCase):
         self.o.method_async(a=3)
         self.o.method.post_async.assert_called_once_with(a=3)
 
+    def test_view_class_cached(self):
+        # A different block with the same endpoints shares the class
+        data = BlockModel()
+        data.set_endpoint_data("attr", StringMeta().create_attribute_model())
+        data.set_endpoint_data("method", MethodModel())
+        o2 = make_view(self.controller, self.context, data)
+        assert o2.__class__ is self.o.__class__
+        # Adding an endpoint makes a new class with a property for it
+        data.set_endpoint_data("attr2", StringMeta().create_attribute_model())
+        o3 = make_view(self.controller, self.context, data)
+        assert o3.__class__ is not self.o.__class__
+        assert hasattr(o3, "attr2")
+        assert not hasattr(self.o.__class__, "attr2")
+        # And removing it again gets back the original class
+        data.remove_endpoint("attr2")
+        o4 = make_view(self.controller, self.context, data)
+        assert o4.__class__ is self.o.__class__
+
 
 with Anno("A Param"):
     AParam = str
@@ -113,6 +134,46 @@ class TestMethod(unittest.TestCase):
         assert f.result() == "testAsyncy"
 
 
+class ManyAttributesPart(Part):
+    def setup(self, registrar):
+        for i in range(50):
+            registrar.add_attribute_model(
+                f"attr{i}", StringMeta().create_attribute_model()
+            )
+
+
+class TestBlockViewBenchmark(unittest.TestCase):
+    def setUp(self):
+        self.process = Process("proc")
+        self.controller = Controller("mri")
+        self.controller.add_part(ManyAttributesPart("part"))
+        self.controller.add_part(MyPart("test_part"))
+        self.process.add_controller(self.controller)
+        self.process.start()
+        self.context = Context(self.process)
+
+    def tearDown(self):
+        self.process.stop(timeout=1)
+
+    def time_views(self, clear_cache):
+        start = time.time()
+        for _ in range(1000):
+            if clear_cache:
+                views._view_subclasses.clear()
+            block = self.context.block_view("mri")
+            block.attr10.value
+        return time.time() - start
+
+    def test_block_view_benchmark(self):
+        uncached = self.time_views(clear_cache=True)
+        cached = self.time_views(clear_cache=False)
+        print(
+            f"1000 block_view and attribute gets: cached {cached:.3f}s, "
+            f"uncached {uncached:.3f}s"
+        )
+        assert cached < uncached
+
+
 class TestView(unittest.TestCase):
     def setUp(self):
         self.data = BlockMeta()
@@ -1,3 +1,5 @@
+import time
+
 import numpy as np
 from mock import MagicMock, call
 from scanpointgenerator import CompoundGenerator, LineGenerator
@@ -5,6 +7,7 @@ from scanpointgenerator import CompoundGenerator, LineGenerator
 from malcolm.core import Context, Future, Process
 from malcolm.modules.ADCore.blocks import position_labeller_block
 from malcolm.modules.ADCore.parts import PositionLabellerPart
+from malcolm.modules.ADCore.parts.positionlabellerpart import POSITIONS_PER_XML
 from malcolm.modules.ADCore.util import FRAME_TIMEOUT
 from malcolm.testutil import ChildTestCase
 
@@ -169,3 +172,72 @@ class TestPositionLabellerPart(ChildTestCase):
 
         assert len(self.context._subscriptions) == 0
         assert self.o.done_when_reaches == 150
+
+    @staticmethod
+    def make_xml_per_point(generator, start_index, end_index):
+        # How the xml used to be made, one point and one string at a time
+        xml = '<?xml version="1.0" ?><pos_layout><dimensions>'
+        for i in range(len(generator.dimensions)):
+            xml += '<dimension name="d%d" />' % i
+        xml += "</dimensions><positions>"
+        for i in range(start_index, end_index):
+            point = generator.get_point(i)
+            xml += "<position"
+            for j, value in enumerate(point.indexes):
+                xml += ' d%d="%s"' % (j, value)
+            xml += " />"
+        xml += "</positions></pos_layout>"
+        return xml
+
+    def test_make_xml_matches_per_point(self):
+        zs = LineGenerator("z", "mm", 0.0, 1.0, 4)
+        ys = LineGenerator("y", "mm", 0.0, 0.1, 30, alternate=True)
+        xs = LineGenerator("x", "mm", 0.0, 0.5, 70, alternate=True)
+        for generators in ([xs], [ys, xs], [zs, ys, xs]):
+            self.o.generator = CompoundGenerator(generators, [], [])
+            self.o.generator.prepare()
+            size = self.o.generator.size
+            for start in (0, 37, size - 3):
+                xml, end_index = self.o._make_xml(start)
+                assert end_index == min(start + POSITIONS_PER_XML, size)
+                assert xml == self.make_xml_per_point(
+                    self.o.generator, start, end_index
+                )
+
+    def test_load_more_positions_prepares_next(self):
+        child = MagicMock()
+        xs = LineGenerator("x", "mm", 0.0, 0.5, 200)
+        ys = LineGenerator("y", "mm", 0.0, 0.1, 100)
+        self.o.generator = CompoundGenerator([ys, xs], [], [])
+        self.o.generator.prepare()
+        self.o.end_index = POSITIONS_PER_XML
+        self.o.load_more_positions(0, child)
+        assert self.o.end_index == 2 * POSITIONS_PER_XML
+        # The next lot is made ready after this lot is put
+        assert self.o.next_xml == self.o._make_xml(2 * POSITIONS_PER_XML)
+        self.o.load_more_positions(0, child)
+        assert self.o.end_index == 3 * POSITIONS_PER_XML
+        assert child.xml.put_value.call_args_list == [
+            call(self.o._make_xml(POSITIONS_PER_XML)[0]),
+            call(self.o._make_xml(2 * POSITIONS_PER_XML)[0]),
+        ]
+
+    def test_make_xml_benchmark(self):
+        zs = LineGenerator("z", "mm", 0.0, 1.0, 100)
+        ys = LineGenerator("y", "mm", 0.0, 0.1, 1000, alternate=True)
+        xs = LineGenerator("x", "mm", 0.0, 0.5, 1000, alternate=True)
+        self.o.generator = CompoundGenerator([zs, ys, xs], [], [])
+        self.o.generator.prepare()
+        start_index = 12345678
+        start = time.time()
+        xml, end_index = self.o._make_xml(start_index)
+        arrays = time.time() - start
+        start = time.time()
+        expected = self.make_xml_per_point(self.o.generator, start_index, end_index)
+        per_point = time.time() - start
+        print(
+            f"{POSITIONS_PER_XML} positions of a 100x1000x1000 scan: "
+            f"arrays {arrays:.3f}s, per point {per_point:.3f}s"
+        )
+        assert xml == expected
+        assert arrays < per_point
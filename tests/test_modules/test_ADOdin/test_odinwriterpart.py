@@ -6,7 +6,7 @@ from tempfile import mkdtemp
 
 import h5py
 import numpy as np
-from mock import MagicMock, call
+from mock import MagicMock, call, patch
 from scanpointgenerator import CompoundGenerator, LineGenerator, SquashingExcluder
 
 from malcolm.core import BadValueError, Context, Process
@@ -77,6 +77,38 @@ class TestOdinWriterPart(ChildTestCase):
         )
         rmtree(tmp_dir)
 
+    def test_configure_benchmark(self):
+        tmp_dir = mkdtemp() + os.path.sep
+        cols, rows = 10000, 10000
+        xs = LineGenerator("x", "mm", 0.0, 0.5, cols)
+        ys = LineGenerator("y", "mm", 0.0, 0.1, rows)
+        generator = CompoundGenerator([ys, xs], [], [], 0.1)
+        generator.prepare()
+
+        start_time = datetime.now()
+        with patch("h5py.File", side_effect=h5py.File) as mock_file:
+            self.o.on_configure(
+                self.context,
+                0,
+                cols * rows,
+                generator=generator,
+                fileDir=tmp_dir,
+                formatName="odin2",
+            )
+        print(
+            "OdinWriter configure {} points took {} secs".format(
+                cols * rows, datetime.now() - start_time
+            )
+        )
+        # All the datasets are made in a single pass over the VDS file
+        assert mock_file.call_count == 1
+        with h5py.File(os.path.join(tmp_dir, "odin2.h5"), "r") as vds:
+            assert vds["/entry/detector/data"].shape == (rows, cols, 1536, 1048)
+            assert vds["/entry/detector_uid/uid"].shape == (rows, cols, 1, 1)
+            assert vds["/entry/detector_sum/sum"].shape == (rows, cols, 1, 1)
+            assert vds["/entry/detector/x_set"].shape == (cols,)
+        rmtree(tmp_dir)
+
     def test_run(self):
         tmp_dir = mkdtemp() + os.path.sep
         self.o.on_configure(
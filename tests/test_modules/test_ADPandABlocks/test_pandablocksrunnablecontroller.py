@@ -47,6 +47,8 @@ class PandABlocksRunnableControllerTest(unittest.TestCase):
         fields["VAL"] = FieldData("pos_out", "", "Output", ["No", "Capture"])
         blocks_data["INENC"] = BlockData(4, "", fields)
         self.client.get_blocks_data.return_value = blocks_data
+        self.client.get_idn.return_value = "PandA SW: 3.0 FPGA: 0.1.9"
+        self.client.get_tables_fields.return_value = {}
         self.process.add_controller(self.o)
         self.process.start()
 
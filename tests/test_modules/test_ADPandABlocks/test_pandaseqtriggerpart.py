@@ -23,6 +23,7 @@ from malcolm.modules.ADPandABlocks.doublebuffer import (
     MAX_REPEATS,
     MIN_PULSE,
     MIN_TABLE_DURATION,
+    SEQ_TABLE_ROWS,
     SEQ_TABLE_SWITCH_DELAY,
     TICK,
     DoubleBuffer,
@@ -676,6 +677,32 @@ class TestPandaSeqTriggerPart(ChildTestCase):
         elapsed = datetime.now() - start
         assert elapsed.total_seconds() < 3.0
 
+    def test_configure_many_short_rows(self):
+        # Skip on GitHub Actions and GitLab CI
+        if "CI" in os.environ:
+            pytest.skip("performance test only")
+
+        x_steps, y_steps = 10, 100000
+        xs = LineGenerator("x", "mm", 0.0, 0.3, x_steps, alternate=True)
+        ys = LineGenerator("y", "mm", 0.0, 0.1, y_steps)
+        generator = CompoundGenerator([ys, xs], [], [], 0.0005)
+        self.set_motor_attributes()
+        self.set_attributes(self.child, rowTrigger="Motion Controller")
+        self.set_attributes(self.child_seq1, bita="TTLIN1.VAL")
+        self.set_attributes(self.child_seq2, bita="TTLIN1.VAL")
+        axes_to_move = ["x", "y"]
+
+        start = datetime.now()
+        seq_rows = self.get_sequencer_rows(generator, axes_to_move)
+        tables = list(DoubleBuffer._get_tables(iter([seq_rows])))
+        elapsed = datetime.now() - start
+        # Trigger and immediate rows for each scan row, blind rows between them, and
+        # the dead frame and continuous loop at the end
+        assert len(seq_rows) == 2 * y_steps + (y_steps - 1) + 2
+        assert sum(len(t.repeats) for t in tables) >= len(seq_rows)
+        assert all(len(t.repeats) <= SEQ_TABLE_ROWS for t in tables)
+        assert elapsed.total_seconds() < 3.0
+
     def test_on_report_status_doing_pcomp(self):
         mock_context = MagicMock(name="context_mock")
         mock_child = MagicMock(name="child_mock")
@@ -939,6 +966,64 @@ class TestSequencerRows(ChildTestCase):
             == [0, 0, 0, 0, 0, 0, 0]
         )
 
+    def test_add_seq_entries(self):
+        seq_rows = SequencerRows()
+        seq_rows.add_seq_entries(
+            [2, MAX_REPEATS + 3, 1],
+            trigger=[Trigger.BITA_1, Trigger.IMMEDIATE, Trigger.POSA_GT],
+            position=[0, 0, -100],
+            half_duration=[1000, 2000, 3000],
+            live=1,
+            trim=[0, 100, 0],
+        )
+
+        expected = SequencerRows()
+        expected.add_seq_entry(2, Trigger.BITA_1, 0, 1000, 1, 0, 0)
+        expected.add_seq_entry(MAX_REPEATS + 3, Trigger.IMMEDIATE, 0, 2000, 1, 0, 100)
+        expected.add_seq_entry(1, Trigger.POSA_GT, -100, 3000, 1, 0, 0)
+        assert seq_rows.as_tuples() == expected.as_tuples()
+        assert len(seq_rows) == 4
+        total_ticks = 2 * 2000 + (MAX_REPEATS + 3) * 3900 + 6000
+        assert isclose(seq_rows.duration, total_ticks * TICK)
+
+    def test_split_does_not_change_extended_rows(self):
+        seq_rows = SequencerRows()
+        seq_rows.add_seq_entry(4, Trigger.POSB_LT, 400, 1000, 0, 1, 50)
+        other = SequencerRows()
+        other.add_seq_entry(3, Trigger.BITA_0, 300, 2000, 1, 0, 100)
+        seq_rows.extend(other)
+        before = other.as_tuples()
+
+        remainder = seq_rows.split(2)
+
+        assert other.as_tuples() == before
+        assert remainder.as_tuples() == ((2,) + before[0][1:],)
+        assert isclose(
+            seq_rows.duration, (4 * 1950 + 3900 - SEQ_TABLE_SWITCH_DELAY) * TICK
+        )
+
+    def test_split_after_extend_does_not_change_source_rows(self):
+        other = SequencerRows()
+        other.add_seq_entry(1, Trigger.BITA_0, 300, 2000, 1, 0, 100)
+        seq_rows = SequencerRows()
+        seq_rows.extend(other)
+        before = other.as_tuples()
+        duration = other.duration
+
+        remainder = seq_rows.split(10)
+
+        assert other.as_tuples() == before
+        assert other.duration == duration
+        assert len(remainder) == 0
+        assert seq_rows.as_tuples()[-1][10] == 1900 - SEQ_TABLE_SWITCH_DELAY
+
+    def test_split_rejects_time2_shorter_than_switch_delay(self):
+        seq_rows = SequencerRows()
+        seq_rows.add_seq_entry(1, Trigger.IMMEDIATE, 0, 100, 0, 0, 96)
+
+        with self.assertRaises(AssertionError):
+            seq_rows.split(10)
+
     def test_extend(self):
         seq_rows = SequencerRows()
         seq_rows.add_seq_entry()
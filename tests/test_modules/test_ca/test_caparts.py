@@ -1,3 +1,4 @@
+import time
 import unittest
 
 import numpy as np
@@ -360,6 +361,106 @@ class TestCAParts(unittest.TestCase):
             ["pv"], datatype=catools.DBR_LONG, format=catools.FORMAT_CTRL, throw=True
         )
 
+    def test_calong_put_uses_monitor_readback(self, catools):
+        from malcolm.modules.ca.parts import CALongPart
+
+        class Initial(int):
+            ok = True
+            severity = 0
+
+        class Update(int):
+            ok = True
+            severity = 0
+            raw_stamp = (34, 4355)
+            timestamp = 0.0
+
+        catools.caget.side_effect = [[Initial(3)]]
+        b = self.create_block(CALongPart(name="attrname", description="desc", pv="pv"))
+        callback = catools.camonitor.call_args[0][1]
+        catools.caget.reset_mock()
+
+        def post_monitor(pv, value, **kwargs):
+            # The IOC posts the new value while processing the put
+            update = Update(value)
+            update.timestamp = time.time()
+            callback(update)
+
+        catools.caput.side_effect = post_monitor
+        b.attrname.put_value(4)
+        catools.caget.assert_not_called()
+        assert b.attrname.value == 4
+
+        def post_stale_monitor(pv, value, **kwargs):
+            # A monitor stamped before the put arrives while it is in flight,
+            # and the put doesn't post one as the value doesn't change
+            update = Update(5)
+            update.timestamp = time.time() - 1
+            callback(update)
+
+        catools.caput.side_effect = post_stale_monitor
+        catools.caget.side_effect = [Update(4)]
+        b.attrname.put_value(4)
+        catools.caget.assert_called_once_with(
+            "pv", datatype=catools.DBR_LONG, format=catools.FORMAT_TIME, throw=True
+        )
+        assert b.attrname.value == 4
+
+    def test_parts_caget_together(self, catools):
+        from malcolm.modules.ca.parts import CALongPart, CAStringPart
+
+        class Initial(int):
+            ok = True
+            severity = 0
+
+        class InitialStr(str):
+            ok = True
+            severity = 0
+
+        catools.caget.side_effect = [
+            [Initial(1), Initial(2), Initial(3)],
+            [InitialStr("thing")],
+        ]
+        c = StatefulController("mri")
+        c.add_part(CALongPart(name="first", description="desc", pv="pv1"))
+        c.add_part(CAStringPart(name="s", description="desc", rbv="pvs"))
+        c.add_part(CALongPart(name="second", description="desc", pv="pv2", rbv="rbv2"))
+        self.process.add_controller(c)
+        b = self.process.block_view("mri")
+        assert b.first.value == 1
+        assert b.second.value == 2
+        assert b.s.value == "thing"
+        # One caget for each datatype
+        assert catools.caget.call_count == 2
+        catools.caget.assert_any_call(
+            ["pv1", "rbv2", "pv2"],
+            datatype=catools.DBR_LONG,
+            format=catools.FORMAT_CTRL,
+            throw=True,
+        )
+
+    def test_parts_caget_separately_on_error(self, catools):
+        from malcolm.modules.ca.parts import CALongPart
+
+        class Initial(int):
+            ok = True
+            severity = 0
+
+        catools.caget.side_effect = [
+            ValueError("pv2 not found"),
+            [Initial(1)],
+            ValueError("pv2 not found"),
+        ]
+        c = StatefulController("mri")
+        c.add_part(CALongPart(name="first", description="desc", pv="pv1"))
+        c.add_part(CALongPart(name="second", description="desc", pv="pv2"))
+        self.process.add_controller(c)
+        b = self.process.block_view("mri")
+        # Only the part with the bad PV failed
+        assert b.state.value == "Fault"
+        assert b.health.value == "pv2 not found"
+        assert b.first.value == 1
+        assert catools.caget.call_count == 3
+
     def test_castring(self, catools):
         from malcolm.modules.ca.parts import CAStringPart
 
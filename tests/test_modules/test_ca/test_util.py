@@ -0,0 +1,259 @@
+import time
+import unittest
+
+from mock import patch
+
+from malcolm.core import NumberMeta, Process, RLock, Spawned, sleep
+from malcolm.modules.builtin.controllers import StatefulController
+from malcolm.modules.ca.parts import CALongPart
+from malcolm.modules.ca.util import (
+    CABase,
+    UpdateWheel,
+    _update_wheels,
+    bulk_caget,
+    get_update_wheel,
+)
+
+
+class Update(float):
+    ok = True
+    severity = 0
+    raw_stamp = (None, None)
+
+
+class Value(int):
+    ok = True
+    severity = 0
+    raw_stamp = (None, None)
+
+
+class PutResult:
+    ok = True
+
+
+class PutFailed(Exception):
+    ok = False
+
+
+class Subscription:
+    def close(self):
+        pass
+
+
+class FakeIOC:
+    """Stand in for catools talking to an IOC that takes round_trip seconds to
+    answer each request, one request at a time"""
+
+    DBR_LONG = 5
+    FORMAT_CTRL = 2
+    FORMAT_TIME = 1
+
+    def __init__(self, round_trip):
+        self.round_trip = round_trip
+        self.lock = RLock()
+        self.values = {}
+        self.monitors = {}
+        self.requests = 0
+        # PVs that reject puts
+        self.bad = set()
+
+    def _request(self):
+        with self.lock:
+            self.requests += 1
+            sleep(self.round_trip)
+
+    def caget(self, pvs, **kwargs):
+        self._request()
+        if isinstance(pvs, str):
+            return Value(self.values.get(pvs, 0))
+        return [Value(self.values.get(pv, 0)) for pv in pvs]
+
+    def caput(self, pvs, values, throw=True, **kwargs):
+        self._request()
+        if isinstance(pvs, str):
+            results = [self.caput_one(pvs, values)]
+        else:
+            results = [self.caput_one(pv, value) for pv, value in zip(pvs, values)]
+        for result in results:
+            if throw and not result.ok:
+                raise result
+        if isinstance(pvs, str):
+            return results[0]
+        return results
+
+    def caput_one(self, pv, value):
+        if pv in self.bad:
+            return PutFailed(f"{pv}: put rejected")
+        # The _RBV follows the demand, and monitors are posted before the put
+        # completes
+        for name in (pv, pv + "_RBV"):
+            self.values[name] = value
+            if name in self.monitors:
+                self.monitors[name](Value(value))
+        return PutResult()
+
+    def camonitor(self, pv, callback, **kwargs):
+        self.monitors[pv] = callback
+        return Subscription()
+
+
+class TestPutBenchmark(unittest.TestCase):
+    """Put lots of attributes of a CA block at once, as configure does"""
+
+    def setUp(self):
+        self.ioc = FakeIOC(round_trip=0.002)
+        patcher = patch("malcolm.modules.ca.util.catools", self.ioc)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.process = Process("proc")
+        self.process.start()
+        self.addCleanup(self.process.stop, timeout=2)
+        c = StatefulController("mri")
+        self.params = {}
+        for i in range(50):
+            if i % 2:
+                # Half have a separate readback PV
+                part = CALongPart(
+                    name=f"a{i}", description="desc", pv=f"PV{i}", rbv_suffix="_RBV"
+                )
+            else:
+                part = CALongPart(name=f"a{i}", description="desc", pv=f"PV{i}")
+            c.add_part(part)
+            self.params[f"a{i}"] = i + 10
+        self.process.add_controller(c)
+        self.b = self.process.block_view("mri")
+
+    def put(self):
+        self.ioc.requests = 0
+        start = time.time()
+        self.b.put_attribute_values(self.params)
+        elapsed = time.time() - start
+        for k, v in self.params.items():
+            assert self.b[k].value == v
+        return elapsed
+
+    def test_put_benchmark(self):
+        # All the parts connect in one request
+        assert self.ioc.requests == 1
+        elapsed = self.put()
+        # One caput for all of them, and one caget for the separate readbacks
+        assert self.ioc.requests == 2
+        with patch.multiple(
+            "malcolm.modules.ca.util",
+            bulk_caget=self.ioc.caget,
+            bulk_caput=self.ioc.caput,
+        ):
+            for k in self.params:
+                self.params[k] += 1
+            unbatched = self.put()
+        assert self.ioc.requests == 100
+        print(f"50 puts: batched {elapsed:.3f}s, one at a time {unbatched:.3f}s")
+        assert elapsed < unbatched
+
+    def test_failed_put_only_fails_its_request(self):
+        self.ioc.bad.add("PV3")
+        self.ioc.requests = 0
+        futures = self.b.put_attribute_values_async(self.params)
+        with self.assertRaises(PutFailed):
+            self.b._context.wait_all_futures(futures)
+        # Nothing was put again one at a time
+        sleep(0.1)
+        assert self.ioc.requests == 2
+        for k, v in self.params.items():
+            if k == "a3":
+                assert self.b[k].value == 0
+            else:
+                assert self.b[k].value == v
+
+
+class TestBulkCA(unittest.TestCase):
+    @patch("malcolm.modules.ca.util.catools")
+    def test_unexpected_error_fails_every_request(self, catools):
+        # Different numbers of args can't be batched together
+        spawned = [
+            Spawned(bulk_caget, ("pv1",), {}),
+            Spawned(bulk_caget, ("pv2", "extra"), {}),
+        ]
+        for s in spawned:
+            with self.assertRaises(IndexError):
+                s.get(timeout=1)
+        catools.caget.assert_not_called()
+
+
+class TestMonitorLatency(unittest.TestCase):
+    """Stand in for a soft IOC that posts bursts of monitor updates for lots of
+    PVs, as catools would, and time how long each update takes to reach its
+    Attribute"""
+
+    def make_pvs(self, count, min_delta):
+        self.delivered = {}
+        pvs = []
+        for i in range(count):
+            pv = CABase(
+                NumberMeta("float64"),
+                None,
+                writeable=False,
+                min_delta=min_delta,
+                callback=lambda value, i=i: self.delivered.__setitem__(
+                    i, (value, time.time())
+                ),
+            )
+            pvs.append(pv)
+        return pvs
+
+    def post_bursts(self, pvs, bursts):
+        # Post every PV a value per burst, returning how long the callbacks took
+        # and when each PV was last posted to
+        posted = {}
+        start = time.time()
+        for burst in range(bursts):
+            for i, pv in enumerate(pvs):
+                posted[i] = time.time()
+                pv._monitor_callback(Update(burst))
+        return time.time() - start, posted
+
+    def test_monitor_callbacks_do_not_sleep(self):
+        pvs = self.make_pvs(1, 0.05)
+        callback_time, _ = self.post_bursts(pvs, 5)
+        # The first two updates are delivered straight away, and the rest held
+        assert callback_time < 0.05
+        assert pvs[0].attr.value == 1.0
+        sleep(0.1)
+        assert pvs[0].attr.value == 4.0
+
+    def test_zero_min_delta_delivers_every_update(self):
+        pvs = self.make_pvs(2, 0)
+        self.post_bursts(pvs, 5)
+        # Every update is delivered straight away without using a wheel
+        assert [pv.attr.value for pv in pvs] == [4.0, 4.0]
+        assert 0 not in _update_wheels
+        with self.assertRaises(AssertionError):
+            UpdateWheel(0)
+
+    def test_update_wheel_groups_ticks(self):
+        pvs = self.make_pvs(100, 0.05)
+        self.post_bursts(pvs, 3)
+        wheel = get_update_wheel(0.05)
+        # All the third updates are due in the same tick or the next one
+        assert sum(len(slot) for slot in wheel.slots.values()) == 100
+        assert len(wheel.slots) <= 2
+        sleep(0.15)
+        assert not wheel.slots
+        assert [pv.attr.value for pv in pvs] == [2.0] * 100
+
+    def test_latency_benchmark(self):
+        min_delta = 0.05
+        pvs = self.make_pvs(1000, min_delta)
+        callback_time, posted = self.post_bursts(pvs, 3)
+        sleep(3 * min_delta)
+        latencies = [self.delivered[i][1] - posted[i] for i in range(len(pvs))]
+        print(
+            f"1000 PVs: callbacks {callback_time:.3f}s, "
+            f"latency max {max(latencies):.3f}s, "
+            f"mean {sum(latencies) / len(latencies):.3f}s"
+        )
+        # The latest value of every PV was delivered
+        assert all(self.delivered[i][0] == 2.0 for i in range(len(pvs)))
+        # Sleeping in the callbacks would take at least 1000 * 2 * min_delta
+        assert callback_time < 1.0
+        assert max(latencies) < 3 * min_delta
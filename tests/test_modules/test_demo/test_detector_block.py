@@ -45,6 +45,7 @@ class TestDetectorBlock(unittest.TestCase):
             "completedSteps",
             "configuredSteps",
             "totalSteps",
+            "validateHitRate",
             "validate",
             "configure",
             "run",
@@ -1,31 +1,116 @@
+import base64
+import socket
+import socketserver
+import threading
+import time
 import unittest
-from collections import OrderedDict
+from collections import OrderedDict, deque
 
-from mock import Mock, call
+import numpy as np
+from mock import Mock, patch
 
 from malcolm.modules.pandablocks.pandablocksclient import (
     BlockData,
     FieldData,
     PandABlocksClient,
+    encode_table_base64,
 )
 
 
+class FakeSocket:
+    """A socket that only gives recv the chunks of responses to messages that
+    have been sent with sendall, like a PandA would"""
+
+    def __init__(self, chunks):
+        self.chunks = deque(chunks)
+        self.sendall = Mock(side_effect=self._sendall)
+        self.condition = threading.Condition()
+        self.closed = False
+        # How many messages have been sent, and whether we are in a table
+        self.requests = 0
+        self.sent_partial = ""
+        self.in_table = False
+        # How many responses have been received, and whether we are part way
+        # through a multiline one
+        self.responses = 0
+        self.recv_partial = ""
+        self.in_multiline = False
+
+    def connect(self, address):
+        pass
+
+    def close(self):
+        pass
+
+    def shutdown(self, how):
+        with self.condition:
+            self.closed = True
+            self.condition.notify_all()
+
+    def _sendall(self, data):
+        with self.condition:
+            lines = (self.sent_partial + data.decode("utf-8")).split("\n")
+            self.sent_partial = lines.pop()
+            for line in lines:
+                if self.in_table:
+                    # A table is ended by a blank line
+                    self.in_table = line != ""
+                else:
+                    self.requests += 1
+                    self.in_table = line.endswith("<") or line.endswith("<B")
+            self.condition.notify_all()
+
+    def _completes(self, chunk):
+        # How many responses a chunk completes, and the state after it
+        lines = (self.recv_partial + chunk).split("\n")
+        partial = lines.pop()
+        completed = 0
+        in_multiline = self.in_multiline
+        for line in lines:
+            if line.startswith("!"):
+                in_multiline = True
+            else:
+                # Either the "." ending a multiline response, or a single line
+                completed += 1
+                in_multiline = False
+        return completed, partial, in_multiline
+
+    def _can_send(self):
+        if self.closed or not self.chunks:
+            return self.closed
+        # Only send a chunk when the messages it responds to have been sent
+        completed = self._completes(self.chunks[0])[0]
+        return self.responses < self.requests >= self.responses + completed
+
+    def recv(self, size):
+        with self.condition:
+            self.condition.wait_for(self._can_send)
+            if self.closed:
+                return b""
+            chunk = self.chunks.popleft()
+            completed, self.recv_partial, self.in_multiline = self._completes(chunk)
+            self.responses += completed
+            return chunk.encode("utf-8")
+
+
 class PandABoxControlTest(unittest.TestCase):
     def setUp(self):
         self.c = PandABlocksClient("h", "p")
 
-    def start(self, messages=None):
-        self.socket = Mock()
-        if isinstance(messages, list):
-            self.socket.recv.side_effect = [item.encode("utf-8") for item in messages]
-        elif messages:
-            self.socket.recv.side_effect = [messages.encode("utf-8")]
+    def start(self, messages=()):
+        if isinstance(messages, str):
+            messages = [messages]
+        self.socket = FakeSocket(messages)
 
         def socket_cls():
             return self.socket
 
         self.c.start(socket_cls=socket_cls)
 
+    def sent(self):
+        # Messages sent at the same time are joined into one sendall
+        return b"".join(args[0] for args, _ in self.socket.sendall.call_args_list)
+
     def tearDown(self):
         if self.c.started:
             self.c.stop()
@@ -33,7 +118,7 @@ class PandABoxControlTest(unittest.TestCase):
     def test_multiline_response_good(self):
         messages = ["!TTLIN 6\n", "!OUTENC 4\n!CAL", "C 2\n.\nblah"]
         self.start(messages)
-        resp = list(self.c.send_recv(""))
+        resp = list(self.c.send_recv("*IDN?\n"))
         self.c.stop()
         expected = ["TTLIN 6", "OUTENC 4", "CALC 2"]
         assert resp == expected
@@ -41,15 +126,25 @@ class PandABoxControlTest(unittest.TestCase):
     def test_two_resp(self):
         messages = ["OK =mm\n", "OK =232\n"]
         self.start(messages)
-        assert self.c.send_recv("") == "OK =mm"
-        assert self.c.send_recv("") == "OK =232"
+        assert self.c.send_recv("*IDN?\n") == "OK =mm"
+        assert self.c.send_recv("*IDN?\n") == "OK =232"
 
     def test_bad_good(self):
         messages = ["ERR Invalid bit value\n", "OK =232\n"]
         self.start(messages)
         with self.assertRaises(ValueError):
-            self.c.send_recv("")
-        assert self.c.send_recv("") == "OK =232"
+            self.c.send_recv("*IDN?\n")
+        assert self.c.send_recv("*IDN?\n") == "OK =232"
+
+    @patch("malcolm.modules.pandablocks.pandablocksclient.log")
+    def test_response_to_nothing_dropped(self, log):
+        self.start()
+        self.c._respond("OK =unasked")
+        log.warning.assert_called_once_with(
+            "Dropping response %r as no message is waiting", "OK =unasked"
+        )
+        self.socket.chunks.append("OK =232\n")
+        assert self.c.send_recv("*IDN?\n") == "OK =232"
 
     def test_block_data(self):
         messages = [
@@ -68,19 +163,19 @@ class PandABoxControlTest(unittest.TestCase):
         self.start(messages)
         block_data = self.c.get_blocks_data()
         self.c.stop()
-        assert self.socket.sendall.call_args_list == [
-            call(b"*BLOCKS?\n"),
-            call(b"*DESC.TTLIN?\n"),
-            call(b"*DESC.TTLOUT?\n"),
-            call(b"TTLIN.*?\n"),
-            call(b"TTLOUT.*?\n"),
-            call(b"*DESC.TTLIN.TERM?\n"),
-            call(b"*DESC.TTLIN.VAL?\n"),
-            call(b"*ENUMS.TTLIN.TERM?\n"),
-            call(b"*ENUMS.TTLIN.VAL.CAPTURE?\n"),
-            call(b"*DESC.TTLOUT.VAL?\n"),
-            call(b"*ENUMS.TTLOUT.VAL?\n"),
-        ]
+        assert self.sent() == (
+            b"*BLOCKS?\n"
+            b"*DESC.TTLIN?\n"
+            b"*DESC.TTLOUT?\n"
+            b"TTLIN.*?\n"
+            b"TTLOUT.*?\n"
+            b"*DESC.TTLIN.TERM?\n"
+            b"*DESC.TTLIN.VAL?\n"
+            b"*ENUMS.TTLIN.TERM?\n"
+            b"*ENUMS.TTLIN.VAL.CAPTURE?\n"
+            b"*DESC.TTLOUT.VAL?\n"
+            b"*ENUMS.TTLOUT.VAL?\n"
+        )
         assert list(block_data) == ["TTLIN", "TTLOUT"]
         in_fields = OrderedDict()
         in_fields["TERM"] = FieldData(
@@ -118,10 +213,7 @@ class PandABoxControlTest(unittest.TestCase):
         self.start(messages)
         changes = list(self.c.get_changes(include_errors=True))
         self.c.stop()
-        assert self.socket.sendall.call_args_list == [
-            call(b"*CHANGES?\n"),
-            call(b"SEQ1.TABLE?\n"),
-        ]
+        assert self.sent() == (b"*CHANGES?\n" b"SEQ1.TABLE?\n")
         expected = OrderedDict()
         expected["PULSE0.WIDTH"] = "1.43166e+09"
         expected["PULSE1.WIDTH"] = "1.43166e+09"
@@ -134,6 +226,24 @@ class PandABoxControlTest(unittest.TestCase):
         expected["PULSE3.INP"] = Exception
         assert OrderedDict(changes) == expected
 
+    def test_changes_tables_requested_together(self):
+        messages = [
+            "!SEQ1.TABLE<\n!PULSE1.WIDTH=2\n!SEQ2.TABLE<\n.\n",
+            "!1\n.\n",
+            "!2\n!3\n.\n",
+        ]
+        self.start(messages)
+        changes = list(self.c.get_changes())
+        self.c.stop()
+        assert self.sent() == b"*CHANGES?\nSEQ1.TABLE?\nSEQ2.TABLE?\n"
+        assert changes == [
+            ("SEQ1.TABLE", None),
+            ("PULSE1.WIDTH", "2"),
+            ("SEQ2.TABLE", None),
+            ("SEQ1.TABLE", ["1"]),
+            ("SEQ2.TABLE", ["2", "3"]),
+        ]
+
     def test_get_pcap_bits_fields(self):
         messages = (
             ["!BITS1 1 ext_out bits\n!BITS0 0 ext_out bits\n.\n"]
@@ -150,35 +260,28 @@ class PandABoxControlTest(unittest.TestCase):
         }
         assert self.c.get_pcap_bits_fields() == expected
         self.c.stop()
-        assert self.socket.sendall.call_args_list == [
-            call(b"PCAP.*?\n"),
-            call(b"PCAP.BITS0.BITS?\n"),
-            call(b"PCAP.BITS1.BITS?\n"),
-        ]
+        assert self.sent() == (b"PCAP.*?\n" b"PCAP.BITS0.BITS?\n" b"PCAP.BITS1.BITS?\n")
 
     def test_get_field(self):
         messages = "OK =32\n"
         self.start(messages)
         assert self.c.get_field("PULSE0", "WIDTH") == "32"
         self.c.stop()
-        self.socket.sendall.assert_called_once_with(b"PULSE0.WIDTH?\n")
+        assert self.sent() == b"PULSE0.WIDTH?\n"
 
     def test_set_field(self):
         messages = "OK\n"
         self.start(messages)
         self.c.set_field("PULSE0", "WIDTH", 0)
         self.c.stop()
-        self.socket.sendall.assert_called_once_with(b"PULSE0.WIDTH=0\n")
+        assert self.sent() == b"PULSE0.WIDTH=0\n"
 
     def test_set_fields(self):
         messages = "OK\nOK\n"
         self.start(messages)
         self.c.set_fields({"PULSE0.WIDTH": 0, "PULSE0.DELAY": 5})
         self.c.stop()
-        assert sorted(self.socket.sendall.call_args_list) == [
-            call(b"PULSE0.DELAY=5\n"),
-            call(b"PULSE0.WIDTH=0\n"),
-        ]
+        assert self.sent() == b"PULSE0.WIDTH=0\nPULSE0.DELAY=5\n"
 
     def test_set_table(self):
         messages = "OK\n"
@@ -194,6 +297,15 @@ class PandABoxControlTest(unittest.TestCase):
 """
         )
 
+    def test_set_table_base64(self):
+        messages = "OK\n"
+        self.start(messages)
+        self.c.set_table_base64(
+            "SEQ1", "TABLE", encode_table_base64([1, 2, 0xFFFFFFFF])
+        )
+        self.c.stop()
+        assert self.sent() == b"SEQ1.TABLE<B\nAQAAAAIAAAD/////\n\n"
+
     def test_table_fields(self):
         messages = [
             """!31:0    REPEATS
@@ -215,17 +327,151 @@ class PandABoxControlTest(unittest.TestCase):
         self.start(messages)
         fields = self.c.get_table_fields("SEQ1", "TABLE")
         self.c.stop()
-        assert self.socket.sendall.call_args_list == [
-            call(b"SEQ1.TABLE.FIELDS?\n"),
-            call(b"*ENUMS.SEQ1.TABLE[].INPB?\n"),
-            call(b"*DESC.SEQ1.TABLE[].REPEATS?\n"),
-            call(b"*DESC.SEQ1.TABLE[].USE_INPA?\n"),
-            call(b"*DESC.SEQ1.TABLE[].STUFF?\n"),
-            call(b"*DESC.SEQ1.TABLE[].INPB?\n"),
-        ]
+        assert self.sent() == (
+            b"SEQ1.TABLE.FIELDS?\n"
+            b"*ENUMS.SEQ1.TABLE[].INPB?\n"
+            b"*DESC.SEQ1.TABLE[].REPEATS?\n"
+            b"*DESC.SEQ1.TABLE[].USE_INPA?\n"
+            b"*DESC.SEQ1.TABLE[].STUFF?\n"
+            b"*DESC.SEQ1.TABLE[].INPB?\n"
+        )
         expected = OrderedDict()
         expected["REPEATS"] = (31, 0, "Repeats", None, False)
         expected["USE_INPA"] = (32, 32, "Use", None, False)
         expected["STUFF"] = (64, 54, "Stuff", None, False)
         expected["INPB"] = (38, 37, "Inp B", ["None", "First", "Second"], False)
         assert fields == expected
+
+    def test_tables_fields(self):
+        messages = [
+            "!31:0    REPEATS\n.\n",
+            "!31:0    REPEATS\n!32:32   USE_INPA\n.\n",
+            "OK =Repeats\n",
+            "OK =Repeats 2\n",
+            "OK =Use\n",
+        ]
+        self.start(messages)
+        tables_fields = self.c.get_tables_fields([("SEQ1", "TABLE"), ("SEQ2", "TABLE")])
+        # Already introspected, so doesn't ask again
+        fields = self.c.get_table_fields("SEQ2", "TABLE")
+        self.c.stop()
+        assert self.sent() == (
+            b"SEQ1.TABLE.FIELDS?\n"
+            b"SEQ2.TABLE.FIELDS?\n"
+            b"*DESC.SEQ1.TABLE[].REPEATS?\n"
+            b"*DESC.SEQ2.TABLE[].REPEATS?\n"
+            b"*DESC.SEQ2.TABLE[].USE_INPA?\n"
+        )
+        assert list(tables_fields) == [("SEQ1", "TABLE"), ("SEQ2", "TABLE")]
+        assert tables_fields[("SEQ1", "TABLE")] == OrderedDict(
+            REPEATS=(31, 0, "Repeats", None, False)
+        )
+        assert fields == tables_fields[("SEQ2", "TABLE")]
+        assert fields is not tables_fields[("SEQ2", "TABLE")]
+        assert fields["USE_INPA"] == (32, 32, "Use", None, False)
+
+
+class FakePandAHandler(socketserver.StreamRequestHandler):
+    """Answers the introspection queries of a PandA with made up blocks"""
+
+    def setup(self):
+        super().setup()
+        self.request.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+
+    def handle(self):
+        n_blocks, n_fields = self.server.n_blocks, self.server.n_fields
+        while True:
+            line = self.rfile.readline().decode()
+            if not line:
+                return
+            line = line.strip()
+            if line.endswith("<B") or line.endswith("<"):
+                # Table write, data follows up to a blank line
+                data = []
+                for data_line in iter(self.rfile.readline, b"\n"):
+                    data.append(data_line.decode().strip())
+                if line.endswith("<B"):
+                    decoded = base64.b64decode("".join(data))
+                    values = np.frombuffer(decoded, dtype="<u4").tolist()
+                    self.server.tables[line[:-2]] = values
+                else:
+                    self.server.tables[line[:-1]] = [int(x) for x in data]
+                resp = "OK\n"
+            elif line == "*BLOCKS?":
+                resp = "".join("!B%d 4\n" % i for i in range(n_blocks)) + ".\n"
+            elif line.startswith("*DESC."):
+                resp = "OK =Description of %s\n" % line[6:-1]
+            elif line.startswith("*ENUMS."):
+                resp = "!ZERO\n!ONE\n!TWO\n.\n"
+            elif line.endswith(".*?"):
+                resp = (
+                    "".join("!F%d %d param enum\n" % (i, i) for i in range(n_fields))
+                    + ".\n"
+                )
+            else:
+                resp = "ERR Unknown request\n"
+            self.wfile.write(resp.encode())
+
+
+class TestFakePandABenchmark(unittest.TestCase):
+    def setUp(self):
+        self.server = socketserver.ThreadingTCPServer(
+            ("localhost", 0), FakePandAHandler
+        )
+        self.server.daemon_threads = True
+        self.server.n_blocks, self.server.n_fields = 50, 40
+        self.server.tables = {}
+        self.thread = threading.Thread(target=self.server.serve_forever)
+        self.thread.start()
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+        self.thread.join()
+
+    def test_connect_and_introspect(self):
+        writes = []
+
+        class CountingSocket(socket.socket):
+            def sendall(self, data, *args):
+                writes.append(data.count(b"\n"))
+                return super().sendall(data, *args)
+
+        start = time.time()
+        c = PandABlocksClient("localhost", self.server.server_address[1])
+        c.start(socket_cls=CountingSocket)
+        try:
+            blocks = c.get_blocks_data()
+        finally:
+            c.stop()
+        elapsed = time.time() - start
+        print(
+            f"{sum(writes)} messages in {len(writes)} writes, "
+            f"connect and introspect {elapsed:.3f}s"
+        )
+        assert list(blocks) == sorted("B%d" % i for i in range(50))
+        assert blocks["B3"].fields["F7"] == FieldData(
+            "param", "enum", "Description of B3.F7", ["ZERO", "ONE", "TWO"]
+        )
+        # *BLOCKS, then *DESC and .* for each block, then *DESC and *ENUMS for
+        # each field
+        assert sum(writes) == 1 + 50 * 2 + 50 * 40 * 2
+        assert len(writes) < sum(writes) / 10
+
+    def test_set_seq_table(self):
+        c = PandABlocksClient("localhost", self.server.server_address[1])
+        c.start()
+        try:
+            # A 4096 row sequencer table is 4 uint32s per row
+            int_values = np.arange(4096 * 4, dtype=np.uint32) * 104729
+            start = time.time()
+            c.set_table("SEQ1", "TABLE", int_values)
+            ascii_time = time.time() - start
+            start = time.time()
+            c.set_table_base64("SEQ2", "TABLE", encode_table_base64(int_values))
+            base64_time = time.time() - start
+        finally:
+            c.stop()
+        print(f"4096 row table: decimal {ascii_time:.4f}s, base64 {base64_time:.4f}s")
+        assert self.server.tables["SEQ1.TABLE"] == int_values.tolist()
+        assert self.server.tables["SEQ2.TABLE"] == int_values.tolist()
@@ -1,3 +1,4 @@
+import json
 import shutil
 import unittest
 from collections import OrderedDict
@@ -7,7 +8,15 @@ from mock import ANY, patch
 from malcolm.core import AlarmSeverity, Process, Queue, Subscribe
 from malcolm.modules.builtin.defines import tmp_dir
 from malcolm.modules.pandablocks.controllers import PandAManagerController
-from malcolm.modules.pandablocks.pandablocksclient import BlockData, FieldData
+from malcolm.modules.pandablocks.controllers.pandamanagercontroller import (
+    introspection_from_json,
+    introspection_to_json,
+)
+from malcolm.modules.pandablocks.pandablocksclient import (
+    BlockData,
+    FieldData,
+    TableFieldData,
+)
 from malcolm.modules.pandablocks.util import BitsTable, PositionCapture
 
 
@@ -41,6 +50,8 @@ class PandABlocksManagerControllerTest(unittest.TestCase):
         blocks_data["TTLIN"] = BlockData(2, "", fields)
         blocks_data["PCAP"] = BlockData(1, "", {})
         self.client.get_blocks_data.return_value = blocks_data
+        self.client.get_idn.return_value = "PandA SW: 3.0 FPGA: 0.1.9"
+        self.client.get_tables_fields.return_value = {}
         changes = [
             ["PCOMP.INP", "ZERO"],
             ["PCOMP.STEP", "0"],
@@ -295,3 +306,68 @@ class PandABlocksManagerControllerTest(unittest.TestCase):
                 '"TTLIN1": {"x": 0.0, "y": 5.6}}',
             ],
         )
+
+    def test_change_keys_indexed(self):
+        assert self.o._change_keys["PCOMP.INP"] == ("PCOMP", "INP")
+        assert self.o._change_keys["TTLIN2.VAL"] == ("TTLIN2", "VAL")
+        assert self.o._change_keys["*METADATA.LABEL_PCOMP"] == ("PCOMP", "LABEL")
+        # Keys not in the block data are indexed the first time they are seen
+        self.o.handle_changes([("*METADATA.LABEL_TTLIN1", "Trigger")])
+        assert self.o._change_keys["*METADATA.LABEL_TTLIN1"] == ("TTLIN1", "LABEL")
+        assert self.process.block_view("P:TTLIN1").label.value == "Trigger"
+
+    def test_adapt_poll_period(self):
+        # Speeds up while changes are flowing, to a quarter of poll_period
+        periods = [1000]
+        for _ in range(4):
+            periods.append(self.o.adapt_poll_period(periods[-1], True))
+        assert periods == [1000, 500, 250, 250, 250]
+        # Backs off while idle, to 4 times poll_period
+        period = 250
+        for _ in range(20):
+            period = self.o.adapt_poll_period(period, False)
+        assert period == 4000
+
+    def test_poll_reporting(self):
+        panda = self.process.block_view("P")
+        assert panda.lastPollPeriod.value == 1000
+        assert panda.pollCpuTime.value == 0
+        assert panda.changeLatency.value == 0
+        self.o._report_poll(0.5, 0.001, None)
+        assert panda.lastPollPeriod.value == 0.5
+        assert panda.pollCpuTime.value == 0.001
+        # No changes yet so no latency to report
+        assert panda.changeLatency.value == 0
+        self.o._report_poll(0.5, 0.001, 0.002)
+        assert panda.changeLatency.value == 0.002
+
+    def test_introspection_cached(self):
+        blocks_data = self.client.get_blocks_data.return_value
+        self.client.get_blocks_data.reset_mock()
+        self.client.get_tables_fields.reset_mock()
+        # Same firmware, so introspection comes from the cache
+        assert self.o._get_introspection() == blocks_data
+        self.client.get_blocks_data.assert_not_called()
+        self.client.get_tables_fields.assert_not_called()
+        # New firmware, so ask the PandA again
+        self.client.get_idn.return_value = "PandA SW: 3.1 FPGA: 0.2.0"
+        assert self.o._get_introspection() == blocks_data
+        self.client.get_blocks_data.assert_called_once_with()
+        self.client.get_tables_fields.assert_called_once_with([])
+
+    def test_introspection_json(self):
+        blocks_data = self.client.get_blocks_data.return_value
+        tables_fields = {
+            ("SEQ1", "TABLE"): OrderedDict(
+                REPEATS=TableFieldData(15, 0, "Repeats", None, False),
+                TRIGGER=TableFieldData(
+                    19, 16, "Trigger", ["Immediate", "BITA=0"], False
+                ),
+            )
+        }
+        d = introspection_to_json("PandA", blocks_data, tables_fields)
+        assert d["idn"] == "PandA"
+        assert introspection_from_json(json.loads(json.dumps(d))) == (
+            blocks_data,
+            tables_fields,
+        )
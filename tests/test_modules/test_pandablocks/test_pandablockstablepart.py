@@ -1,10 +1,13 @@
 import unittest
 from collections import OrderedDict
 
-from mock import Mock
+from mock import Mock, patch
 
 from malcolm.core import BooleanArrayMeta, ChoiceArrayMeta, NumberArrayMeta, TableMeta
-from malcolm.modules.pandablocks.pandablocksclient import TableFieldData
+from malcolm.modules.pandablocks.pandablocksclient import (
+    TableFieldData,
+    encode_table_base64,
+)
 from malcolm.modules.pandablocks.parts.pandatablepart import PandATablePart
 
 
@@ -119,6 +122,25 @@ class PandABoxTablePartTest(unittest.TestCase):
             )
         )
 
+    def test_set_field(self):
+        rows = [
+            [32, "b", -1, 4096, True, 4097, False],
+            [0, "CC", 0, 6, True, 200, False],
+        ]
+        table = self.meta.validate(self.meta.table_cls.from_rows(rows))
+        self.o.set_field(table)
+        encoded = encode_table_base64(
+            [0x00110020, 4294967295, 4096, 4097, 0x00120000, 0, 6, 200]
+        )
+        self.client.set_table_base64.assert_called_once_with("SEQ1", "TABLE", encoded)
+        # Setting an identical table sends it without encoding it again
+        self.client.set_table_base64.reset_mock()
+        same = self.meta.validate(self.meta.table_cls.from_rows(rows))
+        with patch.object(self.o, "list_from_table") as list_from_table:
+            self.o.set_field(same)
+        list_from_table.assert_not_called()
+        self.client.set_table_base64.assert_called_once_with("SEQ1", "TABLE", encoded)
+
     def test_table_from_list(self):
         li = [
             0x00110020,
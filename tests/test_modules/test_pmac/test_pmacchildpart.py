@@ -1,19 +1,25 @@
 import shutil
+import time
+import unittest
 from datetime import datetime
 from os import environ
 from typing import List
 
 import numpy as np
 import pytest
+from annotypes import add_call_types
 from mock import ANY, Mock, call, patch
 from mock.mock import MagicMock
 from scanpointgenerator import CompoundGenerator, LineGenerator, StaticPointGenerator
 from scanpointgenerator.core.point import Point, Points
 
-from malcolm.core import Context, Process
+from malcolm.core import Context, Part, Process
 from malcolm.modules import scanning
 from malcolm.modules.builtin.defines import tmp_dir
+from malcolm.modules.pmac.infos import MotorInfo
 from malcolm.modules.pmac.parts import PmacChildPart
+from malcolm.modules.pmac.parts.pmacchildpart import PROFILE_POINTS
+from malcolm.modules.pmac.util import MIN_INTERVAL, MIN_TIME, MinTurnaround
 from malcolm.modules.scanning.infos import (
     MinTurnaroundInfo,
     MotionTrigger,
@@ -145,8 +151,7 @@ class TestPMACChildPart(ChildTestCase):
     def test_validate_returns_expected_duration(self):
         generator = CompoundGenerator([], [], [], 0.0102)
         axesToMove = ["x"]
-        # servoFrequency() return value
-        self.child.handled_requests.post.return_value = 4919.300698316487
+        self.set_attributes(self.child, servoFreq=4919.300698316487)
 
         ret = self.o.on_validate(self.context, generator, axesToMove, {})
 
@@ -158,8 +163,7 @@ class TestPMACChildPart(ChildTestCase):
         generator = CompoundGenerator([xs], [], [], 0.0)
         self.set_motor_attributes()
         axesToMove = ["x"]
-        # servoFrequency() return value
-        self.child.handled_requests.post.return_value = 4919.300698316487
+        self.set_attributes(self.child, servoFreq=4919.300698316487)
 
         ret = self.o.on_validate(self.context, generator, axesToMove, {})
 
@@ -172,8 +176,7 @@ class TestPMACChildPart(ChildTestCase):
         generator = CompoundGenerator([xs], [], [], 0.0)
         self.set_motor_attributes()
         axesToMove = ["x"]
-        # servoFrequency() return value
-        self.child.handled_requests.post.return_value = 4919.300698316487
+        self.set_attributes(self.child, servoFreq=4919.300698316487)
 
         ret = self.o.on_validate(self.context, generator, axesToMove, {})
 
@@ -186,8 +189,7 @@ class TestPMACChildPart(ChildTestCase):
         generator = CompoundGenerator([xs], [], [], 0.0)
         self.set_motor_attributes()
         axesToMove = ["x"]
-        # servoFrequency() return value
-        self.child.handled_requests.post.return_value = 4919.300698316487
+        self.set_attributes(self.child, servoFreq=4919.300698316487)
         # Create a part info saying we are not providing any triggers
         part_info = {"motion_trigger": [MotionTriggerInfo(MotionTrigger.NONE)]}
 
@@ -202,8 +204,7 @@ class TestPMACChildPart(ChildTestCase):
         generator = CompoundGenerator([xs], [], [], 0.0, continuous=False)
         self.set_motor_attributes()
         axesToMove = ["x"]
-        # servoFrequency() return value
-        self.child.handled_requests.post.return_value = 4919.300698316487
+        self.set_attributes(self.child, servoFreq=4919.300698316487)
 
         ret = self.o.on_validate(self.context, generator, axesToMove, {})
 
@@ -214,8 +215,7 @@ class TestPMACChildPart(ChildTestCase):
     def test_validate_does_not_tweak_duration_if_not_taking_part(self):
         static = StaticPointGenerator(10)
         generator = CompoundGenerator([static], [], [], 0.0)
-        # servoFrequency() return value
-        self.child.handled_requests.post.return_value = 4919.300698316487
+        self.set_attributes(self.child, servoFreq=4919.300698316487)
         # Create a part info saying we are not providing any triggers
         part_info = {"motion_trigger": [MotionTriggerInfo(MotionTrigger.NONE)]}
 
@@ -227,8 +227,7 @@ class TestPMACChildPart(ChildTestCase):
     def test_validate_raises_AssertionError_for_negative_duration(self):
         generator = CompoundGenerator([], [], [], -1.0)
         axesToMove = ["x"]
-        # servoFrequency() return value
-        self.child.handled_requests.post.return_value = 4919.300698316487
+        self.set_attributes(self.child, servoFreq=4919.300698316487)
 
         self.assertRaises(
             AssertionError, self.o.on_validate, self.context, generator, axesToMove, {}
@@ -250,6 +249,55 @@ class TestPMACChildPart(ChildTestCase):
 
         assert tweaks is None
 
+    def test_validate_cache_misses_when_motor_limits_change(self):
+        class RowGatePart(Part):
+            def setup(self, registrar):
+                registrar.hook(scanning.hooks.ReportStatusHook, self.on_report_status)
+
+            @add_call_types
+            def on_report_status(self) -> scanning.hooks.UInfos:
+                # So the pmac doesn't have to align to the servo frequency
+                return MotionTriggerInfo(MotionTrigger.ROW_GATE)
+
+        c = scanning.controllers.RunnableController("SCAN", self.config_dir.value)
+        c.add_part(PmacChildPart(name="pmac", mri="PMAC", initial_visibility=True))
+        c.add_part(RowGatePart("trigger"))
+        self.process.add_controller(c)
+        b = self.context.block_view("SCAN")
+        self.set_motor_attributes()
+        xs = LineGenerator("x", "mm", 0.0, 0.5, 3, alternate=True)
+        generator = CompoundGenerator([xs], [], [], 0.0)
+        first = b.validate(generator, ["x"])
+        second = b.validate(generator, ["x"])
+        assert c.validate_hits == 1
+        assert second["generator"].duration == first["generator"].duration
+        # The duration depends on how fast x can move, so a change in its max
+        # velocity means validating again
+        self.set_attributes(self.child_x, maxVelocity=2.0)
+        third = b.validate(generator, ["x"])
+        assert c.validate_hits == 1
+        assert third["generator"].duration < first["generator"].duration
+
+    def test_validate_cache_hits_when_aligning_to_servo_frequency(self):
+        c = scanning.controllers.RunnableController("SCAN", self.config_dir.value)
+        c.add_part(PmacChildPart(name="pmac", mri="PMAC", initial_visibility=True))
+        self.process.add_controller(c)
+        b = self.context.block_view("SCAN")
+        self.set_motor_attributes()
+        self.set_attributes(self.child, servoFreq=4919.300698316487)
+        xs = LineGenerator("x", "mm", 0.0, 0.5, 3, alternate=True)
+        generator = CompoundGenerator([xs], [], [], 0.0102)
+        first = b.validate(generator, ["x"])
+        second = b.validate(generator, ["x"])
+        assert c.validate_hits == 1
+        assert second["generator"].duration == first["generator"].duration == 0.010568
+        # The duration is aligned to the servo frequency, so a change in it
+        # means validating again
+        self.set_attributes(self.child, servoFreq=2500.0)
+        third = b.validate(generator, ["x"])
+        assert c.validate_hits == 1
+        assert third["generator"].duration == 0.010398
+
     def do_check_output_quantized(self):
         assert self.child.handled_requests.mock_calls[:4] == [
             call.post(
@@ -709,6 +757,59 @@ class TestPMACChildPart(ChildTestCase):
         assert len(self.o.completed_steps_lookup) == 11
         assert len(self.o.profile["timeArray"]) == 3
 
+    @patch("malcolm.modules.pmac.parts.pmacchildpart.PROFILE_POINTS", 4)
+    def test_update_step_with_lookahead(self):
+        self.do_configure(axes_to_scan=["x", "y"], x_pos=0.0, y_pos=0.2)
+        assert self.o.end_index == 2
+        self.o.registrar = Mock()
+        self.o.on_run(self.context)
+        # The next batch is calculated in a thread while the first is running
+        assert self.o.lookahead is not None
+        self.o.lookahead_thread.join()
+        # But only swapped in on the cothread when it is needed
+        assert self.o.end_index == 2
+        assert len(self.o.completed_steps_lookup) == 5
+        self.child.handled_requests.reset_mock()
+        self.o.update_step(3, self.context.block_view("PMAC"))
+        assert self.o.end_index == 3
+        assert len(self.o.completed_steps_lookup) == 11
+        # So update_step just has to write it
+        assert self.child.handled_requests.mock_calls == [
+            call.post(
+                "writeProfile",
+                a=pytest.approx([0.375, 0.5, 0.625, 0.6375]),
+                b=pytest.approx([0.0, 0.0, 0.0, 0.0125]),
+                timeArray=pytest.approx([500000, 500000, 500000, 100000]),
+                userPrograms=pytest.approx([1, 4, 2, 8]),
+                velocityMode=pytest.approx([0, 0, 1, 1]),
+            )
+        ]
+        assert self.o.points_written == 8
+        # And the batch after that is started
+        assert self.o.lookahead is not None
+        assert self.o.wait_for_lookahead()
+        assert self.o.end_index == 4
+        assert self.o.lookahead is None
+
+    @patch("malcolm.modules.pmac.parts.pmacchildpart.PROFILE_POINTS", 4)
+    def test_abort_discards_lookahead(self):
+        self.do_configure(axes_to_scan=["x", "y"], x_pos=0.0, y_pos=0.2)
+        self.o.registrar = Mock()
+        self.o.on_run(self.context)
+        thread = self.o.lookahead_thread
+        assert thread is not None
+        profile = self.o.profile
+        self.o.on_abort(self.context)
+        # The thread has finished, and its points were not swapped in
+        assert not thread.is_alive()
+        assert self.o.lookahead is None
+        assert self.o.lookahead_thread is None
+        assert self.o.profile is profile
+        assert self.o.end_index == 2
+        # And no more are started
+        self.o.start_lookahead()
+        assert self.o.lookahead is None
+
     def test_update_step_does_not_report_when_trigger_not_every_point(self):
         # Need to configure so we don't error
         self.do_configure(axes_to_scan=[])
@@ -1531,3 +1632,109 @@ class TestSparseGeneratorProfileTailOffs(ChildTestCase):
         add_tail_off = self.o.create_generator_profile_sparse(0)
 
         assert add_tail_off is False
+
+
+class TestProfileBenchmark(unittest.TestCase):
+    """Build whole trajectory profiles a slab at a time, checking the vectorized
+    code against the point by point code it replaces"""
+
+    def make_part(self, generator, trigger):
+        generator.prepare()
+        o = PmacChildPart(name="pmac", mri="PMAC")
+        o.axis_mapping = {
+            axis: MotorInfo(
+                cs_axis=cs_axis,
+                cs_port="CS1",
+                acceleration=1000.0,
+                resolution=0.001,
+                offset=0.0,
+                max_velocity=100.0,
+                current_position=0.0,
+                scannable=axis,
+                velocity_settle=0.0,
+                units="mm",
+                user_high_limit=0.0,
+                user_low_limit=0.0,
+                dial_high_limit=0.0,
+                dial_low_limit=0.0,
+            )
+            for axis, cs_axis in zip(generator.axes, "AB")
+        }
+        o.output_triggers = trigger
+        o.min_turnaround = MinTurnaround(MIN_TIME, MIN_INTERVAL)
+        o.generator = generator
+        o.steps_up_to = generator.size
+        o.profile = dict(timeArray=[], velocityMode=[], userPrograms=[])
+        for info in o.axis_mapping.values():
+            o.profile[info.cs_axis.lower()] = []
+        return o
+
+    def build_profile(self, generator, trigger):
+        # Do what on_configure and update_step do, but write to a dict
+        o = self.make_part(generator, trigger)
+        written = {k: [] for k in o.profile}
+        start = time.time()
+        o.calculate_generator_profile(0, do_run_up=True)
+        while True:
+            for k, v in o.profile.items():
+                written[k] += v[:PROFILE_POINTS]
+                o.profile[k] = v[PROFILE_POINTS:]
+            if o.end_index == o.steps_up_to and not o.profile["timeArray"]:
+                break
+            o.calculate_generator_profile(o.end_index)
+        elapsed = time.time() - start
+        written["completedSteps"] = o.completed_steps_lookup
+        return written, elapsed
+
+    def snake_grid(self, size):
+        return CompoundGenerator(
+            [
+                LineGenerator("y", "mm", 0, 1, size),
+                LineGenerator("x", "mm", 0, 10, size, alternate=True),
+            ],
+            [],
+            [],
+            0.01,
+        )
+
+    def line(self, size):
+        return CompoundGenerator([LineGenerator("x", "mm", 0, 10, size)], [], [], 0.001)
+
+    def one_point_at_a_time(self):
+        def add_generator_point_pairs(o, points, start, end, point_num, joined):
+            o.add_generator_point_pair(points[start], point_num, joined[start])
+            return start + 1
+
+        def add_sparse_points(o, points, start, end, same_velocities):
+            return start + 1, o.add_sparse_point(
+                points, start, True, same_velocities[start]
+            )
+
+        return patch.multiple(
+            PmacChildPart,
+            add_generator_point_pairs=add_generator_point_pairs,
+            add_sparse_points=add_sparse_points,
+        )
+
+    def test_vectorized_matches_point_by_point(self):
+        for trigger in (MotionTrigger.EVERY_POINT, MotionTrigger.ROW_GATE):
+            with self.one_point_at_a_time():
+                expected, t_points = self.build_profile(self.snake_grid(100), trigger)
+            actual, t_vectorized = self.build_profile(self.snake_grid(100), trigger)
+            print(
+                f"{trigger.name} 10k point snake: point by point {t_points:.3f}s, "
+                f"vectorized {t_vectorized:.3f}s"
+            )
+            assert list(actual) == list(expected)
+            for k, v in expected.items():
+                assert actual[k] == pytest.approx(v, abs=1e-12), k
+
+    def test_line_benchmark(self):
+        for size in (10000, 100000, 1000000):
+            profile, elapsed = self.build_profile(
+                self.line(size), MotionTrigger.EVERY_POINT
+            )
+            print(f"{size} point line: {elapsed:.3f}s")
+            # Run up, position and upper bound of every point, tail off
+            assert len(profile["timeArray"]) == 2 * size + 2
+            assert profile["completedSteps"][-1] == size
@@ -25,3 +25,8 @@ class TestPmacStatusPart(ChildTestCase):
     def test_servo_freq(self):
         freq = self.b.servoFrequency()
         assert freq == 2500.04
+
+    def test_servo_freq_attribute_follows_child(self):
+        assert self.b.servoFreq.value == 2500.04
+        self.set_attributes(self.process.get_controller("my_mri"), servoFreq=2000.0)
+        assert self.b.servoFreq.value == 2000.0
@@ -1,4 +1,5 @@
 import difflib
+import time
 import unittest
 from typing import Dict, List, Tuple
 
@@ -8,7 +9,7 @@ from p4p.client.thread import TimeoutError
 from p4p.nt.scalar import ntfloat
 
 from malcolm import __version__
-from malcolm.core import Process, Queue
+from malcolm.core import Controller, NumberMeta, Part, Process, Queue
 from malcolm.modules.demo.blocks import counter_block, hello_block
 from malcolm.modules.pva.blocks import pva_server_block
 from malcolm.modules.pva.controllers.pvaconvert import EMPTY
@@ -748,3 +749,52 @@ class TestPVAServer(unittest.TestCase):
         with self.assertRaises(RuntimeError) as cm:
             self.ctxt.rpc("TESTHELLO.error", EMPTY)
         self.assertEqual(str(cm.exception), "RuntimeError: You called method error()")
+
+
+class ManyAttributesPart(Part):
+    def setup(self, registrar):
+        self.attrs = []
+        for i in range(200):
+            attr = NumberMeta("float64").create_attribute_model()
+            registrar.add_attribute_model(f"attr{i}", attr)
+            self.attrs.append(attr)
+
+
+class TestPVAMonitorBenchmark(unittest.TestCase):
+    def setUp(self):
+        self.process = Process("procmany")
+        self.part = ManyAttributesPart("part")
+        controller = Controller("TESTMANY")
+        controller.add_part(self.part)
+        self.process.add_controller(controller)
+        self.process.add_controller(pva_server_block(mri="PVA")[-1])
+        self.process.start()
+        self.addCleanup(self.process.stop, timeout=2)
+        from p4p.client.cothread import Context
+
+        self.ctxt = Context("pva", unwrap=False)
+        self.addCleanup(self.ctxt.close)
+
+    def test_monitor_benchmark(self):
+        q = Queue()
+        start = time.time()
+        m = self.ctxt.monitor("TESTMANY", q.put)
+        self.addCleanup(m.close)
+        q.get(timeout=5)
+        connect = time.time() - start
+        rounds = 20
+        start = time.time()
+        for i in range(1, rounds + 1):
+            for attr in self.part.attrs:
+                attr.set_value(float(i))
+        # Monitor updates may be squashed, so wait for the last one
+        value = q.get(timeout=5)
+        while value["attr199.value"] != rounds:
+            value = q.get(timeout=5)
+        elapsed = time.time() - start
+        updates = rounds * len(self.part.attrs)
+        print(
+            f"Monitor on 200 attribute block: connect {connect:.3f}s, "
+            f"{updates} updates in {elapsed:.3f}s, {updates / elapsed:.0f}/s"
+        )
+        assert all(value[f"attr{i}.value"] == rounds for i in range(200))
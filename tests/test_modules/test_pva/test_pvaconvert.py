@@ -0,0 +1,90 @@
+import time
+import unittest
+
+import numpy as np
+
+from malcolm.core import Alarm, Process, TimeStamp
+from malcolm.modules.builtin.controllers import ManagerController
+from malcolm.modules.demo.blocks import counter_block, hello_block
+from malcolm.modules.pva.controllers import pvaconvert
+from malcolm.modules.pva.controllers.pvaconvert import (
+    convert_dict_to_value,
+    convert_to_type_tuple_value,
+    convert_value_for_set,
+    update_path,
+)
+
+
+def assert_same(a, b):
+    if isinstance(a, np.ndarray) or isinstance(b, np.ndarray):
+        assert np.array_equal(a, b)
+    elif isinstance(a, dict):
+        assert list(a) == list(b)
+        for k in a:
+            assert_same(a[k], b[k])
+    elif isinstance(a, list):
+        assert len(a) == len(b)
+        for x, y in zip(a, b):
+            assert_same(x, y)
+    else:
+        assert a == b and type(a) is type(b), f"{a!r} != {b!r}"
+
+
+class TestPvaConvert(unittest.TestCase):
+    def setUp(self):
+        self.process = Process("proc")
+        for controller in counter_block(mri="COUNTER") + hello_block(mri="HELLO"):
+            self.process.add_controller(controller)
+        # The layout attribute is a Table
+        self.process.add_controller(ManagerController("MANAGER", "/tmp"))
+        self.process.start()
+        self.addCleanup(self.process.stop, timeout=2)
+
+    def check_value_for_set(self, obj):
+        _, expected = convert_to_type_tuple_value(obj)
+        # Twice, so we check the cached converters as well
+        assert_same(convert_value_for_set(obj), expected)
+        assert_same(convert_value_for_set(obj), expected)
+        if hasattr(obj, "to_dict"):
+            for k in obj:
+                if k != "typeid":
+                    self.check_value_for_set(obj[k])
+
+    def test_value_for_set_matches(self):
+        for mri in ("COUNTER", "HELLO", "MANAGER"):
+            self.check_value_for_set(self.process.get_controller(mri)._block)
+
+    def test_type_cached(self):
+        block = self.process.get_controller("COUNTER")._block
+        v1 = convert_dict_to_value(block)
+        n_types = len(pvaconvert._types)
+        v2 = convert_dict_to_value(block)
+        assert len(pvaconvert._types) == n_types
+        assert v1.type().aspy() == v2.type().aspy()
+
+    def test_update_path(self):
+        block = self.process.get_controller("COUNTER")._block
+        value = convert_dict_to_value(block)
+        value.unmark()
+        update_path(value, ["counter", "value"], 5)
+        update_path(value, ["counter", "timeStamp"], TimeStamp())
+        assert value["counter.value"] == 5
+        assert value.changedSet() == {
+            "counter.value",
+            "counter.timeStamp.userTag",
+            "counter.timeStamp.secondsPastEpoch",
+            "counter.timeStamp.nanoseconds",
+        }
+
+    def test_value_for_set_benchmark(self):
+        updates = [TimeStamp(), Alarm.major("bad"), 3.5] * 1000
+        start = time.time()
+        for update in updates:
+            convert_to_type_tuple_value(update)
+        full = time.time() - start
+        start = time.time()
+        for update in updates:
+            convert_value_for_set(update)
+        fast = time.time() - start
+        print(f"3000 updates: value for set {fast:.3f}s, with type spec {full:.3f}s")
+        assert fast < full
@@ -1,4 +1,5 @@
 import shutil
+import time
 import unittest
 from typing import Optional
 
@@ -19,6 +20,7 @@ from malcolm.core import (
     AlarmSeverity,
     AlarmStatus,
     Context,
+    Info,
     PartRegistrar,
     Process,
 )
@@ -39,7 +41,12 @@ from malcolm.modules.scanning.hooks import (
     UInfos,
     ValidateHook,
 )
-from malcolm.modules.scanning.infos import ParameterTweakInfo
+from malcolm.modules.scanning.infos import (
+    MinTurnaroundInfo,
+    MotionTrigger,
+    MotionTriggerInfo,
+    ParameterTweakInfo,
+)
 from malcolm.modules.scanning.parts import DetectorChildPart
 from malcolm.modules.scanning.util import DetectorTable, RunnableStates
 
@@ -1784,3 +1791,103 @@ class TestRunnableControllerValidation(unittest.TestCase):
         assert actual["detectors"].to_dict() == expected_table.to_dict()
         actual["generator"].duration = 0.1
         assert actual["generator"].to_dict() == compound_generator.to_dict()
+
+    def test_validate_cached(self):
+        self._add_detector_block_and_part(
+            self.detector_one_mri, self.detector_one_part_name
+        )
+        self._start_process()
+        compound_generator = self._get_compound_generator(1.0)
+        first = self.b.validate(
+            generator=compound_generator, axesToMove=["x"], fileDir="/tmp"
+        )
+        assert self.c.validate_hits == 0
+        assert self.b.validateHitRate.value == 0
+        detector = self.p.get_controller(self.detector_one_mri)
+        detector_calls = detector.validate_calls
+        second = self.b.validate(
+            generator=compound_generator, axesToMove=["x"], fileDir="/tmp"
+        )
+        # The parent answered from its cache without asking the detector
+        assert self.c.validate_hits == 1
+        assert self.b.validateHitRate.value == 50
+        assert detector.validate_calls == detector_calls
+        assert second.to_dict() == first.to_dict()
+        # Tweaked params are new objects each time
+        assert second["detectors"] is not first["detectors"]
+        # The same params with different ones in between still hit
+        self.b.validate(generator=compound_generator, axesToMove=["y"], fileDir="/tmp")
+        self.b.validate(generator=compound_generator, axesToMove=["x"], fileDir="/tmp")
+        assert self.c.validate_hits == 2
+
+    def test_validate_cache_misses_when_state_changes(self):
+        self._add_detector_block_and_part(
+            self.detector_one_mri, self.detector_one_part_name
+        )
+        self._start_process()
+        compound_generator = self._get_compound_generator(1.0)
+        first = self.b.validate(
+            generator=compound_generator, axesToMove=["x"], fileDir="/tmp"
+        )
+        # A change in the status the detector reports isn't answered from cache
+        detector = self.p.get_controller(self.detector_one_mri)
+        detector.parts["EXPOSURE"].readout_time.set_value(0.2)
+        second = self.b.validate(
+            generator=compound_generator, axesToMove=["x"], fileDir="/tmp"
+        )
+        assert self.c.validate_hits == 0
+        assert first["detectors"].exposure[0] == pytest.approx(0.89995)
+        assert second["detectors"].exposure[0] == pytest.approx(0.79995)
+        # Neither is a change to the design
+        self.b.save(designName="validate_cache")
+        self.b.validate(generator=compound_generator, axesToMove=["x"], fileDir="/tmp")
+        assert self.c.validate_hits == 0
+
+    def test_validate_key_same_for_equal_status_infos(self):
+        class UnkeyableInfo(Info):
+            def __init__(self, thing):
+                self.thing = thing
+
+        self._start_process()
+        encoded = {"generator": "{}"}
+
+        def key(*infos):
+            return self.c._validate_key(encoded, {}, {"part": list(infos)})
+
+        first = key(
+            MinTurnaroundInfo(0.1, 0.001), MotionTriggerInfo(MotionTrigger.ROW_GATE)
+        )
+        second = key(
+            MinTurnaroundInfo(0.1, 0.001), MotionTriggerInfo(MotionTrigger.ROW_GATE)
+        )
+        assert first is not None
+        assert first == second
+        assert key(MinTurnaroundInfo(0.2, 0.001)) != key(MinTurnaroundInfo(0.1, 0.001))
+        # Only an Info with a value based key can be cached
+        assert key(UnkeyableInfo(object())) is None
+
+    def test_validate_cache_benchmark(self):
+        self._add_motion_block_and_part()
+        self._add_detector_block_and_part(
+            self.detector_one_mri, self.detector_one_part_name
+        )
+        self._add_detector_block_and_part(
+            self.detector_two_mri, self.detector_two_part_name, readout_time=0.25
+        )
+        self._start_process()
+        compound_generator = self._get_compound_generator(0.1)
+        start = time.time()
+        first = self.b.validate(
+            generator=compound_generator, axesToMove=["x"], fileDir="/tmp"
+        )
+        uncached = time.time() - start
+        start = time.time()
+        for _ in range(10):
+            actual = self.b.validate(
+                generator=compound_generator, axesToMove=["x"], fileDir="/tmp"
+            )
+        cached = (time.time() - start) / 10
+        print(f"validate: uncached {uncached:.4f}s, cached {cached:.4f}s")
+        assert actual.to_dict() == first.to_dict()
+        assert self.c.validate_hits == 10
+        assert cached < uncached
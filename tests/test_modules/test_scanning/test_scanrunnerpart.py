@@ -1,12 +1,26 @@
+import glob
+import os
+import shutil
 import sys
+import time
 import unittest
 from datetime import datetime
+from tempfile import mkdtemp
 
 from mock import Mock, call, mock_open, patch
 from ruamel.yaml import YAMLError
 from scanpointgenerator import CompoundGenerator, LineGenerator
 
-from malcolm.core import AbortedError, NotWriteableError, TimeoutError
+from malcolm.core import (
+    AbortedError,
+    Context,
+    Future,
+    NotWriteableError,
+    Process,
+    TimeoutError,
+)
+from malcolm.modules.builtin.controllers import ManagerController
+from malcolm.modules.demo.blocks import detector_block
 from malcolm.modules.scanning.parts.scanrunnerpart import (
     RunnerStates,
     ScanOutcome,
@@ -996,7 +1010,7 @@ class TestScanRunnerPart(unittest.TestCase):
         end_time = "2020-01-06-16:04:10"
         scan_runner_part = ScanRunnerPart(self.name, self.mri)
 
-        expected_string = "{set:<30}{no:<10}{outcome:<14}{start:<20}{end}".format(
+        expected_string = "{set:<30}{no:<10}{outcome:<14}{start:<20}{end:<20}-".format(
             set=set_name,
             no=scan_number,
             outcome=scan_runner_part.get_enum_label(outcome),
@@ -1009,6 +1023,20 @@ class TestScanRunnerPart(unittest.TestCase):
 
         self.assertEqual(expected_string, actual_string)
 
+    def test_get_report_string_with_gap(self):
+        scan_runner_part = ScanRunnerPart(self.name, self.mri)
+
+        actual_string = scan_runner_part.get_report_string(
+            "set-name",
+            12,
+            ScanOutcome.SUCCESS,
+            "2020-01-06-15:54:17",
+            "2020-01-06-16:04:10",
+            1.23456,
+        )
+
+        self.assertTrue(actual_string.endswith("2020-01-06-16:04:10 1.235"))
+
     def test_add_report_line_writes_line(self):
         scan_runner_part = ScanRunnerPart(self.name, self.mri)
         report_string = "example_report_string"
@@ -1666,3 +1694,218 @@ class TestScanRunnerPartRunScanMethod(unittest.TestCase):
 
         # Check the outcome calls
         self.increment_scan_successes_mock.assert_called_once()
+
+    def test_run_scan_validates_next_scan_while_running(self):
+        # Queue up this scan and the one after it
+        next_generator_mock = Mock(name="next_generator_mock")
+        next_directory = "/test/set/directory/scan-22"
+        self.scan_runner_part.upcoming_scans.extend(
+            [
+                (self.generator_mock, self.scan_directory),
+                (next_generator_mock, next_directory),
+            ]
+        )
+
+        # Check the next scan is validated before run is called
+        def run():
+            self.scan_block_mock.validate_async.assert_called_once_with(
+                next_generator_mock, fileDir=next_directory
+            )
+
+        self.scan_block_mock.run.side_effect = run
+        self.scan_runner_part.context = Mock(name="context_mock")
+
+        # Call the run_scan method
+        self.scan_runner_part.run_scan(
+            self.set_name,
+            self.scan_block_mock,
+            self.set_directory,
+            self.scan_number,
+            self.report_filepath,
+            self.generator_mock,
+        )
+
+        # Check we waited for the validate, and the next scan is now first
+        self.scan_runner_part.context.wait_all_futures.assert_called_once_with(
+            self.scan_block_mock.validate_async.return_value
+        )
+        self.assertEqual(
+            [(next_generator_mock, next_directory)],
+            list(self.scan_runner_part.upcoming_scans),
+        )
+        self.increment_scan_successes_mock.assert_called_once()
+
+    def test_run_scan_succeeds_when_validating_next_scan_fails(self):
+        self.scan_runner_part.upcoming_scans.extend(
+            [(self.generator_mock, self.scan_directory), (Mock(), "/next")]
+        )
+        self.scan_runner_part.context = Mock(name="context_mock")
+        self.scan_runner_part.context.wait_all_futures.side_effect = ValueError()
+
+        # Call the run_scan method
+        self.scan_runner_part.run_scan(
+            self.set_name,
+            self.scan_block_mock,
+            self.set_directory,
+            self.scan_number,
+            self.report_filepath,
+            self.generator_mock,
+        )
+
+        self.increment_scan_successes_mock.assert_called_once()
+
+    def test_run_scan_reports_gap_since_last_scan(self):
+        self.scan_runner_part.context = Mock(name="context_mock")
+        self.scan_runner_part.last_run_end = time.time() - 2.0
+
+        # Call the run_scan method
+        self.scan_runner_part.run_scan(
+            self.set_name,
+            self.scan_block_mock,
+            self.set_directory,
+            self.scan_number,
+            self.report_filepath,
+            self.generator_mock,
+        )
+
+        report_string = self.add_report_line_mock.call_args[0][1]
+        gap = float(report_string.split()[-1])
+        self.assertTrue(2.0 <= gap < 3.0)
+        self.assertTrue(time.time() - self.scan_runner_part.last_run_end < 1.0)
+
+
+class TestScanRunnerPartPrepareNextScan(unittest.TestCase):
+    """Run some scans of a demo detector, preparing the next one each time"""
+
+    scan_yaml = """
+        - scan:
+            name: first
+            repeats: 2
+            generator:
+                generators:
+                    - line:
+                        axes: x
+                        units: mm
+                        start: 0
+                        stop: 1
+                        size: 2
+                duration: 0.01
+        - scan:
+            name: second
+            repeats: 1
+            generator:
+                generators:
+                    - line:
+                        axes: x
+                        units: mm
+                        start: 0
+                        stop: 1
+                        size: 3
+                duration: 0.01
+        """
+
+    def setUp(self):
+        self.output_directory = mkdtemp()
+        self.addCleanup(shutil.rmtree, self.output_directory)
+        self.process = Process("proc")
+        for controller in detector_block(
+            mri="DET", config_dir=self.output_directory, readout_time=0.001
+        ):
+            self.process.add_controller(controller)
+        self.runner = ManagerController("RUNNER", self.output_directory)
+        self.part = ScanRunnerPart("RUNNER", "DET")
+        self.runner.add_part(self.part)
+        self.process.add_controller(self.runner)
+        self.process.start()
+        self.addCleanup(self.process.stop, timeout=2)
+        self.part.get_file_contents = Mock(return_value=self.scan_yaml)
+        self.part.loadFile()
+        self.part.output_directory.set_value(self.output_directory)
+
+    def run_scans(self):
+        self.part.run(Context(self.process))
+        (report,) = glob.glob(f"{self.output_directory}/DET-*/report.txt")
+        with open(report) as f:
+            lines = f.read().splitlines()
+        shutil.rmtree(os.path.dirname(report))
+        return lines
+
+    def test_prepare_next_scan(self):
+        self.part.prepare_next_scan.set_value(True)
+        detector = self.process.get_controller("DET")
+
+        lines = self.run_scans()
+
+        assert self.part.scan_successes.value == 3
+        # All but the first scan were validated before they were configured
+        assert detector.validate_hits == 2
+        # Only the first scan has no gap
+        assert [line.split()[-1] == "-" for line in lines] == [True, False, False]
+
+    def record_validate_hits(self):
+        # Record whether each validate of the detector was answered from cache
+        detector = self.process.get_controller("DET")
+        hits = []
+        update_hit_rate = detector._update_validate_hit_rate
+
+        def record(hit):
+            hits.append(hit)
+            update_hit_rate(hit)
+
+        detector._update_validate_hit_rate = record
+        return hits
+
+    def test_configure_uses_prepared_validate(self):
+        self.part.prepare_next_scan.set_value(True)
+        hits = self.record_validate_hits()
+        self.run_scans()
+        # Each configure after the first is answered by the validate of the
+        # previous scan's prepare, which itself had to validate
+        assert hits == [False, False, True, False, True]
+
+    def test_configure_validates_if_prepared_params_differ(self):
+        self.part.prepare_next_scan.set_value(True)
+        hits = self.record_validate_hits()
+        validate_next_scan = self.part.validate_next_scan
+
+        def validate_elsewhere(scan_block):
+            # Prepare the next scan with a different fileDir to its configure
+            if not self.part.upcoming_scans:
+                return None
+            generator, scan_directory = self.part.upcoming_scans[0]
+            self.part.upcoming_scans[0] = (generator, self.output_directory)
+            future = validate_next_scan(scan_block)
+            self.part.upcoming_scans[0] = (generator, scan_directory)
+            return future
+
+        self.part.validate_next_scan = validate_elsewhere
+        self.run_scans()
+        assert self.part.scan_successes.value == 3
+        assert hits == [False] * 5
+
+    def test_prepare_next_scan_failure_is_logged(self):
+        future = Future(None)
+        future.set_exception(ValueError("Bad generator"))
+        self.part.context = Context(self.process)
+        self.part.log = Mock(name="logger")
+        self.part.wait_for_next_scan(future)
+        self.part.log.warning.assert_called_once_with(
+            "Validating next scan failed: Bad generator"
+        )
+
+    def test_prepare_next_scan_benchmark(self):
+        detector = self.process.get_controller("DET")
+        lines = self.run_scans()
+        assert detector.validate_hits == 0
+        unprepared = [float(line.split()[-1]) for line in lines[1:]]
+        # Write to different directories so the first run's scans aren't cached
+        os.mkdir(f"{self.output_directory}/prepared")
+        self.part.output_directory.set_value(f"{self.output_directory}/prepared")
+        self.part.prepare_next_scan.set_value(True)
+        self.part.run(Context(self.process))
+        assert detector.validate_hits == 2
+        (report,) = glob.glob(f"{self.output_directory}/prepared/DET-*/report.txt")
+        with open(report) as f:
+            lines = f.read().splitlines()
+        prepared = [float(line.split()[-1]) for line in lines[1:]]
+        print(f"Gaps between scans: {unprepared} unprepared, {prepared} prepared")
@@ -3,16 +3,26 @@ import unittest
 from sys import version_info
 
 import cothread
+import numpy as np
 from annotypes import json_encode
 from tornado import gen
 from tornado.websocket import websocket_connect
 
 from malcolm.compat import OrderedDict
-from malcolm.core import Post, Process, Queue, ResponseError
+from malcolm.core import (
+    Controller,
+    Get,
+    NumberArrayMeta,
+    Post,
+    Process,
+    Queue,
+    ResponseError,
+    Subscribe,
+)
 from malcolm.modules.builtin.blocks import proxy_block
 from malcolm.modules.demo.blocks import counter_block, hello_block
 from malcolm.modules.web.blocks import web_server_block, websocket_client_block
-from malcolm.modules.web.util import IOLoopHelper
+from malcolm.modules.web.util import BINARY_SUBPROTOCOL, IOLoopHelper, decode_binary
 
 
 class TestSystemWSCommsServerOnly(unittest.TestCase):
@@ -48,6 +58,87 @@ class TestSystemWSCommsServerOnly(unittest.TestCase):
     def send_message(self, req, convert_json=True):
         yield self.send_messages([req], convert_json)
 
+    @gen.coroutine
+    def send_batch(self, messages, num_responses):
+        conn = yield websocket_connect(f"ws://localhost:{self.socket}/ws")
+        conn.write_message(
+            json_encode(dict(typeid="malcolm:core/Batch:1.0", messages=messages))
+        )
+        frames = []
+        responses = []
+        while len(responses) < num_responses:
+            resp = yield conn.read_message()
+            resp = json.loads(resp)
+            frames.append(resp["typeid"])
+            responses += resp["messages"]
+        conn.close()
+        cothread.Callback(self.result.put, (frames, responses))
+
+    @gen.coroutine
+    def send_binary_message(self, msg):
+        conn = yield websocket_connect(
+            f"ws://localhost:{self.socket}/ws", subprotocols=[BINARY_SUBPROTOCOL]
+        )
+        conn.write_message(json_encode(msg))
+        resp = yield conn.read_message()
+        cothread.Callback(self.result.put, (conn.selected_subprotocol, resp))
+        conn.close()
+
+    def test_binary_arrays(self):
+        controller = Controller("arrays")
+        array = np.arange(1000, dtype=np.int32)
+        controller.add_block_field(
+            "array",
+            NumberArrayMeta("int32").create_attribute_model(array),
+            None,
+            False,
+        )
+        self.process.add_controller(controller)
+        msg = Get(id=0, path=["arrays", "array", "value"]).to_dict()
+        IOLoopHelper.call(self.send_binary_message, msg)
+        subprotocol, resp = self.result.get(timeout=2)
+        assert subprotocol == BINARY_SUBPROTOCOL
+        assert isinstance(resp, bytes)
+        # Much smaller than the JSON would be
+        assert len(resp) < len(json_encode(array.tolist()))
+        d = decode_binary(resp)
+        assert d["typeid"] == "malcolm:core/Return:1.0"
+        assert d["value"].dtype == np.int32
+        assert np.array_equal(d["value"], array)
+        # No arrays means JSON as usual
+        msg = Get(id=1, path=["arrays", "array", "meta", "dtype"]).to_dict()
+        IOLoopHelper.call(self.send_binary_message, msg)
+        _, resp = self.result.get(timeout=2)
+        assert json.loads(resp) == dict(
+            typeid="malcolm:core/Return:1.0", id=1, value="int32"
+        )
+
+    def test_batch(self):
+        messages = [
+            Subscribe(id=i, path=["hello", "greet", "meta"], delta=True).to_dict()
+            for i in range(100)
+        ]
+        messages.append(Get(id=100, path=["hello", "meta", "label"]).to_dict())
+        messages.append(dict(typeid="malcolm:core/Get:1.0", path=["hello"]))
+        IOLoopHelper.call(self.send_batch, messages, len(messages))
+        frames, responses = self.result.get(timeout=2)
+        assert set(frames) == {"malcolm:core/Batch:1.0"}
+        # Many fewer frames than responses
+        assert len(frames) < len(responses) / 5
+        assert [r["id"] for r in responses if r["typeid"].endswith("Delta:1.0")] == (
+            list(range(100))
+        )
+        assert [r for r in responses if r["id"] == 100] == [
+            dict(typeid="malcolm:core/Return:1.0", id=100, value="hello")
+        ]
+        assert [r for r in responses if r["id"] == -1] == [
+            dict(
+                typeid="malcolm:core/Error:1.0",
+                id=-1,
+                message="FieldError: id field not present in JSON message",
+            )
+        ]
+
     def test_server_and_simple_client(self):
         msg = OrderedDict()
         msg["typeid"] = "malcolm:core/Post:1.0"
@@ -143,6 +234,23 @@ class TestSystemWSCommsServerOnly(unittest.TestCase):
         else:
             raise Exception("Got bad python version info")
 
+    def test_error_server_and_simple_client_not_a_dict(self):
+        for message in ("[]", "1"):
+            IOLoopHelper.call(self.send_message, message, convert_json=False)
+            resp = self.result.get(timeout=2)
+            assert resp["typeid"] == "malcolm:core/Error:1.0"
+            assert resp["id"] == -1
+
+    def test_error_server_and_simple_client_bad_batch(self):
+        msg = dict(typeid="malcolm:core/Batch:1.0", messages=1)
+        IOLoopHelper.call(self.send_message, msg)
+        resp = self.result.get(timeout=2)
+        assert resp == dict(
+            typeid="malcolm:core/Error:1.0",
+            id=-1,
+            message="ValueError: Batch messages should be a list",
+        )
+
     def test_error_server_and_simple_client_no_id(self):
         msg = OrderedDict()
         msg["typeid"] = "malcolm:core/Post:1.0"
@@ -0,0 +1,81 @@
+import unittest
+from typing import Union
+
+import numpy as np
+from annotypes import Anno, Array, deserialize_object, json_decode, json_encode
+
+from malcolm.core import Delta, NumberArrayMeta, Table, TableMeta, Update
+from malcolm.core.notifier import freeze
+from malcolm.modules.web.util import BATCH_TYPEID, decode_binary, encode_binary
+
+with Anno("Names"):
+    ANames = Union[Array[str]]
+with Anno("Values"):
+    AValues = Union[Array[np.float64]]
+
+
+class MyTable(Table):
+    def __init__(self, name: ANames, value: AValues) -> None:
+        self.name = name
+        self.value = value
+
+
+class TestBinary(unittest.TestCase):
+    def test_no_arrays_is_json(self):
+        response = Update(id=2, value=dict(a=1, b=["x", "y"]))
+        assert encode_binary(response) == json_encode(response)
+
+    def test_array_round_trip(self):
+        array = np.random.random(1001)
+        attr = NumberArrayMeta("float64").create_attribute_model(array)
+        response = Update(id=1, value=freeze(attr))
+        frame = encode_binary(response)
+        assert isinstance(frame, bytes)
+        assert len(frame) < len(json_encode(response))
+        decoded = deserialize_object(decode_binary(frame))
+        assert decoded.id == 1
+        value = decoded.value["value"]
+        assert value.dtype == np.float64
+        assert np.array_equal(value, array)
+        # Everything else is as JSON would give
+        expected = json_decode(json_encode(response))["value"]
+        assert decoded.value["meta"] == expected["meta"]
+        assert decoded.value["alarm"] == expected["alarm"]
+
+    def test_table_and_batch(self):
+        meta = TableMeta.from_table(MyTable, "A table")
+        table = MyTable(["a", "b", "c"], np.array([1.5, 2.5, 3.5]))
+        changes = [[["value"], meta.validate(table)], [["alarm"]]]
+        batch = dict(
+            typeid=BATCH_TYPEID,
+            messages=[Delta(id=3, changes=changes), Update(id=4, value=5)],
+        )
+        d = decode_binary(encode_binary(batch))
+        assert d["typeid"] == BATCH_TYPEID
+        delta = deserialize_object(d["messages"][0])
+        assert delta.changes[0][1]["name"] == ["a", "b", "c"]
+        assert np.array_equal(delta.changes[0][1]["value"], [1.5, 2.5, 3.5])
+        assert delta.changes[1] == [["alarm"]]
+        assert d["messages"][1] == dict(typeid="malcolm:core/Update:1.0", id=4, value=5)
+
+    def test_big_endian_and_strided(self):
+        big = np.arange(5, dtype=">u2")
+        strided = np.arange(10, dtype=np.int64)[::2]
+        d = decode_binary(encode_binary(Update(id=1, value=[big, strided])))
+        assert d["value"][0].dtype == np.dtype("<u2")
+        assert np.array_equal(d["value"][0], big)
+        assert np.array_equal(d["value"][1], strided)
+
+    def test_multi_dimensional_and_scalar(self):
+        image = np.arange(24, dtype=np.uint16).reshape(4, 6)
+        transposed = image.T
+        scalar = np.array(3.5)
+        d = decode_binary(
+            encode_binary(Update(id=1, value=[image, transposed, scalar]))
+        )
+        assert d["value"][0].shape == (4, 6)
+        assert np.array_equal(d["value"][0], image)
+        assert d["value"][1].shape == (6, 4)
+        assert np.array_equal(d["value"][1], transposed)
+        assert d["value"][2].shape == ()
+        assert d["value"][2] == 3.5
@@ -1,6 +1,9 @@
 import unittest
 
-from malcolm.core import Process
+from annotypes import json_encode
+from mock import Mock, patch
+
+from malcolm.core import Process, Return, Update
 from malcolm.modules.web.controllers import WebsocketClientComms
 
 
@@ -14,3 +17,23 @@ class TestWebsocketClientComms(unittest.TestCase):
         assert self.o.port == 8008
         assert self.o.connect_timeout == 10.0
         assert self.o.mri == "mri"
+
+    @patch("malcolm.modules.web.controllers.websocketclientcomms.cothread")
+    def test_on_message_batch(self, mock_cothread):
+        requests = [Mock(), Mock()]
+        self.o._request_lookup = {1: requests[0], 2: requests[1]}
+        self.o.on_message(
+            json_encode(
+                dict(
+                    typeid="malcolm:core/Batch:1.0",
+                    messages=[Update(id=1, value=3), Return(id=2, value=4)],
+                )
+            )
+        )
+        assert self.o._request_lookup == {1: requests[0]}
+        calls = mock_cothread.Callback.call_args_list
+        assert [c[0][0] for c in calls] == [r.callback for r in requests]
+        assert [c[0][1].to_dict() for c in calls] == [
+            Update(id=1, value=3).to_dict(),
+            Return(id=2, value=4).to_dict(),
+        ]
@@ -1,4 +1,5 @@
 import os
+import subprocess
 import sys
 import unittest
 
@@ -10,6 +11,7 @@ from malcolm.modules.builtin.parts import StringPart
 from malcolm.yamlutil import (
     Section,
     check_yaml_names,
+    lazy_creators,
     make_block_creator,
     make_include_creator,
 )
@@ -105,6 +107,21 @@ class TestYamlUtil(unittest.TestCase):
             == "'thingb' should be called 'thingc' as it comes from 'thingc.yaml'"
         )
 
+    def test_lazy_creators(self):
+        globals_d = dict(__name__="mymodule.blocks", __file__="/tmp/__init__.py")
+        make_creator = Mock()
+        getattr_, all_ = lazy_creators(
+            globals_d, make_creator, "thinga.yaml", "thingb.yaml"
+        )
+        assert all_ == ["thinga", "thingb"]
+        make_creator.assert_not_called()
+        assert getattr_("thingb") == make_creator.return_value
+        make_creator.assert_called_once_with("/tmp/__init__.py", "thingb.yaml")
+        # Stored so the module won't ask again
+        assert globals_d["thingb"] == make_creator.return_value
+        with self.assertRaises(AttributeError):
+            getattr_("thingc")
+
     @patch("importlib.import_module")
     def test_instantiate(self, mock_import):
         @add_call_types
@@ -157,5 +174,56 @@ class TestYamlUtil(unittest.TestCase):
         assert repr(s) == expected
 
 
+# Time how long it takes a fresh interpreter to import what it needs and
+# create the Blocks of DEMO-HELLO, then list the modules it imported
+IMPORT_BENCHMARK = """
+import sys, time
+start = time.time()
+for module in sys.argv[2:]:
+    __import__(module)
+import malcolm.imalcolm
+from malcolm.yamlutil import make_include_creator
+controllers, parts = make_include_creator(sys.argv[1])()
+print(time.time() - start)
+print(" ".join(sys.modules))
+"""
+
+# Subpackages that used to be imported by the blocks of any module
+EAGER_IMPORTS = [
+    f"malcolm.modules.{module}.{subpackage}"
+    for module, subpackage in [
+        ("ADCore", "parts"),
+        ("pmac", "parts"),
+        ("pandablocks", "controllers"),
+        ("pva", "controllers"),
+        ("scanning", "parts"),
+        ("web", "parts"),
+    ]
+]
+
+
+class TestImportBenchmark(unittest.TestCase):
+    def run_demo_hello(self, *imports):
+        from malcolm.modules import demo
+
+        yaml_path = os.path.join(os.path.dirname(demo.__file__), "DEMO-HELLO.yaml")
+        output = subprocess.check_output(
+            [sys.executable, "-c", IMPORT_BENCHMARK, yaml_path] + list(imports)
+        )
+        elapsed, modules = output.decode().splitlines()[-2:]
+        return float(elapsed), set(modules.split())
+
+    def test_demo_hello_import_benchmark(self):
+        elapsed, modules = self.run_demo_hello()
+        # Only the modules that DEMO-HELLO uses are imported
+        assert "malcolm.modules.demo.parts" in modules
+        assert "malcolm.modules.web.parts" in modules
+        for module in ["malcolm.modules.ADCore", "malcolm.modules.pmac", "p4p"]:
+            assert module not in modules
+        eager, _ = self.run_demo_hello(*EAGER_IMPORTS)
+        # Timings vary too much between machines to assert on, so just print
+        print(f"imalcolm and DEMO-HELLO: lazy {elapsed:.3f}s, eager {eager:.3f}s")
+
+
 if __name__ == "__main__":
     unittest.main(verbosity=2)